@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Asyncio fake data generation — row production overlaps the database writes
+
+One producer builds chunks of rows on the event loop while every table of the
+current FK level has its own writer: a pooled connection that COPYs and commits
+each chunk in a worker thread (psycopg2 releases the GIL while it waits on the
+server). users.sessions and projects.projects write side by side, then
+documents and the three project link tables.
+
+Each table's queue holds at most queue_chunks chunks: when a writer falls
+behind, the producer waits for it instead of piling rows up in memory. The
+producer visits the tables of a level round-robin, so with --seed the same
+rows come back on every run (not the same rows as the synchronous engine).
+"""
+import asyncio
+from contextlib import nullcontext
+from itertools import islice
+
+from src.scripts.copy_loader import COPY_TEXT, load_rows
+from src.scripts.parallel_generate import STAGE_LEVELS
+from src.scripts.quest_4_Generate_Fake_Data import (
+    CHUNK_SIZE,
+    SESSION_WINDOW_DAYS,
+    STREAMS,
+    get_connection,
+    registry,
+    seed_generators,
+    stage_options,
+)
+from src.scripts.server_side_generate import SERVER_GENERATORS
+
+# Chunks waiting per table: memory stays under tables x (QUEUE_CHUNKS + 1) x chunk_size rows
+QUEUE_CHUNKS = 2
+
+
+def _write_chunk(conn, table, columns, rows, method):
+    with conn.cursor() as cur:
+        loaded = load_rows(cur, table, columns, rows, method)
+    conn.commit()
+    return loaded
+
+
+async def _writer(table, columns, queue, method):
+    conn = await asyncio.to_thread(get_connection)
+    total = 0
+    try:
+        while (rows := await queue.get()) is not None:
+            total += await asyncio.to_thread(_write_chunk, conn, table, columns, rows, method)
+        return total
+    finally:
+        conn.close()
+
+
+async def _produce(streams, queues, chunk_size):
+    """Build one chunk per table in turn until every stream is exhausted."""
+    pending = {table: iter(rows) for table, _, rows in streams}
+    while pending:
+        for table, rows in list(pending.items()):
+            chunk = list(islice(rows, chunk_size))
+            if chunk:
+                await queues[table].put(chunk)  # backpressure: waits while the queue is full
+            else:
+                await queues[table].put(None)
+                del pending[table]
+            await asyncio.sleep(0)  # let writers pick the chunk up before building the next one
+
+
+def _server_stage(stage, count, options):
+    conn = get_connection()
+    try:
+        return SERVER_GENERATORS[stage](conn, count, **options)
+    finally:
+        conn.close()
+
+
+async def generate_level(conn, level, counts, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, server_side=(),
+                         session_window=SESSION_WINDOW_DAYS, queue_chunks=QUEUE_CHUNKS, skew=None):
+    """Write every table of one FK level concurrently; returns rows per stage."""
+    streams, owners, server_jobs = [], {}, {}
+    for stage in level:
+        options = stage_options(stage, session_window, None if stage in server_side else skew)
+        if stage in server_side:
+            server_jobs[stage] = asyncio.to_thread(_server_stage, stage, counts[stage], options)
+            continue
+        for stream in STREAMS[stage](conn, counts[stage], fast=fast, **options):
+            streams.append(stream)
+            owners[stream[0]] = stage
+    conn.commit()  # id lookups and reservations: nothing stays open while the level runs
+
+    queues = {table: asyncio.Queue(maxsize=queue_chunks) for table, _, _ in streams}
+    try:
+        async with asyncio.TaskGroup() as group:  # one failed writer cancels the producer and the others
+            writers = {table: group.create_task(_writer(table, columns, queues[table], method))
+                       for table, columns, _ in streams}
+            servers = {stage: group.create_task(job) for stage, job in server_jobs.items()}
+            group.create_task(_produce(streams, queues, chunk_size))
+    except ExceptionGroup as failed:
+        for table, _, _ in streams:
+            registry.discard(table)
+        raise failed.exceptions[0]  # the same error the synchronous engine would raise
+    for table, _, _ in streams:
+        registry.confirm(table)
+
+    totals = {stage: task.result() for stage, task in servers.items()}
+    for table, task in writers.items():
+        totals[owners[table]] = totals.get(owners[table], 0) + task.result()
+    return totals
+
+
+async def generate_async(counts, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, server_side=(),
+                         session_window=SESSION_WINDOW_DAYS, queue_chunks=QUEUE_CHUNKS, seed=None, report=None,
+                         skew=None):
+    """Generate every stage level by level (FK order) on top of the reference tables; returns rows per stage.
+
+    A LoadReport, if given, gets one entry per level.
+    """
+    if seed is not None:
+        seed_generators(seed)
+    totals = {}
+    conn = get_connection()
+    try:
+        for level in STAGE_LEVELS:
+            with report.stage("+".join(level)) if report else nullcontext({}) as entry:
+                level_totals = await generate_level(
+                    conn, level, counts, method, chunk_size, fast, server_side, session_window, queue_chunks, skew
+                )
+                entry["rows"] = sum(level_totals.values())
+            totals.update(level_totals)
+    finally:
+        conn.close()
+    registry.clear()  # writers loaded rows on their own connections
+    return totals
+
+
+def generate(counts, **options):
+    """Synchronous entry point: runs generate_async on a fresh event loop."""
+    return asyncio.run(generate_async(counts, **options))
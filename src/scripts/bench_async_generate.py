@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Wall time of the synchronous generator versus the asyncio engine
+
+Both engines load the same counts into truncated tables with --fast, best of
+--repeat runs each. The async engine only wins the time the synchronous one
+spends waiting on the server: with the database on the same single core,
+expect little.
+"""
+import argparse
+import time
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+
+COUNTS = {"users": 20_000, "sessions": 200_000, "projects": 20_000, "project_links": 50_000,
+          "documents": 200_000, "decision_logs": 20_000}
+
+
+def timed_run(engine, counts, chunk_size):
+    argv = ["--engine", engine, "--chunk-size", str(chunk_size), "--fast"]
+    for stage, count in counts.items():
+        argv += ["--count", f"{stage}={count}"]
+    started = time.perf_counter()
+    generator.main(argv)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every count")
+    parser.add_argument("--chunk-size", type=int, default=generator.CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    counts = {stage: int(count * args.scale) for stage, count in COUNTS.items()}
+    rows = sum(counts.values()) + 2 * counts["project_links"]
+    results = {}
+    for engine in ("sync", "async"):
+        results[engine] = min(timed_run(engine, counts, args.chunk_size) for _ in range(args.repeat))
+
+    print(f"{'engine':<8} {'seconds':>9} {'rows/sec':>12} {'vs sync':>8}")
+    for engine, seconds in results.items():
+        print(f"{engine:<8} {seconds:>9.2f} {rows / seconds:>12,.0f} {results['sync'] / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
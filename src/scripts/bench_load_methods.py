@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Rows/sec comparison of the generator load paths: COPY text, COPY binary and execute_values
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from src.scripts.copy_loader import LOAD_METHODS, load_rows
+from src.scripts.quest_4_Generate_Fake_Data import DOCUMENT_COLUMNS, fake, get_connection
+
+BENCH_TABLE = "bench_documents"
+
+
+def sample_document_rows(count):
+    # Built once up front so only the load path is timed
+    rows = []
+    for i in range(count):
+        custom_props = {
+            "reviewed": random.choice([True, False]),
+            "tags": [fake.word(), "tab\there", 'quote"d', "back\\slash"],
+            "source": random.choice(["internal", "external"]),
+            "format": random.choice(["pdf", "docx", "txt"])
+        }
+        rows.append((
+            random.randint(1, 1000), fake.file_name(), datetime.now(), 1, fake.name(), 1,
+            fake.image_url(), 0.1, random.randint(1, 3), random.randint(1, 4),
+            fake.text(100), f"{i:040x}", json.dumps(custom_props), None
+        ))
+    return rows
+
+
+def run(conn, rows, repeat=3):
+    results = {}
+    cur = conn.cursor()
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {BENCH_TABLE} (LIKE documents.documents INCLUDING DEFAULTS)")
+    for method in LOAD_METHODS:
+        best = None
+        for _ in range(repeat):
+            cur.execute(f"TRUNCATE {BENCH_TABLE}")
+            conn.commit()
+            started = time.perf_counter()
+            load_rows(cur, BENCH_TABLE, DOCUMENT_COLUMNS, rows, method)
+            conn.commit()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[method] = len(rows) / best
+    cur.execute(f"DROP TABLE {BENCH_TABLE}")
+    conn.commit()
+    cur.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = sample_document_rows(args.rows)
+    conn = get_connection()
+    try:
+        results = run(conn, rows, args.repeat)
+    finally:
+        conn.close()
+
+    baseline = results["insert"]
+    print(f"{'method':<12} {'rows/sec':>12} {'vs insert':>10}")
+    for method, rate in results.items():
+        print(f"{method:<12} {rate:>12,.0f} {rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Keyset pagination, server-side cursors and prepared lookups versus the plain reads
+
+Loads --documents documents spread over --projects projects (so each project
+holds many), then reports for the largest project:
+- latency of one page at increasing depths, OFFSET versus keyset
+- peak Python heap (tracemalloc) of reading the project with fetchall()
+  versus repository.stream()
+- median latency of the by-id and latest-documents lookups, plain versus prepared
+"""
+import argparse
+import tracemalloc
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts import repository
+from src.scripts.bench_timing import median_ms
+from src.scripts.bulk_load import connect
+from src.scripts.connection_pool import using_dsn
+
+DATASET = {"users": 1_000, "sessions": 100, "project_links": 100, "decision_logs": 100}
+DEPTHS = (0, 1_000, 10_000, 50_000)
+
+
+def load(dsn, documents, projects):
+    argv = ["--fast"]
+    for stage, count in {**DATASET, "projects": projects, "documents": documents}.items():
+        argv += ["--count", f"{stage}={count}"]
+    with using_dsn(dsn):  # load the database paged and timed below
+        generator.main(argv)
+
+
+def offset_page(conn, project_id, offset, limit):
+    with conn.cursor() as cur:
+        cur.execute(repository.select_sql("documents", ("project_id",)) + " OFFSET %(offset)s LIMIT %(limit)s",
+                    {"project_id": project_id, "offset": offset, "limit": limit})
+        return [repository.Document._make(row) for row in cur]
+
+
+def peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def fetch_all(conn, project_id):
+    with conn.cursor() as cur:
+        cur.execute(repository.select_sql("documents", ("project_id",)), {"project_id": project_id})
+        return sum(1 for _ in cur.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN (default: the generator's connection)")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--no-load", action="store_true", help="reuse the documents already loaded")
+    parser.add_argument("--limit", type=int, default=repository.PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.no_load:
+        load(args.dsn, args.documents, args.projects)
+    conn = connect(args.dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT project_id, COUNT(*) FROM documents.documents GROUP BY 1 ORDER BY 2 DESC LIMIT 1")
+            project_id, documents = cur.fetchone()
+        print(f"project {project_id}: {documents:,} documents, pages of {args.limit}")
+
+        print(f"\n{'depth':>8} {'OFFSET ms':>10} {'keyset ms':>10} {'speedup':>8}")
+        for depth in (d for d in DEPTHS if d < documents - args.limit):
+            # The keyset cursor at this depth is the key of the row just before it
+            previous = offset_page(conn, project_id, depth - 1, 1)[0] if depth else None
+            after = repository.key_of("documents", previous) if previous else None
+            assert repository.page(conn, "documents", after, args.limit, project_id=project_id)[0] == \
+                offset_page(conn, project_id, depth, args.limit)
+            offset = median_ms(lambda: offset_page(conn, project_id, depth, args.limit), args.repeat)
+            keyset = median_ms(lambda: repository.page(conn, "documents", after, args.limit, project_id=project_id),
+                               args.repeat)
+            print(f"{depth:>8,} {offset:>10.2f} {keyset:>10.2f} {offset / keyset:>7.1f}x")
+        conn.rollback()
+
+        fetched = peak_kb(lambda: fetch_all(conn, project_id))
+        streamed = peak_kb(lambda: sum(1 for _ in repository.stream(conn, "documents", project_id=project_id)))
+        conn.rollback()
+        print(f"\nread all {documents:,}: fetchall() peak {fetched:,.0f} KB, stream() peak {streamed:,.0f} KB "
+              f"({fetched / streamed:.0f}x less)")
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT document_id, project_id FROM documents.documents TABLESAMPLE SYSTEM (1) LIMIT 500")
+            sample = cur.fetchall() or [(0, 0)]
+        cases = {
+            "document": [(document_id,) for document_id, _ in sample],
+            "recent_documents": [(project, 20) for _, project in sample],
+        }
+        print()
+        for name, calls in cases.items():
+            record, sql = repository.LOOKUPS[name]
+            sql = repository._positional(sql.format(columns=", ".join(record._fields)))
+
+            def plain():
+                with conn.cursor() as cur:
+                    for params in calls:
+                        cur.execute(sql, params)
+                        cur.fetchall()
+
+            def prepared():
+                for params in calls:
+                    repository.lookup(conn, name, *params)
+
+            prepared()  # PREPARE outside the timing
+            plain_us = median_ms(plain, args.repeat) * 1000 / len(calls)
+            prepared_us = median_ms(prepared, args.repeat) * 1000 / len(calls)
+            print(f"lookup {name}: plain {plain_us:.0f} µs, prepared {prepared_us:.0f} µs "
+                  f"({plain_us / prepared_us:.2f}x)")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
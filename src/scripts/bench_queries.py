@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Latency/throughput benchmark of the canonical ProjectPulse queries
+
+Each query runs --iterations times spread over --concurrency connections and
+reports p50/p95/p99 latency and queries/sec. --matviews adds the materialized
+view equivalents, --scale-factor first regenerates a dataset of that size (with
+--skew-profile's distributions), and --output/--compare-to persist runs as JSON
+and diff them.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts.bulk_load import connect
+from src.scripts.connection_pool import using_dsn
+from src.scripts.query_workload import QUERIES, draw_params, variants, workload_values
+
+
+def generate_dataset(dsn, scale_factor, skew_profile="uniform"):
+    with using_dsn(dsn):  # load the database that is refreshed, analyzed and timed below
+        generator.main(["--fast", "--scale-factor", str(scale_factor), "--skew-profile", skew_profile])
+    # Imported here: refreshing needs the views' owner, plain runs do not
+    from src.scripts.matview_refresh import refresh_stale
+    refresh_stale(dsn)
+    conn = connect(dsn)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(latencies, wall_seconds):
+    latencies = sorted(latencies)
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "throughput_qps": round(len(latencies) / wall_seconds, 1),
+    }
+
+
+def connect_worker(dsn, ready):
+    """An autocommit connection for a worker; if it fails, ready is broken so nobody waits for this worker."""
+    try:
+        conn = connect(dsn)
+        conn.autocommit = True
+    except BaseException:
+        ready.abort()
+        raise
+    return conn
+
+
+def start_workers(ready, jobs):
+    """Release the workers waiting on ready; raises the error of a worker that never got there."""
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        wait(jobs)
+        errors = [job.exception() for job in jobs if job.exception() is not None]
+        raise next((e for e in errors if not isinstance(e, threading.BrokenBarrierError)), errors[0]) from None
+
+
+def _worker(dsn, sql, query, values, iterations, seed, ready):
+    conn = connect_worker(dsn, ready)  # read-only: no transaction left open between queries
+    rng = random.Random(seed)
+    latencies = []
+    try:
+        with conn.cursor() as cur:
+            ready.wait()
+            for _ in range(iterations):
+                params = draw_params(query, values, rng)
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                cur.fetchall()
+                latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        conn.close()
+    return latencies
+
+
+def run_query(dsn, sql, query, values, iterations=200, concurrency=4, warmup=20, seed=0):
+    """Time one query; connections are opened before the clock starts."""
+    _worker(dsn, sql, query, values, warmup, seed, threading.Barrier(1))
+    ready = threading.Barrier(concurrency + 1)
+    shares = [iterations // concurrency + (1 if n < iterations % concurrency else 0) for n in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        jobs = [pool.submit(_worker, dsn, sql, query, values, share, seed + n + 1, ready)
+                for n, share in enumerate(shares)]
+        start_workers(ready, jobs)
+        started = time.perf_counter()
+        latencies = [latency for job in jobs for latency in job.result()]
+        wall = time.perf_counter() - started
+    return summarize(latencies, wall)
+
+
+def run(dsn=None, names=None, matviews=False, iterations=200, concurrency=4, warmup=20, seed=0):
+    conn = connect(dsn)
+    try:
+        params = {param for name in names or QUERIES for param in QUERIES[name]["params"]}
+        values = workload_values(conn, sorted(params))
+    finally:
+        conn.close()
+    return {
+        label: run_query(dsn, sql, query, values, iterations, concurrency, warmup, seed)
+        for label, sql, query in variants(names, matviews)
+    }
+
+
+def print_results(results, previous=None):
+    header = f"{'query':<36} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'qps':>9}"
+    print(header + ("  p95 vs previous" if previous else ""))
+    for label, stats in results.items():
+        line = (f"{label:<36} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+                f"{stats['throughput_qps']:>9,.0f}")
+        if previous and label in previous:
+            line += f"  {(stats['p95_ms'] / previous[label]['p95_ms'] - 1):+.0%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN (default: the generator's connection); matviews need SELECT on them")
+    parser.add_argument("--queries", nargs="+", choices=list(QUERIES), metavar="QUERY", help="default: all of them")
+    parser.add_argument("--matviews", action="store_true", help="also run the materialized view equivalents")
+    parser.add_argument("--iterations", type=int, default=200, help="timed executions per query")
+    parser.add_argument("--concurrency", type=int, default=4, help="connections running each query at once")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed executions per query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale-factor", type=float,
+                        help="regenerate the dataset first, at the generator's --scale-factor N")
+    parser.add_argument("--skew-profile", choices=list(generator.SKEW_PROFILES), default="uniform",
+                        help="the generator's --skew-profile for --scale-factor datasets")
+    parser.add_argument("--output", help="write the run (settings + results) to this JSON file")
+    parser.add_argument("--compare-to", help="a previous --output file to diff p95 against")
+    args = parser.parse_args()
+
+    if args.scale_factor:
+        generate_dataset(args.dsn, args.scale_factor, args.skew_profile)
+    results = run(args.dsn, args.queries, args.matviews, args.iterations, args.concurrency, args.warmup, args.seed)
+
+    previous = None
+    if args.compare_to:
+        with open(args.compare_to) as f:
+            previous = json.load(f)["results"]
+    print_results(results, previous)
+
+    if args.output:
+        run_info = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "scale_factor": args.scale_factor,
+            "skew_profile": args.skew_profile if args.scale_factor else None,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        }
+        with open(args.output, "w") as f:
+            json.dump({"run": run_info, "results": results}, f, indent=2)
+        print(f"💾 results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Search through the GIN indexes versus the ILIKE / sequential scan path
+
+Loads --documents documents (1M by default), creates the search indexes, then
+times each search with the indexes and with index scans disabled (the plan
+ILIKE gets without them). Trigram rows need pg_trgm; without it only the JSONB
+containment rows run. Needs the tables' owner:
+--dsn "dbname=projectpulse user=postgres host=localhost"
+"""
+import argparse
+import random
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts.bench_timing import query_ms
+from src.scripts.bulk_load import connect
+from src.scripts.connection_pool import using_dsn
+from src.scripts.search import document_query, ensure_indexes, project_query, trigrams_available
+
+# Everything but documents stays small: the benchmark is about one wide table
+DATASET = {"users": 1_000, "sessions": 100, "projects": 10_000, "project_links": 1_000, "decision_logs": 100}
+
+
+def load(dsn, documents):
+    argv = ["--fast"]
+    for stage, count in {**DATASET, "documents": documents}.items():
+        argv += ["--count", f"{stage}={count}"]
+    with using_dsn(dsn):  # load the database indexed and timed below
+        generator.main(argv)
+
+
+def search_terms(cur, rng):
+    """A filename stem, a mistyped one and a tag drawn from the loaded documents."""
+    cur.execute("SELECT filename, custom_properties FROM documents.documents TABLESAMPLE SYSTEM (1) LIMIT 100")
+    sample = cur.fetchall()
+    if not sample:
+        raise ValueError("No documents to draw search terms from: generate data first")
+    filename, properties = rng.choice(sample)
+    stem = filename.rsplit(".", 1)[0]
+    typo = stem[:1] + stem[2:] + stem[1:2] if len(stem) > 3 else stem
+    return stem, typo, rng.choice(properties["tags"])
+
+
+def cases(trigrams, stem, typo, tag):
+    if trigrams:
+        yield f"filename/description '{stem}'", document_query(stem), document_query(stem, fuzzy=False)
+        yield f"typo '{typo}'", document_query(typo), document_query(typo, fuzzy=False)
+        yield f"project title '{stem}'", project_query(stem), project_query(stem, fuzzy=False)
+    properties = {"tags": [tag]}
+    yield f"tags contain '{tag}'", document_query(properties=properties, fuzzy=False), None
+    properties = {"source": "external", "reviewed": True}
+    yield "source + reviewed", document_query(properties=properties, fuzzy=False), None
+    if trigrams:
+        yield f"'{stem}' + tag", document_query(stem, {"tags": [tag]}), document_query(stem, {"tags": [tag]}, False)
+
+
+def timed(cur, query, repeat, indexes):
+    """Median ms of query, with index scans on or forced off for this transaction."""
+    sql, params = query
+    cur.execute("SET LOCAL enable_bitmapscan = %s; SET LOCAL enable_indexscan = %s", (indexes, indexes))
+    cur.execute("SELECT set_config('pg_trgm.word_similarity_threshold', '0.6', true)")
+    statement = cur.mogrify(sql, params).decode()
+    timing = query_ms(cur, statement, repeat)
+    cur.connection.rollback()
+    return timing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN of the tables' owner (default: the generator's connection)")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--no-load", action="store_true", help="reuse the documents already loaded")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.no_load:
+        load(args.dsn, args.documents)
+    conn = connect(args.dsn)
+    try:
+        ready, skipped = ensure_indexes(conn)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE documents.documents; ANALYZE projects.projects")
+        conn.autocommit = False
+        trigrams = trigrams_available(conn)
+        if skipped:
+            print(f"⚠️ pg_trgm is not installed: trigram searches skipped ({', '.join(skipped)})")
+
+        with conn.cursor() as cur:
+            try:
+                stem, typo, tag = search_terms(cur, random.Random(args.seed))
+            except ValueError as e:
+                raise SystemExit(f"❌ {e}") from None
+            conn.rollback()
+            print(f"{'search':<40} {'GIN ms':>10} {'seq scan ms':>12} {'ILIKE ms':>10} {'speedup':>8}")
+            for label, indexed, ilike in cases(trigrams, stem, typo, tag):
+                gin = timed(cur, indexed, args.repeat, "on")
+                seq = timed(cur, indexed, args.repeat, "off")
+                like = timed(cur, ilike, args.repeat, "off") if ilike else None
+                baseline = like if like is not None else seq
+                like_text = f"{like:>10.1f}" if like is not None else f"{'-':>10}"
+                print(f"{label:<40} {gin:>10.1f} {seq:>12.1f} {like_text} {baseline / gin:>7.1f}x")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
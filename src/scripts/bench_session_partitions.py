@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Time-range queries on users.sessions versus the created_at-partitioned twin
+
+Reloads users.sessions with sessions spread over --window-days, copies them into
+users.sessions_partitioned (creating the partitions), then times each query on both.
+Needs the tables' owner: --dsn "dbname=projectpulse user=postgres host=localhost"
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from src.scripts.bench_timing import query_ms
+from src.scripts.bulk_load import connect
+from src.scripts.quest_4_Generate_Fake_Data import generate_sessions, registry
+from src.scripts.session_partitions import PARENT, ensure_partitions
+
+QUERIES = {
+    "last day": "SELECT count(*) FROM {table} WHERE created_at >= localtimestamp - interval '1 day'",
+    "one month, one user": """
+        SELECT count(*) FROM {table}
+        WHERE created_at >= date_trunc('month', localtimestamp) AND user_id = (SELECT min(user_id) FROM users.users)
+    """,
+    "expired last week": """
+        SELECT count(*) FROM {table}
+        WHERE created_at >= localtimestamp - interval '37 days' AND created_at < localtimestamp - interval '30 days'
+    """,
+}
+
+
+def load(conn, sessions, window_days, granularity):
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE users.sessions, {PARENT}")
+    conn.commit()
+    registry.clear()
+    generate_sessions(conn, count=sessions, fast=True, window_days=window_days)
+    ensure_partitions(conn, granularity, since=datetime.now() - timedelta(days=window_days))
+    with conn.cursor() as cur:
+        cur.execute(f"INSERT INTO {PARENT} SELECT * FROM users.sessions")
+        cur.execute(f"ANALYZE users.sessions; ANALYZE {PARENT}")
+    conn.commit()
+
+
+def scanned_relations(cur, sql):
+    cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+    plan = cur.fetchone()[0]
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    relations, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return relations - {"users"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN of the tables' owner (default: the generator's connection)")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--window-days", type=int, default=365)
+    parser.add_argument("--granularity", choices=("day", "month"), default="month")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    try:
+        load(conn, args.sessions, args.window_days, args.granularity)
+        print(f"{'query':<22} {'heap ms':>10} {'partitioned ms':>15} {'speedup':>8} {'partitions':>11}")
+        with conn.cursor() as cur:
+            for label, sql in QUERIES.items():
+                heap = query_ms(cur, sql.format(table="users.sessions"), args.repeat)
+                partitioned_sql = sql.format(table=PARENT)
+                partitioned = query_ms(cur, partitioned_sql, args.repeat)
+                scanned = len(scanned_relations(cur, partitioned_sql))
+                print(f"{label:<22} {heap:>10.1f} {partitioned:>15.1f} {heap / partitioned:>7.1f}x {scanned:>11}")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
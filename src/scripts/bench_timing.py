@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Timing helpers shared by the benchmark scripts
+"""
+import statistics
+import time
+
+
+def median_ms(fn, repeat):
+    """Median wall time of repeat calls to fn, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def query_ms(cur, sql, repeat):
+    """Median milliseconds to run sql and fetch its rows."""
+    def run():
+        cur.execute(sql)
+        cur.fetchall()
+    return median_ms(run, repeat)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Rows/sec of per-row Faker generation versus the pooled fast mode (row building only, no database)
+"""
+import argparse
+import time
+from collections import deque
+
+from src.scripts.quest_4_Generate_Fake_Data import (
+    document_rows,
+    fast_document_rows,
+    fast_project_rows,
+    fast_session_rows,
+    fast_user_rows,
+    pools,
+    project_rows,
+    session_rows,
+    user_rows,
+)
+
+IDS = list(range(1, 1001))
+REF_IDS = [1, 2, 3]
+
+BUILDERS = {
+    "users": (user_rows, fast_user_rows, ()),
+    "sessions": (session_rows, fast_session_rows, (IDS,)),
+    "projects": (project_rows, fast_project_rows, (IDS, REF_IDS, REF_IDS, REF_IDS)),
+    "documents": (document_rows, fast_document_rows, (IDS, REF_IDS, REF_IDS, REF_IDS, REF_IDS)),
+}
+
+
+def rows_per_sec(builder, count, args):
+    started = time.perf_counter()
+    deque(builder(count, *args), maxlen=0)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    # Pools are built once per process; keep that one-off cost out of the timings
+    for name in ("users", "sessions", "projects", "documents"):
+        _, fast_builder, builder_args = BUILDERS[name]
+        deque(fast_builder(1, *builder_args), maxlen=0)
+    print(f"pool size: {pools.size} values per column")
+
+    print(f"{'table':<10} {'faker rows/s':>14} {'fast rows/s':>14} {'speedup':>8}")
+    for name, (builder, fast_builder, builder_args) in BUILDERS.items():
+        slow = rows_per_sec(builder, args.rows, builder_args)
+        fast = rows_per_sec(fast_builder, args.rows, builder_args)
+        print(f"{name:<10} {slow:>14,.0f} {fast:>14,.0f} {fast / slow:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Load-optimized bulk phase for projectpulse
+
+1. capture and drop secondary indexes, CHECK and FK constraints (optionally SET UNLOGGED)
+2. run the fake data generator
+3. rebuild indexes in parallel with tuned maintenance settings, re-add constraints
+   NOT VALID + VALIDATE, refresh materialized views and ANALYZE
+
+DDL needs table ownership, so run it with the owner's DSN (e.g. postgres).
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.scripts import connection_pool
+from src.scripts import quest_4_Generate_Fake_Data as generator
+
+SCHEMAS = ("users", "reference", "projects", "documents")
+# Outside the working tree, next to the snapshot cache
+DEFAULT_STATE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "projectpulse", "bulk_load_state.json")
+
+_INDEXES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, i.relname), pg_get_indexdef(x.indexrelid)
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = i.relnamespace
+    WHERE n.nspname = ANY(%s)
+      AND t.relkind = 'r' AND NOT t.relispartition
+      AND NOT x.indisprimary
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    ORDER BY 1
+"""
+
+_CONSTRAINTS_SQL = """
+    SELECT c.conrelid::regclass::text, c.conname, c.contype, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = ANY(%s)
+      AND c.contype IN ('c', 'f')
+      AND t.relkind = 'r' AND NOT t.relispartition
+    ORDER BY c.contype DESC, 1, 2
+"""
+
+_TABLES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, t.relname)
+    FROM pg_class t
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = ANY(%s) AND t.relkind = 'r' AND NOT t.relispartition
+    ORDER BY 1
+"""
+
+_MATVIEWS_SQL = """
+    SELECT format('%%I.%%I', schemaname, matviewname) FROM pg_matviews
+    WHERE schemaname = ANY(%s) ORDER BY 1
+"""
+
+
+def connect(dsn=None):
+    return connection_pool.connect(dsn)
+
+
+def _fetch(conn, sql, schemas=SCHEMAS):
+    with conn.cursor() as cur:
+        cur.execute(sql, (list(schemas),))
+        return cur.fetchall()
+
+
+def capture(conn, schemas=SCHEMAS):
+    """Snapshot the DDL that bulk_load drops, so it can be replayed afterwards."""
+    return {
+        "indexes": [{"name": name, "definition": ddl} for name, ddl in _fetch(conn, _INDEXES_SQL, schemas)],
+        "constraints": [
+            {"table": table, "name": name, "type": contype, "definition": ddl}
+            for table, name, contype, ddl in _fetch(conn, _CONSTRAINTS_SQL, schemas)
+        ],
+        "tables": [table for table, in _fetch(conn, _TABLES_SQL, schemas)],
+        "matviews": [view for view, in _fetch(conn, _MATVIEWS_SQL, schemas)],
+    }
+
+
+def drop(conn, state, unlogged=False):
+    with conn.cursor() as cur:
+        # FKs first: they depend on the referenced tables' indexes
+        for con in sorted(state["constraints"], key=lambda c: c["type"] != "f"):
+            cur.execute(f'ALTER TABLE {con["table"]} DROP CONSTRAINT IF EXISTS "{con["name"]}"')
+        for index in state["indexes"]:
+            cur.execute(f'DROP INDEX IF EXISTS {index["name"]}')
+        if unlogged:
+            # Only safe once no FK links a logged table to an unlogged one
+            for table in state["tables"]:
+                cur.execute(f"ALTER TABLE {table} SET UNLOGGED")
+    conn.commit()
+
+
+def _run_on_own_connection(dsn, statements, settings):
+    conn = connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for name, value in settings.items():
+                cur.execute(f"SET {name} = %s", (str(value),))
+            for sql in statements:
+                cur.execute(sql)
+    finally:
+        conn.close()
+
+
+def rebuild_indexes(state, dsn=None, workers=4, maintenance_work_mem="512MB", parallel_maintenance_workers=2):
+    settings = {
+        "maintenance_work_mem": maintenance_work_mem,
+        "max_parallel_maintenance_workers": parallel_maintenance_workers,
+    }
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(_run_on_own_connection, dsn, [index["definition"]], settings)
+                for index in state["indexes"]]
+        for job in jobs:
+            job.result()
+
+
+def restore_constraints(conn, state, dsn=None, workers=4):
+    # NOT VALID is instant; VALIDATE then scans without blocking writers.
+    # VALIDATEs on one table self-conflict, so each table gets a single worker.
+    validations = defaultdict(list)
+    with conn.cursor() as cur:
+        for con in sorted(state["constraints"], key=lambda c: c["type"] == "f"):
+            cur.execute(
+                f'ALTER TABLE {con["table"]} ADD CONSTRAINT "{con["name"]}" {con["definition"]} NOT VALID'
+            )
+            validations[con["table"]].append(f'ALTER TABLE {con["table"]} VALIDATE CONSTRAINT "{con["name"]}"')
+    conn.commit()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(_run_on_own_connection, dsn, statements, {}) for statements in validations.values()]
+        for job in jobs:
+            job.result()
+
+
+def refresh_and_analyze(conn, state):
+    with conn.cursor() as cur:
+        for view in state["matviews"]:
+            cur.execute(f"REFRESH MATERIALIZED VIEW {view}")
+        conn.commit()
+        for table in state["tables"]:
+            cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+def _timed(timings, phase, fn, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[phase] = time.perf_counter() - started
+
+
+def bulk_load(load, dsn=None, unlogged=False, workers=4, maintenance_work_mem="512MB",
+              parallel_maintenance_workers=2, state_file=None):
+    """Drop secondary indexes/constraints, run load(), then rebuild; returns per-phase seconds."""
+    timings = {}
+    conn = connect(dsn)
+    try:
+        generator.truncate_all_tables(conn)  # while FKs still cascade to the link tables
+        state = capture(conn)
+        if state_file:
+            # Lets a crashed run be finished with --restore STATE_FILE
+            os.makedirs(os.path.dirname(os.path.abspath(state_file)), exist_ok=True)
+            with open(state_file, "w") as f:
+                json.dump(state, f, indent=2)
+        _timed(timings, "drop", drop, conn, state, unlogged)
+        try:
+            _timed(timings, "load", load)
+        finally:
+            restore(conn, state, dsn, workers, maintenance_work_mem, parallel_maintenance_workers, timings,
+                    unlogged)
+    finally:
+        conn.close()
+    return timings
+
+
+def restore(conn, state, dsn=None, workers=4, maintenance_work_mem="512MB", parallel_maintenance_workers=2,
+            timings=None, unlogged=True):
+    timings = timings if timings is not None else {}
+    if unlogged:
+        with conn.cursor() as cur:
+            for table in state["tables"]:
+                cur.execute(f"ALTER TABLE {table} SET LOGGED")
+        conn.commit()
+    _timed(timings, "indexes", rebuild_indexes, state, dsn, workers, maintenance_work_mem,
+           parallel_maintenance_workers)
+    _timed(timings, "constraints", restore_constraints, conn, state, dsn, workers)
+    _timed(timings, "matviews_analyze", refresh_and_analyze, conn, state)
+    return timings
+
+
+def baseline_load(load, dsn=None):
+    """The current order: indexes and constraints in place during the load."""
+    timings = {}
+    conn = connect(dsn)
+    try:
+        generator.truncate_all_tables(conn)
+        state = capture(conn)
+        _timed(timings, "load", load)
+        _timed(timings, "matviews_analyze", refresh_and_analyze, conn, state)
+    finally:
+        conn.close()
+    return timings
+
+
+def _print_timings(label, timings):
+    phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+    print(f"{label:<10} total {sum(timings.values()):8.2f}s  ({phases})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN of the table owner (default: the generator's connection)")
+    parser.add_argument("--unlogged", action="store_true", help="SET UNLOGGED during the load (no WAL)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent index builds / validations")
+    parser.add_argument("--maintenance-work-mem", default="512MB")
+    parser.add_argument("--parallel-maintenance-workers", type=int, default=2)
+    parser.add_argument("--compare", action="store_true", help="also time the current order and report savings")
+    parser.add_argument("--rounds", type=int, default=2,
+                        help="with --compare: runs of each mode, alternating which goes first (best one counts)")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--restore", metavar="STATE_FILE", help="only replay a saved state after a crashed run")
+    args, generator_argv = parser.parse_known_args()
+
+    if args.restore:
+        with open(args.restore) as f:
+            state = json.load(f)
+        conn = connect(args.dsn)
+        try:
+            restore(conn, state, args.dsn, args.workers, args.maintenance_work_mem,
+                    args.parallel_maintenance_workers, unlogged=True)
+        finally:
+            conn.close()
+        return
+
+    # Remaining arguments go to the generator, e.g. --count documents=5000000 --fast
+    def load():
+        with connection_pool.using_dsn(args.dsn):
+            generator.main(generator_argv)
+
+    modes = {
+        "bulk": lambda: bulk_load(load, args.dsn, args.unlogged, args.workers, args.maintenance_work_mem,
+                                  args.parallel_maintenance_workers, args.state_file),
+        "baseline": lambda: baseline_load(load, args.dsn),
+    }
+    if not args.compare:
+        _print_timings("bulk", modes["bulk"]())
+        return
+
+    runs = {mode: [] for mode in modes}
+    for n in range(max(args.rounds, 1)):
+        # Alternate which mode goes first, so neither always inherits the cache the other warmed
+        for mode in (("bulk", "baseline") if n % 2 == 0 else ("baseline", "bulk")):
+            timings = modes[mode]()
+            _print_timings(mode, timings)
+            runs[mode].append(timings)
+    optimized, baseline = (min(sum(timings.values()) for timings in runs[mode]) for mode in ("bulk", "baseline"))
+    saved = baseline - optimized
+    print(f"⏱️ bulk mode saved {saved:.2f}s ({saved / baseline:.0%}) versus the current order (best of each)")
+
+
+if __name__ == "__main__":
+    main()
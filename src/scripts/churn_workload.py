@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Steady-state write churn on a loaded ProjectPulse database
+
+--workers connections apply a weighted --mix of operations at --rate ops/sec in
+total, each in its own autocommit transaction, for --duration seconds:
+- project_update: version + 0.1, updated_at and updated_by of a live project
+- document_delete: soft delete (deleted_at) of a live document
+- session_touch: last_active_at of a session
+- session_revoke: revoked_at of a live session
+- decision_insert: a new decision-log entry
+
+Workers keep a fixed schedule (open loop): a server that cannot keep up shows
+as latency and a missed rate, and a worker that falls behind catches up at full
+speed. --skew draws the rows to change from a distribution (e.g. zipf:1.1) so
+that hot rows are updated again and again. --rate 0 runs unthrottled.
+
+Reported: achieved ops/sec and p50/p95/p99 latency per operation; per table,
+from pg_stat_user_tables around the run, updates and the share of them that
+were HOT, dead tuples, table and index growth, and the table's fillfactor.
+A HOT update needs free space on the row's page and no indexed column changed:
+the fillfactor = 80 of projects and documents (quest_3_DBMS_Performance.sql)
+leaves that space, sessions keep the default 100.
+
+    python src/scripts/churn_workload.py --rate 500 --workers 4 --duration 60 --skew zipf:1.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.scripts.bench_queries import connect_worker, percentile, start_workers
+from src.scripts.bulk_load import connect
+from src.scripts.distributions import UNIFORM, Sampler, parse_spec
+from src.scripts.id_registry import IdRegistry
+
+OPERATIONS = {
+    "project_update": {
+        "sql": """
+            UPDATE projects.projects SET version = version + 0.1, updated_at = now(), updated_by = %(user_id)s
+            WHERE project_id = %(project_id)s AND deleted_at IS NULL
+        """,
+        "params": ("project_id", "user_id"),
+    },
+    "document_delete": {
+        "sql": """
+            UPDATE documents.documents SET deleted_at = now()
+            WHERE document_id = %(document_id)s AND deleted_at IS NULL
+        """,
+        "params": ("document_id",),
+    },
+    "session_touch": {
+        "sql": "UPDATE users.sessions SET last_active_at = now() WHERE session_id = %(session_id)s",
+        "params": ("session_id",),
+    },
+    "session_revoke": {
+        "sql": """
+            UPDATE users.sessions SET revoked_at = now()
+            WHERE session_id = %(session_id)s AND revoked_at IS NULL
+        """,
+        "params": ("session_id",),
+    },
+    "decision_insert": {
+        "sql": """
+            INSERT INTO projects.project_decision_log (project_id, decided_at, decided_by, type_id, summary)
+            VALUES (%(project_id)s, now(), %(user_id)s, %(type_id)s, %(summary)s)
+        """,
+        "params": ("project_id", "user_id", "type_id", "summary"),
+    },
+}
+
+DEFAULT_MIX = {
+    "project_update": 30,
+    "document_delete": 10,
+    "session_touch": 40,
+    "session_revoke": 5,
+    "decision_insert": 15,
+}
+
+TABLES = ("projects.projects", "documents.documents", "users.sessions", "projects.project_decision_log")
+
+# Parameters whose rows --skew makes hot; the others are drawn uniformly
+SKEWED = ("project_id", "document_id", "session_id")
+
+SESSION_SAMPLE = 100_000
+
+_TABLE_STATS_SQL = """
+    SELECT s.schemaname || '.' || s.relname, s.n_tup_ins, s.n_tup_upd, s.n_tup_hot_upd, s.n_live_tup,
+           s.n_dead_tup, s.autovacuum_count, pg_relation_size(s.relid), pg_indexes_size(s.relid),
+           COALESCE((SELECT option_value::int FROM pg_options_to_table(c.reloptions)
+                     WHERE option_name = 'fillfactor'), 100)
+    FROM pg_stat_user_tables s
+    JOIN pg_class c ON c.oid = s.relid
+    WHERE s.schemaname || '.' || s.relname = ANY(%s)
+"""
+_STAT_FIELDS = (
+    "inserts", "updates", "hot_updates", "live_tuples", "dead_tuples", "autovacuums", "table_bytes", "index_bytes",
+    "fillfactor",
+)
+
+
+def churn_values(conn, skew=UNIFORM, session_sample=SESSION_SAMPLE):
+    """A sampler per operation parameter; projects, documents and sessions follow skew."""
+    registry = IdRegistry()
+    populations = {
+        "project_id": registry.ids(conn, "projects.projects", "project_id"),
+        "document_id": registry.ids(conn, "documents.documents", "document_id"),
+        "user_id": registry.ids(conn, "users.users", "user_id"),
+        "type_id": registry.ids(conn, "reference.decision_type_reference", "type_id"),
+        "summary": [f"Churn decision {n}" for n in range(100)],
+    }
+    with conn.cursor() as cur:
+        cur.execute("SELECT session_id FROM users.sessions ORDER BY random() LIMIT %s", (session_sample,))
+        populations["session_id"] = [session_id for session_id, in cur.fetchall()]
+    conn.commit()
+    empty = sorted(name for name, population in populations.items() if not len(population))
+    if empty:
+        raise ValueError(f"No {', '.join(empty)} values to draw from: generate data first")
+    return {name: Sampler(population, skew if name in SKEWED else UNIFORM) for name, population in populations.items()}
+
+
+def draw_params(operation, samplers, rng=random):
+    return {name: samplers[name].choice(rng) for name in OPERATIONS[operation]["params"]}
+
+
+# TABLE STATISTICS
+def table_stats(conn, tables=TABLES):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_stat_clear_snapshot()")  # re-read what the workers flushed
+        cur.execute(_TABLE_STATS_SQL, (list(tables),))
+        stats = {table: dict(zip(_STAT_FIELDS, values)) for table, *values in cur.fetchall()}
+    conn.commit()
+    return stats
+
+
+def table_churn(before, after):
+    """Per table: what the run changed, HOT ratio and dead tuples left."""
+    churn = {}
+    for table, end in after.items():
+        start = before[table]
+        updates = end["updates"] - start["updates"]
+        hot = end["hot_updates"] - start["hot_updates"]
+        churn[table] = {
+            "fillfactor": end["fillfactor"],
+            "inserts": end["inserts"] - start["inserts"],
+            "updates": updates,
+            "hot_updates": hot,
+            "hot_ratio": round(hot / updates, 3) if updates else None,
+            "dead_tuples": end["dead_tuples"],
+            "dead_ratio": round(end["dead_tuples"] / max(1, end["live_tuples"] + end["dead_tuples"]), 3),
+            "autovacuums": end["autovacuums"] - start["autovacuums"],
+            "table_growth_bytes": end["table_bytes"] - start["table_bytes"],
+            "index_growth_bytes": end["index_bytes"] - start["index_bytes"],
+        }
+    return churn
+
+
+# WORKLOAD
+def _worker(dsn, mix, samplers, rate, duration, seed, ready):
+    conn = connect_worker(dsn, ready)  # autocommit: one transaction per operation
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    latencies = {name: [] for name in names}
+    rows = dict.fromkeys(names, 0)
+    interval = 1 / rate if rate else 0.0
+    try:
+        with conn.cursor() as cur:
+            ready.wait()
+            deadline = time.perf_counter() + duration
+            next_at = time.perf_counter() + rng.random() * interval  # workers start out of step
+            while next_at < deadline:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name, = rng.choices(names, weights)
+                params = draw_params(name, samplers, rng)
+                started = time.perf_counter()
+                cur.execute(OPERATIONS[name]["sql"], params)
+                latencies[name].append((time.perf_counter() - started) * 1000)
+                rows[name] += cur.rowcount
+                next_at = next_at + interval if interval else time.perf_counter()
+            # Publish this backend's table counters now rather than up to a second after going idle
+            cur.execute("SELECT pg_stat_force_next_flush()")
+    finally:
+        conn.close()
+    return latencies, rows
+
+
+def summarize(latencies, rows, wall_seconds):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"ops": 0, "rows": rows, "ops_per_s": 0.0}
+    return {
+        "ops": len(latencies),
+        "rows": rows,
+        "ops_per_s": round(len(latencies) / wall_seconds, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def run(dsn=None, rate=200, workers=4, duration=30, mix=None, skew=UNIFORM, seed=0, session_sample=SESSION_SAMPLE):
+    """Apply the churn; returns per-operation results, their total and per-table statistics."""
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    conn = connect(dsn)
+    try:
+        samplers = churn_values(conn, skew, session_sample)
+        before = table_stats(conn)
+        ready = threading.Barrier(workers + 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(_worker, dsn, mix, samplers, rate / workers, duration, seed + n, ready)
+                    for n in range(workers)]
+            start_workers(ready, jobs)
+            started = time.perf_counter()
+            results = [job.result() for job in jobs]
+            wall = time.perf_counter() - started
+        after = table_stats(conn)
+    finally:
+        conn.close()
+
+    operations = {
+        name: summarize([latency for latencies, _ in results for latency in latencies[name]],
+                        sum(rows[name] for _, rows in results), wall)
+        for name in mix
+    }
+    everything = [latency for latencies, _ in results for name in mix for latency in latencies[name]]
+    total = summarize(everything, sum(stats["rows"] for stats in operations.values()), wall)
+    return {"operations": operations, "total": total, "tables": table_churn(before, after)}
+
+
+def print_results(results, rate):
+    print(f"{'operation':<18} {'ops':>8} {'ops/s':>8} {'rows':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in {**results["operations"], "total": results["total"]}.items():
+        if stats["ops"]:
+            print(f"{name:<18} {stats['ops']:>8,} {stats['ops_per_s']:>8,.0f} {stats['rows']:>8,} "
+                  f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    if rate:
+        print(f"target {rate:,g} ops/s, achieved {results['total']['ops_per_s'] / rate:.0%}")
+    print(f"\n{'table':<32} {'fill':>5} {'updates':>9} {'HOT':>6} {'inserts':>8} {'dead':>8} {'dead %':>7} "
+          f"{'table KB':>9} {'index KB':>9}")
+    for table, stats in results["tables"].items():
+        hot = f"{stats['hot_ratio']:.0%}" if stats["hot_ratio"] is not None else "-"
+        print(f"{table:<32} {stats['fillfactor']:>5} {stats['updates']:>9,} {hot:>6} {stats['inserts']:>8,} "
+              f"{stats['dead_tuples']:>8,} {stats['dead_ratio']:>7.1%} {stats['table_growth_bytes'] / 1024:>+9,.0f} "
+              f"{stats['index_growth_bytes'] / 1024:>+9,.0f}")
+
+
+def mix_weight(value):
+    name, _, weight = value.partition("=")
+    if name not in OPERATIONS or not weight.isdigit():
+        raise argparse.ArgumentTypeError(f"expected OPERATION=WEIGHT with OPERATION in {', '.join(OPERATIONS)}")
+    return name, int(weight)
+
+
+def distribution(value):
+    try:
+        kind = parse_spec(value)[0]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    if kind == "follow":
+        raise argparse.ArgumentTypeError("follow needs a parent row: use uniform, zipf, pareto or weights")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN (default: the generator's connection)")
+    parser.add_argument("--rate", type=float, default=200, help="target ops/sec over all workers; 0: unthrottled")
+    parser.add_argument("--workers", type=int, default=4, help="connections applying the churn")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", type=mix_weight, action="append", default=[], metavar="OPERATION=WEIGHT",
+                        help="override an operation's weight (0 disables it); "
+                             + ", ".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()))
+    parser.add_argument("--skew", type=distribution, default=UNIFORM, metavar="SPEC",
+                        help="distribution of the changed projects, documents and sessions, e.g. zipf:1.1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--session-sample", type=int, default=SESSION_SAMPLE,
+                        help="sessions drawn from (a random sample of the table)")
+    parser.add_argument("--output", help="write the run (settings + results) to this JSON file")
+    args = parser.parse_args()
+
+    mix = {**DEFAULT_MIX, **dict(args.mix)}
+    if not any(mix.values()):
+        parser.error("--mix leaves no operation to run")
+    results = run(args.dsn, args.rate, args.workers, args.duration, mix, args.skew, args.seed, args.session_sample)
+    print_results(results, args.rate)
+
+    if args.output:
+        run_info = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "rate": args.rate,
+            "workers": args.workers,
+            "duration": args.duration,
+            "mix": mix,
+            "skew": args.skew,
+            "seed": args.seed,
+        }
+        with open(args.output, "w") as f:
+            json.dump({"run": run_info, **results}, f, indent=2)
+        print(f"💾 results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
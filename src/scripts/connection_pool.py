@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Pooled connections for the generator, the tools and the test suite
+
+Configured from the environment (arguments win):
+  PROJECTPULSE_DSN               libpq DSN (default: projectpulse as nobody on localhost)
+  PROJECTPULSE_POOL_SIZE         connections per pool (default 20)
+  PROJECTPULSE_SESSION_SETTINGS  e.g. "synchronous_commit=off,work_mem=64MB,statement_timeout=30s"
+
+Session settings travel in the startup packet (libpq "options"), so they cost no
+round trip and survive the DISCARD ALL run when a connection is returned.
+close() on a pooled connection returns it to its pool; callers keep the usual
+connect() / close() pattern. Pools are per process: a forked child never reuses
+the parent's sockets.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+DEFAULT_DSN = "dbname=projectpulse user=nobody password=secure123 host=localhost"
+POOL_SIZE = 20
+# Connections idle longer than this are pinged before being handed out
+HEALTH_CHECK_AFTER = 30.0
+CHECKOUT_TIMEOUT = 30.0
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    pass
+
+
+def env_dsn(dsn=None):
+    return dsn or os.environ.get("PROJECTPULSE_DSN") or DEFAULT_DSN
+
+
+@contextmanager
+def using_dsn(dsn):
+    """Point PROJECTPULSE_DSN at dsn meanwhile (if given), for code and worker processes that read it."""
+    if dsn is None:
+        yield
+        return
+    previous = os.environ.get("PROJECTPULSE_DSN")
+    os.environ["PROJECTPULSE_DSN"] = dsn
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["PROJECTPULSE_DSN"]
+        else:
+            os.environ["PROJECTPULSE_DSN"] = previous
+
+
+def env_settings(settings=None):
+    """Session settings from PROJECTPULSE_SESSION_SETTINGS, overridden by settings."""
+    configured = {}
+    for item in os.environ.get("PROJECTPULSE_SESSION_SETTINGS", "").split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            configured[name.strip()] = value.strip()
+    return {**configured, **(settings or {})}
+
+
+def session_options(settings):
+    """libpq options string: -c name=value for each setting (spaces escaped)."""
+    return " ".join(f"-c {name}=" + str(value).replace(" ", "\\ ") for name, value in sorted(settings.items()))
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """A psycopg2 connection whose close() hands it back to its pool.
+
+    prepared holds the names of the statements PREPAREd on it since its last checkout.
+    """
+
+    def close(self):
+        pool = getattr(self, "pool", None)
+        if pool is None:
+            super().close()
+        else:
+            pool.putconn(self)  # a broken or closed connection is discarded there
+
+    def discard(self):
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of up to size connections; checkouts wait up to timeout seconds for a free one."""
+
+    def __init__(self, dsn=None, size=None, settings=None, timeout=CHECKOUT_TIMEOUT,
+                 health_check_after=HEALTH_CHECK_AFTER):
+        self.dsn = env_dsn(dsn)
+        self.size = size or int(os.environ.get("PROJECTPULSE_POOL_SIZE", POOL_SIZE))
+        self.settings = env_settings(settings)
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._available = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.pid = os.getpid()
+        self._idle = []  # (connection, returned at)
+        self._in_use = set()
+        self._opening = 0
+        self.metrics = {"checkouts": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "timeouts": 0,
+                        "opened": 0, "discarded": 0, "failed_health_checks": 0}
+
+    def _check_process(self):
+        if self.pid != os.getpid():
+            # Inherited sockets belong to the parent: forget them without closing
+            self._reset_state()
+
+    def _open(self):
+        options = session_options(self.settings)
+        conn = psycopg2.connect(self.dsn, connection_factory=PooledConnection,
+                                **({"options": options} if options else {}))
+        conn.pool = self
+        conn.prepared = set()
+        with self._available:
+            self.metrics["opened"] += 1
+        return conn
+
+    def _healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._available:
+                self.metrics["failed_health_checks"] += 1
+            return False
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        with self._available:
+            self._check_process()
+            waited = False
+            while not self._idle and len(self._in_use) + self._opening >= self.size:
+                waited = True
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0 or not self._available.wait(remaining):
+                    self.metrics["timeouts"] += 1
+                    raise PoolTimeout(f"no connection free after {timeout}s ({self.size} in use)")
+            wait = time.monotonic() - started if waited else 0.0
+            self.metrics["checkouts"] += 1
+            self.metrics["waits"] += waited
+            self.metrics["wait_seconds"] += wait
+            self.metrics["max_wait_seconds"] = max(self.metrics["max_wait_seconds"], wait)
+            if self._idle:
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            else:
+                conn = None
+                self._opening += 1  # reserve the slot, then connect outside the lock
+
+        if conn is not None:
+            if self._healthy(conn, idle_since):
+                return conn
+            with self._available:
+                self._in_use.discard(conn)
+                self._drop(conn)
+                self._opening += 1
+        try:
+            conn = self._open()
+        except psycopg2.Error:
+            with self._available:
+                self._opening -= 1
+                self._available.notify()
+            raise
+        with self._available:
+            self._opening -= 1
+            self._in_use.add(conn)
+        return conn
+
+    def putconn(self, conn):
+        with self._available:
+            if self.pid != os.getpid() or conn not in self._in_use:
+                return
+        try:
+            conn.rollback()
+            conn.set_session(isolation_level="DEFAULT", readonly="DEFAULT", deferrable="DEFAULT", autocommit=True)
+            with conn.cursor() as cur:
+                # Temp tables, prepared statements, advisory locks, SETs (back to the startup options)
+                cur.execute("DISCARD ALL")
+            conn.prepared.clear()  # DEALLOCATEd by DISCARD ALL
+            conn.autocommit = False
+            healthy = True
+        except psycopg2.Error:
+            healthy = False
+        with self._available:
+            self._in_use.discard(conn)
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._drop(conn)
+            self._available.notify()
+
+    def _drop(self, conn):
+        self.metrics["discarded"] += 1
+        try:
+            conn.discard()
+        except psycopg2.Error:
+            pass
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._available:
+            return {**self.metrics, "in_use": len(self._in_use) + self._opening, "idle": len(self._idle),
+                    "size": self.size}
+
+    def closeall(self):
+        with self._available:
+            if self.pid == os.getpid():
+                for conn, _ in self._idle:
+                    conn.discard()
+                for conn in self._in_use:
+                    conn.discard()
+            self._reset_state()
+
+
+def get_pool(dsn=None, settings=None):
+    """The current process's pool for this DSN and session settings."""
+    dsn, settings = env_dsn(dsn), env_settings(settings)
+    key = (os.getpid(), dsn, tuple(sorted(settings.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(dsn, settings=settings)
+        return _pools[key]
+
+
+def connect(dsn=None, **settings):
+    """A pooled connection; close() returns it to the pool."""
+    return get_pool(dsn, settings).getconn()
+
+
+def close_all(dsn=None):
+    """Close this process's pools (only those for dsn, if given), e.g. before dropping or cloning a database."""
+    with _pools_lock:
+        for key, pool in list(_pools.items()):
+            pid, pool_dsn, _ = key
+            if dsn is None or pool_dsn == dsn:
+                if pid == os.getpid():
+                    pool.closeall()
+                del _pools[key]
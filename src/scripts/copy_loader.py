@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+COPY-based bulk loader for the projectpulse fake data generator
+"""
+import decimal
+import io
+import json
+import struct
+import threading
+import uuid
+from datetime import date, datetime, timezone
+
+import psycopg2.extras
+
+COPY_TEXT = "copy"
+COPY_BINARY = "copy_binary"
+INSERT = "insert"
+LOAD_METHODS = (COPY_TEXT, COPY_BINARY, INSERT)
+
+# Characters that must be backslash-escaped inside a COPY text field
+# (backslash first so the escapes added afterwards are not doubled)
+_COPY_ESCAPES = (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"))
+
+_PG_EPOCH = datetime(2000, 1, 1)
+_PG_EPOCH_DATE = date(2000, 1, 1)
+_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_BINARY_TRAILER = struct.pack("!h", -1)
+
+# Keyed by server and database too: clone databases and several DSNs can share a process
+_column_types_cache = {}
+
+# COPY data and INSERT statement bytes sent by this process (all threads), for load reports
+_sent = {"bytes": 0}
+_sent_lock = threading.Lock()
+
+
+def _count_sent(size):
+    with _sent_lock:
+        _sent["bytes"] += size
+
+
+def bytes_sent():
+    return _sent["bytes"]
+
+
+# TEXT FORMAT
+
+def _escape_text(value):
+    # str.replace behind a membership test is much faster than str.translate here
+    for char, escaped in _COPY_ESCAPES:
+        if char in value:
+            value = value.replace(char, escaped)
+    return value
+
+
+def _text_field(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return _escape_text(value)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return _escape_text(json.dumps(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return _escape_text(str(value))
+
+
+def encode_text_row(row):
+    return ("\t".join(_text_field(v) for v in row) + "\n").encode("utf-8")
+
+
+# BINARY FORMAT
+
+def _encode_numeric(value):
+    sign, digits, exp = decimal.Decimal(str(value)).as_tuple()
+    if not isinstance(exp, int):
+        return struct.pack("!hhHh", 0, 0, 0xC000, 0)  # NaN
+
+    digits = "".join(map(str, digits))
+    if exp >= 0:
+        int_part, frac_part = digits + "0" * exp, ""
+    elif len(digits) <= -exp:
+        int_part, frac_part = "", digits.rjust(-exp, "0")
+    else:
+        int_part, frac_part = digits[:exp], digits[exp:]
+
+    # Numeric is stored as base-10000 digits aligned on the decimal point
+    int_part = int_part.lstrip("0")
+    int_part = int_part.rjust(-(-len(int_part) // 4) * 4, "0")
+    frac_part = frac_part.ljust(-(-len(frac_part) // 4) * 4, "0")
+    both = int_part + frac_part
+    groups = [int(both[i:i + 4]) for i in range(0, len(both), 4)]
+    weight = len(int_part) // 4 - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+
+    header = struct.pack("!hhHh", len(groups), weight, 0x4000 if sign else 0, max(0, -exp))
+    return header + struct.pack(f"!{len(groups)}h", *groups)
+
+
+def _encode_timestamp(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _PG_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return struct.pack("!q", micros)
+
+
+def _encode_json(value):
+    return (value if isinstance(value, str) else json.dumps(value)).encode("utf-8")
+
+
+def _encode_uuid(value):
+    return (value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))).bytes
+
+
+_BINARY_ENCODERS = {
+    "int2": lambda v: struct.pack("!h", v),
+    "int4": lambda v: struct.pack("!i", v),
+    "int8": lambda v: struct.pack("!q", v),
+    "float8": lambda v: struct.pack("!d", v),
+    "bool": lambda v: struct.pack("!?", v),
+    "text": lambda v: str(v).encode("utf-8"),
+    "varchar": lambda v: str(v).encode("utf-8"),
+    "numeric": _encode_numeric,
+    "timestamp": _encode_timestamp,
+    "timestamptz": _encode_timestamp,
+    "date": lambda v: struct.pack("!i", (v - _PG_EPOCH_DATE).days),
+    "uuid": _encode_uuid,
+    "json": _encode_json,
+    "jsonb": lambda v: b"\x01" + _encode_json(v),  # jsonb wire format version 1
+}
+
+
+def column_types(cur, table, columns):
+    info = cur.connection.info
+    key = (info.host, info.port, info.dbname, table, tuple(columns))
+    if key not in _column_types_cache:
+        cur.execute("""
+            SELECT a.attname, t.typname
+            FROM pg_attribute a
+            JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+        """, (table,))
+        types = dict(cur.fetchall())
+        _column_types_cache[key] = [types[c] for c in columns]
+    return _column_types_cache[key]
+
+
+def binary_row_encoder(types):
+    missing = [t for t in types if t not in _BINARY_ENCODERS]
+    if missing:
+        raise ValueError(f"No binary COPY encoder for type(s) {missing}; use the text format")
+    encoders = [_BINARY_ENCODERS[t] for t in types]
+    field_count = struct.pack("!h", len(encoders))
+
+    def encode(row):
+        parts = [field_count]
+        for encoder, value in zip(encoders, row):
+            if value is None:
+                parts.append(b"\xff\xff\xff\xff")
+            else:
+                data = encoder(value)
+                parts.append(struct.pack("!i", len(data)))
+                parts.append(data)
+        return b"".join(parts)
+
+    return encode
+
+
+# STREAMING
+
+class RowStream(io.RawIOBase):
+    """File-like object that encodes rows lazily as COPY reads from it."""
+
+    def __init__(self, rows, encode, header=b"", trailer=b""):
+        self._chunks = self._iter_chunks(rows, encode, header, trailer)
+        self._buffer = bytearray()
+        self.rows = 0
+        self.bytes_sent = 0
+
+    def _iter_chunks(self, rows, encode, header, trailer):
+        if header:
+            yield header
+        for row in rows:
+            self.rows += 1
+            yield encode(row)
+        if trailer:
+            yield trailer
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        for chunk in self._chunks:
+            self._buffer += chunk
+            if 0 <= size <= len(self._buffer):
+                break
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.bytes_sent += len(data)
+        return data
+
+
+# LOADERS
+
+def copy_rows(cur, table, columns, rows, binary=False):
+    cols = ", ".join(columns)
+    if binary:
+        stream = RowStream(rows, binary_row_encoder(column_types(cur, table, columns)),
+                           _BINARY_HEADER, _BINARY_TRAILER)
+        sql = f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT binary)"
+    else:
+        stream = RowStream(rows, encode_text_row)
+        sql = f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT text)"
+    cur.copy_expert(sql, stream, size=1 << 16)
+    _count_sent(stream.bytes_sent)
+    return stream.rows
+
+
+def insert_rows(cur, table, columns, rows, page_size=1000):
+    data = list(rows)
+    for start in range(0, len(data), page_size):
+        # One statement per page, as execute_values would send them; cur.query is the page just sent
+        psycopg2.extras.execute_values(
+            cur,
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+            data[start:start + page_size],
+            page_size=page_size
+        )
+        _count_sent(len(cur.query))
+    return len(data)
+
+
+def load_rows(cur, table, columns, rows, method=COPY_TEXT):
+    """Load rows with COPY (text or binary) or fall back to multi-row INSERT."""
+    if method == COPY_TEXT:
+        return copy_rows(cur, table, columns, rows)
+    if method == COPY_BINARY:
+        return copy_rows(cur, table, columns, rows, binary=True)
+    if method == INSERT:
+        return insert_rows(cur, table, columns, rows)
+    raise ValueError(f"Unknown load method {method!r}; expected one of {LOAD_METHODS}")
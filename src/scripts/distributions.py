@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Skewed foreign keys and columns for the fake data generator
+
+A distribution spec names how a column's values are drawn from its population
+(the parent ids in ascending order, so rank 1 is the oldest row):
+- uniform          every id equally likely (the generator's default)
+- zipf:S           weight of rank r is 1 / r^S: a few hot owners, a long tail
+- pareto:A         weights read off the Pareto(A) quantiles; A=1.16 (the 80/20
+                   rule) puts 70-77% of the rows on 20% of the parents, more as
+                   the parents grow in number
+- weights:W1,W2..  explicit weights in id order, e.g. 70,25,5 for priorities;
+                   ids past the list are never drawn
+- follow:P         copy the parent row's value of the same column with
+                   probability P, else draw uniformly: a correlation between
+                   tables that the planner, estimating columns independently,
+                   does not see
+
+Skewed draws go through Vose's alias table, built once per population in
+O(n): each draw then costs one random() and one table lookup, like a uniform one.
+Uniform samplers call random.choice / random.choices as before, so seeded
+runs without skew reproduce the same rows.
+"""
+import random
+from array import array
+
+UNIFORM = "uniform"
+KINDS = ("uniform", "zipf", "pareto", "weights", "follow")
+# A parent whose value is NULL: ids are positive, so an int array can still hold it
+NO_VALUE = -1
+
+
+# SPECS
+def parse_spec(spec):
+    """("zipf", 1.2) style tuple of a spec string; ValueError if it is not one."""
+    kind, _, params = (spec or UNIFORM).partition(":")
+    if kind not in KINDS:
+        raise ValueError(f"unknown distribution {kind!r}: expected one of {', '.join(KINDS)}")
+    if kind == UNIFORM:
+        if params:
+            raise ValueError("uniform takes no parameter")
+        return (UNIFORM,)
+    try:
+        values = tuple(float(value) for value in params.split(","))
+    except ValueError:
+        raise ValueError(f"{spec!r}: parameters must be numbers") from None
+    if kind == "weights":
+        if min(values) < 0 or not sum(values):
+            raise ValueError(f"{spec!r}: weights must be >= 0, with at least one above 0")
+        return (kind, values)
+    if len(values) != 1:
+        raise ValueError(f"{spec!r}: {kind} takes one parameter")
+    value, = values
+    if kind == "follow" and not 0 <= value <= 1:
+        raise ValueError(f"{spec!r}: the follow probability must be within [0, 1]")
+    if kind in ("zipf", "pareto") and value <= 0:
+        raise ValueError(f"{spec!r}: the {kind} exponent must be above 0")
+    return (kind, value)
+
+
+def is_follow(spec):
+    return parse_spec(spec)[0] == "follow"
+
+
+def weights(spec, n):
+    """Weight of each of n population ranks under a zipf, pareto or weights spec."""
+    kind, param = parse_spec(spec)
+    if kind == "zipf":
+        return [(rank + 1) ** -param for rank in range(n)]
+    if kind == "pareto":
+        # Pareto(param) quantile function at evenly spaced points, largest first
+        return [((rank + 0.5) / n) ** (-1 / param) for rank in range(n)]
+    if kind == "weights":
+        listed = list(param[:n]) + [0.0] * (n - len(param))
+        if not sum(listed):
+            raise ValueError(f"{spec!r}: no weight left for the {n} ids drawn from")
+        return listed
+    raise ValueError(f"{spec!r} has no weights")
+
+
+# ALIAS TABLE
+class AliasTable:
+    """Vose's alias method over n weights: O(n) to build, O(1) per draw.
+
+    draw() returns a position; pick() the value at it, when values were given:
+    they are resolved for both sides of every slot up front, into arrays for
+    integer ids (an IdSet) and lists otherwise (e.g. session uuids).
+    """
+
+    __slots__ = ("prob", "alias", "values", "alias_values")
+
+    def __init__(self, weights, values=None):
+        n = len(weights)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        self.prob = array("d", [1.0]) * n
+        self.alias = array("q", range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # Leftovers are 1 up to rounding: they keep prob 1.0 and never use their alias
+        self.values = self.alias_values = None
+        if values is not None:
+            resolve = list if isinstance(values, list) else lambda ids: array("q", ids)
+            self.values = resolve(values)
+            self.alias_values = resolve(self.values[i] for i in self.alias)
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self):
+        # One random(): its integer part picks the column, its fraction the side
+        u = random.random() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def draws(self, k):
+        return self._draws(k, range(len(self.prob)), self.alias)
+
+    def pick(self, rng=random):
+        u = rng.random() * len(self.prob)
+        i = int(u)
+        return self.values[i] if u - i < self.prob[i] else self.alias_values[i]
+
+    def picks(self, k):
+        return self._draws(k, self.values, self.alias_values)
+
+    def _draws(self, k, own, other):
+        prob, n, rand = self.prob, len(self.prob), random.random
+        drawn = [rand() * n for _ in range(k)]
+        return [own[i] if u - i < prob[i] else other[i] for u, i in zip(drawn, map(int, drawn))]
+
+
+# SAMPLERS
+class Sampler:
+    """Draws from a population (an IdSet or a list of ids) under a distribution spec.
+
+    The *_for methods take the positions of each row's parent and ignore them;
+    they let Follow and Sampler be used alike.
+    """
+
+    __slots__ = ("population", "table")
+
+    def __init__(self, population, spec=UNIFORM):
+        self.population = population
+        kind = parse_spec(spec)[0]
+        if kind == "follow":
+            raise ValueError("follow needs the parent's values: build it with sampler()")
+        self.table = AliasTable(weights(spec, len(population)), population) if kind != UNIFORM else None
+
+    def position(self):
+        if self.table is None:
+            return random.randrange(len(self.population))  # what random.choice() draws
+        return self.table.draw()
+
+    def positions(self, k):
+        if self.table is None:
+            n = len(self.population)
+            return [int(random.random() * n) for _ in range(k)]  # what random.choices() draws
+        return self.table.draws(k)
+
+    def choice(self, rng=random):
+        if self.table is None:
+            return rng.choice(self.population)
+        return self.table.pick(rng)
+
+    def choices(self, k):
+        if self.table is None:
+            return random.choices(self.population, k=k)
+        return self.table.picks(k)
+
+    def choice_for(self, parent):
+        return self.choice()
+
+    def choices_for(self, parents):
+        return self.choices(len(parents))
+
+
+class Follow:
+    """The parent row's value with probability p, else a draw from fallback (always for NO_VALUE)."""
+
+    __slots__ = ("parent_values", "fallback", "p")
+
+    def __init__(self, parent_values, fallback, p):
+        self.parent_values = parent_values
+        self.fallback = fallback
+        self.p = p
+
+    def choice_for(self, parent):
+        value = self.parent_values[parent]
+        if random.random() < self.p and value != NO_VALUE:
+            return value
+        return self.fallback.choice()
+
+    def choices_for(self, parents):
+        return [self.choice_for(parent) for parent in parents]
+
+
+def sampler(population, spec=None, parent_values=None):
+    """A Sampler, or a Follow over parent_values (one value per parent position) for follow specs."""
+    kind = parse_spec(spec)
+    if kind[0] == "follow":
+        if parent_values is None:
+            raise ValueError(f"{spec!r}: this column has no parent value to follow")
+        return Follow(parent_values, Sampler(population), kind[1])
+    return Sampler(population, spec or UNIFORM)
+
+
+def as_sampler(population):
+    """Row builders take either a sampler or a bare population, drawn uniformly."""
+    return population if isinstance(population, (Sampler, Follow)) else Sampler(population)
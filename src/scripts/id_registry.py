@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Shared id registry for the fake data generator
+
+Ids are kept as contiguous ranges instead of Python lists, so FK sampling
+costs O(1) memory per range no matter how many rows a table holds. New ids
+are reserved from the table's sequence before rows are loaded, which lets
+COPY write explicit primary keys and the registry record them as ranges
+once the rows are loaded.
+"""
+from array import array
+from bisect import bisect_right
+
+# Collapse ids into (first, last) ranges server-side; only the ranges cross the wire
+_RANGES_SQL = """
+    SELECT min(id), max(id)
+    FROM (SELECT id, id - row_number() OVER (ORDER BY id) AS grp FROM ({source}) s) g
+    GROUP BY grp
+    ORDER BY 1
+"""
+
+
+class IdSet:
+    """Ordered ids stored as ranges; supports len() and indexing, so random.choice() samples it directly."""
+
+    __slots__ = ("starts", "offsets")
+
+    def __init__(self, ranges=()):
+        self.starts = array("q")
+        self.offsets = array("q")  # number of ids up to and including each range
+        for first, last in ranges:
+            self.add(first, last)
+
+    def add(self, first, last):
+        size = last - first + 1
+        if size <= 0:
+            return
+        total = len(self)
+        if self.starts and self.starts[-1] + (total - self._before(len(self.starts) - 1)) == first:
+            self.offsets[-1] += size  # contiguous with the last range: extend it
+        else:
+            self.starts.append(first)
+            self.offsets.append(total + size)
+
+    def _before(self, index):
+        return self.offsets[index - 1] if index else 0
+
+    def ranges(self):
+        for index, start in enumerate(self.starts):
+            yield start, start + self.offsets[index] - self._before(index) - 1
+
+    def slice(self, start, count):
+        """Ids at positions [start, start + count), as a new IdSet."""
+        result = IdSet()
+        stop = min(start + count, len(self))
+        while start < stop:
+            index = bisect_right(self.offsets, start)
+            first = self.starts[index] + start - self._before(index)
+            take = min(self.offsets[index], stop) - start
+            result.add(first, first + take - 1)
+            start += take
+        return result
+
+    def __len__(self):
+        return self.offsets[-1] if self.offsets else 0
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("IdSet index out of range")
+        if len(self.starts) == 1:
+            return self.starts[0] + position
+        index = bisect_right(self.offsets, position)
+        return self.starts[index] + position - self._before(index)
+
+    def __iter__(self):
+        for first, last in self.ranges():
+            yield from range(first, last + 1)
+
+    def __reduce__(self):
+        return IdSet, (list(self.ranges()),)
+
+
+class IdRegistry:
+    """Per-table IdSets shared by every generator in the process."""
+
+    def __init__(self):
+        self._ids = {}
+        self._pending = {}  # reserved, not loaded yet
+
+    def ids(self, conn, table, column):
+        if table not in self._ids:
+            with conn.cursor() as cur:
+                cur.execute(_RANGES_SQL.format(source=f"SELECT {column} AS id FROM {table}"))
+                self._ids[table] = IdSet(cur.fetchall())
+        return self._ids[table]
+
+    def reserve(self, conn, table, column, count):
+        """Draw count ids from the table's sequence; returns the new IdSet.
+
+        Sequence draws survive a rollback, so nothing is committed on conn. The ids
+        are only registered by confirm(), once their rows are loaded.
+        """
+        with conn.cursor() as cur:
+            source = "SELECT nextval(pg_get_serial_sequence(%s, %s)) AS id FROM generate_series(1, %s)"
+            cur.execute(_RANGES_SQL.format(source=source), (table, column, count))
+            reserved = IdSet(cur.fetchall())
+        self._pending[table] = reserved
+        return reserved
+
+    def confirm(self, table):
+        """Register the ids reserved for table, now that its rows are loaded."""
+        reserved = self._pending.pop(table, None)
+        # A table not loaded yet reads the new rows from the database on its first ids() call
+        if reserved is not None and table in self._ids:
+            self.register(table, reserved)
+
+    def discard(self, table):
+        """Drop the ids reserved for table after a failed load."""
+        self._pending.pop(table, None)
+
+    def register(self, table, ids, known=None):
+        known = known if known is not None else self._ids.setdefault(table, IdSet())
+        for first, last in ids.ranges():
+            known.add(first, last)
+
+    def forget(self, table):
+        self._ids.pop(table, None)
+        self._pending.pop(table, None)
+
+    def forget_schema(self, schema):
+        for table in [t for t in self._ids if t.startswith(f"{schema}.")]:
+            del self._ids[table]
+
+    def clear(self):
+        self._ids.clear()
+        self._pending.clear()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Index advisor for projectpulse
+
+1. top statements from pg_stat_statements (by total or mean time), with their
+   WHERE / JOIN / ORDER BY columns parsed out
+2. cross-checked with pg_stat_user_indexes and pg_stat_user_tables (seq vs index scans)
+3. a ranked report: missing indexes, unused or redundant indexes worth dropping,
+   foreign keys without a supporting index
+
+With hypopg installed, every CREATE suggestion is costed against a hypothetical
+index (EXPLAIN (GENERIC_PLAN), PostgreSQL 16+) before it is recommended.
+Without pg_stat_statements only the catalog checks run.
+"""
+import argparse
+import json
+import re
+
+import psycopg2
+
+from src.scripts.bulk_load import SCHEMAS, connect
+
+# Tables smaller than this are left alone: a seq scan is as good as an index there
+MIN_ROWS = 1_000
+# A hypothetical index must cut the plan cost by at least this much to be recommended
+MIN_COST_GAIN = 0.10
+
+_INDEXES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, t.relname), format('%%I.%%I', n.nspname, i.relname),
+           ARRAY(SELECT a.attname::text FROM unnest(x.indkey) WITH ORDINALITY k(attnum, ord)
+                 JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum ORDER BY k.ord),
+           am.amname, x.indisunique OR x.indisprimary,
+           x.indpred IS NOT NULL OR x.indexprs IS NOT NULL,
+           EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid),
+           COALESCE(sum(s.idx_scan), 0), COALESCE(sum(pg_relation_size(tree.relid)), 0)
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_am am ON am.oid = i.relam
+    -- A partitioned index is judged by the scans and size of all its partitions' indexes
+    CROSS JOIN LATERAL (
+      SELECT relid FROM pg_partition_tree(x.indexrelid) WHERE isleaf
+      UNION SELECT x.indexrelid WHERE i.relkind = 'i'
+    ) tree
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = tree.relid
+    WHERE n.nspname = ANY(%s) AND t.relkind IN ('r', 'm', 'p') AND NOT t.relispartition
+    GROUP BY t.oid, n.nspname, t.relname, i.relname, x.indexrelid, x.indkey, am.amname, x.indisunique,
+             x.indisprimary, x.indpred, x.indexprs
+    ORDER BY 1, 2
+"""
+
+_FOREIGN_KEYS_SQL = """
+    SELECT format('%%I.%%I', n.nspname, t.relname), c.conname,
+           ARRAY(SELECT a.attname::text FROM unnest(c.conkey) WITH ORDINALITY k(attnum, ord)
+                 JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum ORDER BY k.ord),
+           c.confrelid::regclass::text
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE c.contype = 'f' AND c.conparentid = 0 AND n.nspname = ANY(%s)
+    ORDER BY 1, 2
+"""
+
+_TABLES_SQL = """
+    SELECT format('%%I.%%I', schemaname, relname), seq_scan, COALESCE(idx_scan, 0), n_live_tup
+    FROM pg_stat_user_tables WHERE schemaname = ANY(%s)
+"""
+
+_COLUMNS_SQL = """
+    SELECT format('%%I.%%I', table_schema, table_name), column_name
+    FROM information_schema.columns WHERE table_schema = ANY(%s)
+"""
+
+_STATEMENTS_SQL = """
+    SELECT query, calls, total_exec_time, mean_exec_time
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND query ~* '^\\s*(SELECT|UPDATE|DELETE|WITH)'
+    ORDER BY {order} DESC
+    LIMIT %s
+"""
+
+
+def _extension_installed(conn, name):
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = %s)", (name,))
+        return cur.fetchone()[0]
+
+
+def _fetch(conn, sql, schemas):
+    with conn.cursor() as cur:
+        cur.execute(sql, (list(schemas),))
+        return cur.fetchall()
+
+
+# CATALOG
+def indexes(conn, schemas=SCHEMAS):
+    return [
+        {"table": table, "index": index, "columns": columns, "method": method, "unique": unique,
+         "partial": partial, "constraint": constraint, "scans": scans, "bytes": size}
+        for table, index, columns, method, unique, partial, constraint, scans, size
+        in _fetch(conn, _INDEXES_SQL, schemas)
+    ]
+
+
+def table_stats(conn, schemas=SCHEMAS):
+    return {
+        table: {"seq_scan": seq, "idx_scan": idx, "rows": rows}
+        for table, seq, idx, rows in _fetch(conn, _TABLES_SQL, schemas)
+    }
+
+
+def table_columns(conn, schemas=SCHEMAS):
+    columns = {}
+    for table, column in _fetch(conn, _COLUMNS_SQL, schemas):
+        columns.setdefault(table, set()).add(column)
+    return columns
+
+
+def _leading(index, columns):
+    """True when the btree index can serve lookups on columns (in any order) as its leading key."""
+    return (
+        index["method"] == "btree" and not index["partial"]
+        and set(index["columns"][:len(columns)]) == set(columns)
+    )
+
+
+def unindexed_foreign_keys(conn, index_list=None, schemas=SCHEMAS):
+    index_list = index_list if index_list is not None else indexes(conn, schemas)
+    missing = []
+    for table, name, columns, referenced in _fetch(conn, _FOREIGN_KEYS_SQL, schemas):
+        if not any(index["table"] == table and _leading(index, columns) for index in index_list):
+            missing.append({"table": table, "constraint": name, "columns": columns, "references": referenced})
+    return missing
+
+
+def redundant_indexes(index_list):
+    """Plain btree indexes whose columns are a leading prefix of (or equal to) another index on the table."""
+    redundant = []
+    for index in index_list:
+        if index["unique"] or index["constraint"] or index["partial"] or index["method"] != "btree":
+            continue
+        for other in index_list:
+            if other is index or other["table"] != index["table"] or other["method"] != "btree" or other["partial"]:
+                continue
+            covers = other["columns"][:len(index["columns"])] == index["columns"]
+            # Of two identical plain indexes, keep the first by name
+            same = other["columns"] == index["columns"] and not other["constraint"] and other["index"] > index["index"]
+            if covers and not same:
+                redundant.append({**index, "covered_by": other["index"]})
+                break
+    return redundant
+
+
+def unused_indexes(index_list):
+    return [
+        index for index in index_list
+        if index["scans"] == 0 and not index["unique"] and not index["constraint"]
+    ]
+
+
+# STATEMENTS
+_RELATION = re.compile(
+    r"\b(?:FROM|JOIN)\s+([a-z_]\w*(?:\.[a-z_]\w*)?)"
+    r"(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|RIGHT|INNER|FULL|CROSS|GROUP|ORDER|LIMIT|USING|SET)\b)([a-z_]\w*))?",
+    re.IGNORECASE,
+)
+_CLAUSE_END = r"(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bOFFSET\b|\bHAVING\b|\bRETURNING\b|\)|;|$)"
+_WHERE = re.compile(r"\bWHERE\b(.*?)" + _CLAUSE_END, re.IGNORECASE | re.DOTALL)
+_ON = re.compile(r"\bON\b(.*?)(?=\b(?:LEFT|RIGHT|INNER|FULL|CROSS)?\s*JOIN\b|\bWHERE\b|" + _CLAUSE_END[3:],
+                 re.IGNORECASE | re.DOTALL)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|\)|;|$)", re.IGNORECASE | re.DOTALL)
+_PREDICATE = re.compile(
+    r"(?:\b([a-z_]\w*)\.)?\b([a-z_]\w*)\s*(?:=|<>|!=|<=|>=|<|>|\bIN\b|\bLIKE\b|\bILIKE\b|\bBETWEEN\b|\bIS\b)",
+    re.IGNORECASE,
+)
+_QUALIFIED = re.compile(r"\b([a-z_]\w*)\.([a-z_]\w*)\b", re.IGNORECASE)
+_KEYWORDS = {"and", "or", "not", "null", "true", "false", "exists", "any", "all", "case", "when", "then", "else"}
+
+
+def _resolve(name, columns):
+    if "." in name:
+        return name
+    matches = [table for table in columns if table.split(".")[1] == name]
+    return matches[0] if len(matches) == 1 else None
+
+
+def referenced_columns(sql, columns):
+    """(table, column, role) for every WHERE / JOIN / ORDER BY column of sql; role is where, join or order."""
+    aliases = {}
+    for name, alias in _RELATION.findall(sql):
+        table = _resolve(name, columns)
+        if table:
+            aliases[alias or name.split(".")[-1]] = table
+            aliases.setdefault(table.split(".")[1], table)
+    tables = set(aliases.values())
+
+    def owner(alias, column):
+        if alias:
+            table = aliases.get(alias)
+            return table if table and column in columns.get(table, ()) else None
+        candidates = [table for table in tables if column in columns.get(table, ())]
+        return candidates[0] if len(candidates) == 1 else None
+
+    found = set()
+    for clause in _WHERE.findall(sql):
+        for alias, column in _PREDICATE.findall(clause):
+            if column.lower() not in _KEYWORDS and owner(alias, column):
+                found.add((owner(alias, column), column, "where"))
+    for clause in _ON.findall(sql):
+        for alias, column in _QUALIFIED.findall(clause):
+            if owner(alias, column):
+                found.add((owner(alias, column), column, "join"))
+    for clause in _ORDER_BY.findall(sql):
+        for item in clause.split(","):
+            words = item.strip().split()
+            if words:
+                alias, _, column = words[0].rpartition(".")
+                if owner(alias, column):
+                    found.add((owner(alias, column), column, "order"))
+    return found
+
+
+def top_statements(conn, limit=20, order="total"):
+    if not _extension_installed(conn, "pg_stat_statements"):
+        return []
+    column = "total_exec_time" if order == "total" else "mean_exec_time"
+    with conn.cursor() as cur:
+        cur.execute(_STATEMENTS_SQL.format(order=column), (limit,))
+        return [
+            {"query": query, "calls": calls, "total_ms": total, "mean_ms": mean}
+            for query, calls, total, mean in cur.fetchall()
+        ]
+
+
+def missing_indexes(statements, index_list, stats, columns):
+    """CREATE INDEX candidates for filtered/joined columns no index leads with, scored by statement time."""
+    candidates = {}
+    for statement in statements:
+        refs = referenced_columns(statement["query"], columns)
+        order_by = {(table, column) for table, column, role in refs if role == "order"}
+        for table, column, role in sorted(refs):
+            if role == "order" or stats.get(table, {}).get("rows", 0) < MIN_ROWS:
+                continue
+            if any(index["table"] == table and _leading(index, [column]) for index in index_list):
+                continue
+            # Filter column first, then the ORDER BY column of the same table (like idx_documents_project_uploaded_at)
+            key = (table, (column,) + tuple(sorted(c for t, c in order_by if t == table and c != column))[:2])
+            candidate = candidates.setdefault(key, {"table": table, "columns": list(key[1]), "score": 0.0,
+                                                    "statements": []})
+            candidate["score"] += statement["total_ms"]
+            candidate["statements"].append(statement["query"])
+    return sorted(candidates.values(), key=lambda candidate: -candidate["score"])
+
+
+# HYPOTHETICAL INDEXES
+def _generic_cost(cur, sql):
+    cur.execute(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {sql}")
+    plan = cur.fetchone()[0]
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    return plan[0]["Plan"]["Total Cost"]
+
+
+def hypothetical_gain(conn, table, columns, sql):
+    """(cost before, cost after) of sql with a hypothetical index.
+
+    None without hypopg / PostgreSQL 16, or when sql cannot be planned (e.g. a
+    normalized statement GENERIC_PLAN rejects): the suggestion stays unvalidated.
+    """
+    if conn.server_version < 160000 or not _extension_installed(conn, "hypopg"):
+        return None
+    costs = None
+    with conn.cursor() as cur:
+        try:
+            before = _generic_cost(cur, sql)
+            cur.execute("SELECT hypopg_create_index(%s)", (f"CREATE INDEX ON {table} ({', '.join(columns)})",))
+            costs = before, _generic_cost(cur, sql)
+        except psycopg2.Error:
+            conn.rollback()  # hypothetical indexes live in the session, not the transaction: reset below
+        cur.execute("SELECT hypopg_reset()")
+    conn.commit()
+    return costs
+
+
+def advise(conn, schemas=SCHEMAS, limit=20, order="total"):
+    """Ranked suggestions, most valuable first within each kind."""
+    index_list = indexes(conn, schemas)
+    stats = table_stats(conn, schemas)
+    columns = table_columns(conn, schemas)
+    suggestions = []
+
+    def add(kind, table, ddl, reason, score, cols=None, sql=None):
+        suggestion = {"kind": kind, "table": table, "ddl": ddl, "reason": reason, "score": round(score, 1)}
+        if cols is not None:
+            costs = hypothetical_gain(conn, table, cols, sql)
+            suggestion["validated"] = None if costs is None else costs[1] <= costs[0] * (1 - MIN_COST_GAIN)
+            if costs is not None:
+                suggestion["cost_before"], suggestion["cost_after"] = costs
+        suggestions.append(suggestion)
+
+    for candidate in missing_indexes(top_statements(conn, limit, order), index_list, stats, columns):
+        table_stat = stats[candidate["table"]]
+        add("missing index", candidate["table"],
+            f"CREATE INDEX ON {candidate['table']} ({', '.join(candidate['columns'])})",
+            f"{len(candidate['statements'])} top statement(s) filter on it; "
+            f"{table_stat['seq_scan']} seq scans vs {table_stat['idx_scan']} index scans",
+            candidate["score"], candidate["columns"], candidate["statements"][0])
+
+    for fk in unindexed_foreign_keys(conn, index_list, schemas):
+        rows = stats.get(fk["table"], {}).get("rows", 0)
+        lookup = f"SELECT 1 FROM {fk['table']} WHERE " + " AND ".join(
+            f"{column} = ${n}" for n, column in enumerate(fk["columns"], 1))
+        add("unindexed foreign key", fk["table"], f"CREATE INDEX ON {fk['table']} ({', '.join(fk['columns'])})",
+            f"{fk['constraint']} references {fk['references']}; joins and parent deletes scan {rows:,} rows",
+            rows, fk["columns"], lookup)
+
+    redundant = redundant_indexes(index_list)
+    for index in redundant:
+        add("redundant index", index["table"], f"DROP INDEX {index['index']}",
+            f"its columns lead {index['covered_by']}", index["bytes"] / 1024)
+    for index in unused_indexes(index_list):
+        if index["index"] not in {r["index"] for r in redundant}:
+            add("unused index", index["table"], f"DROP INDEX {index['index']}",
+                "0 scans since statistics were last reset", index["bytes"] / 1024)
+
+    kinds = ("missing index", "unindexed foreign key", "redundant index", "unused index")
+    return sorted(suggestions, key=lambda s: (kinds.index(s["kind"]), -s["score"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN (default: the generator's connection)")
+    parser.add_argument("--top", type=int, default=20, help="statements read from pg_stat_statements")
+    parser.add_argument("--order", choices=("total", "mean"), default="total", help="rank statements by time")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    try:
+        if not _extension_installed(conn, "pg_stat_statements"):
+            print("⚠️ pg_stat_statements is not installed: only catalog checks run (see optional_extensions.sql)")
+        suggestions = advise(conn, limit=args.top, order=args.order)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(suggestions, indent=2))
+        return
+    for rank, suggestion in enumerate(suggestions, 1):
+        validated = {True: " ✅ hypopg", False: " ❌ hypopg: no gain", None: ""}[suggestion.get("validated")]
+        print(f"{rank:>3}. [{suggestion['kind']}] {suggestion['ddl']}{validated}\n     {suggestion['reason']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Per-stage load report for the fake data generator
+
+Each stage records, client side: wall and CPU time, rows, rows/sec, COPY and
+INSERT bytes sent and peak RSS so far; server side: WAL bytes
+(pg_current_wal_insert_lsn), pg_stat_database block reads and hits, and the
+growth of the stage's tables and indexes (pg_total_relation_size,
+pg_indexes_size). A slow stage can then be told apart: Faker CPU shows in
+cpu_s, network in bytes_sent, WAL in wal_bytes, index maintenance in
+index_bytes.
+
+Block counters come from the cumulative statistics: other connections flush
+theirs within a second or so of going idle, so they are approximate per stage.
+With --workers, the client-side columns cover the parent process only.
+
+    python src/scripts/quest_4_Generate_Fake_Data.py --fast --report load.json --profile documents
+"""
+import cProfile
+import csv
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.scripts.copy_loader import bytes_sent
+
+STAGE_TABLES = {
+    "users": ("users.users",),
+    "sessions": ("users.sessions",),
+    "reference": (
+        "reference.tech_stack_reference", "reference.feature_reference", "reference.access_role_reference",
+        "reference.license_reference", "reference.phase_reference", "reference.decision_type_reference",
+        "reference.tag_reference", "reference.filetype_reference", "reference.storage_reference",
+        "reference.priority_reference",
+    ),
+    "projects": ("projects.projects",),
+    "project_links": ("projects.project_feature", "projects.project_tech_stack", "projects.project_tag"),
+    "documents": ("documents.documents",),
+    "decision_logs": ("projects.project_decision_log",),
+}
+
+CSV_FIELDS = (
+    "stage", "rows", "wall_s", "cpu_s", "rows_per_s", "bytes_sent", "peak_rss_mb",
+    "wal_bytes", "blks_read", "blks_hit", "table_bytes", "index_bytes",
+)
+
+_SERVER_SQL = """
+    SELECT pg_current_wal_insert_lsn()::text, d.blks_read, d.blks_hit,
+           COALESCE((SELECT json_object_agg(t, json_build_array(pg_total_relation_size(t::regclass),
+                                                               pg_indexes_size(t::regclass)))
+                     FROM unnest(%s::text[]) t), '{}')
+    FROM pg_stat_database d
+    WHERE d.datname = current_database()
+"""
+
+
+def stage_tables(name):
+    """Tables written by a stage, or by every stage of a "users+projects" style level."""
+    return [table for stage in name.split("+") for table in STAGE_TABLES.get(stage, ())]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+
+
+def server_counters(conn, tables):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_stat_force_next_flush(), pg_stat_clear_snapshot()")  # fresh counters, ours flushed
+        cur.execute(_SERVER_SQL, (list(tables),))
+        lsn, blks_read, blks_hit, sizes = cur.fetchone()
+    conn.commit()
+    return {"lsn": lsn, "blks_read": blks_read, "blks_hit": blks_hit, "sizes": sizes}
+
+
+def wal_bytes(conn, start_lsn, end_lsn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_wal_lsn_diff(%s::pg_lsn, %s::pg_lsn)::bigint", (end_lsn, start_lsn))
+        delta = cur.fetchone()[0]
+    conn.commit()
+    return delta
+
+
+class LoadReport:
+    """Collects one entry per stage; profile names the stage to run under cProfile."""
+
+    def __init__(self, conn, profile=None, profile_path=None):
+        self.conn = conn
+        self.profile = profile
+        self.profile_path = profile_path or f"{profile}.prof"
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the block; the caller stores the rows it loaded in entry["rows"]."""
+        tables = stage_tables(name)
+        before = server_counters(self.conn, tables)
+        entry = {"stage": name, "rows": 0}
+        profiler = cProfile.Profile() if self.profile in name.split("+") else None
+        sent, wall, cpu = bytes_sent(), time.perf_counter(), time.process_time()
+        if profiler:
+            print(f"🔬 Profiling {name} (pid {os.getpid()}) into {self.profile_path}")
+            profiler.enable()
+        try:
+            yield entry
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(self.profile_path)
+        entry["wall_s"] = time.perf_counter() - wall
+        entry["cpu_s"] = time.process_time() - cpu
+        sent_after = bytes_sent()
+        after = server_counters(self.conn, tables)
+
+        entry["rows_per_s"] = entry["rows"] / entry["wall_s"] if entry["wall_s"] else 0.0
+        entry["bytes_sent"] = sent_after - sent
+        entry["peak_rss_mb"] = peak_rss_mb()
+        entry["wal_bytes"] = wal_bytes(self.conn, before["lsn"], after["lsn"])
+        entry["blks_read"] = after["blks_read"] - before["blks_read"]
+        entry["blks_hit"] = after["blks_hit"] - before["blks_hit"]
+        entry["tables"] = {}
+        for table, (total, index) in after["sizes"].items():
+            old_total, old_index = before["sizes"][table]
+            entry["tables"][table] = {"table_bytes": (total - index) - (old_total - old_index),
+                                      "index_bytes": index - old_index}
+        entry["table_bytes"] = sum(growth["table_bytes"] for growth in entry["tables"].values())
+        entry["index_bytes"] = sum(growth["index_bytes"] for growth in entry["tables"].values())
+        self.stages.append(entry)
+
+    def summary(self):
+        lines = [f"{'stage':<24} {'rows':>10} {'wall s':>8} {'cpu s':>7} {'rows/s':>10} {'sent MB':>8} "
+                 f"{'WAL MB':>8} {'index MB':>9}"]
+        for entry in self.stages:
+            lines.append(
+                f"{entry['stage']:<24} {entry['rows']:>10,} {entry['wall_s']:>8.2f} {entry['cpu_s']:>7.2f} "
+                f"{entry['rows_per_s']:>10,.0f} {entry['bytes_sent'] / 1024 ** 2:>8.1f} "
+                f"{entry['wal_bytes'] / 1024 ** 2:>8.1f} "
+                f"{entry['index_bytes'] / 1024 ** 2:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def write(self, path):
+        """JSON (every field, per-table growth included) or, for a .csv path, one row per stage."""
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, CSV_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(self.stages)
+            return
+        with open(path, "w") as f:
+            json.dump({"generated_at": datetime.now().isoformat(), "stages": self.stages}, f, indent=2)
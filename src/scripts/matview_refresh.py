@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Materialized view refresh service for projectpulse
+
+- unique indexes so REFRESH ... CONCURRENTLY never blocks readers
+- staleness from the pg_stat_user_tables write counters and the storage files of each view's base tables
+- only stale views are refreshed, independent ones in parallel on separate connections
+- every refresh is recorded with its duration in maintenance.matview_refresh_log
+
+REFRESH needs the views' owner, so run it with the owner's DSN (e.g. postgres).
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.scripts.bulk_load import SCHEMAS, connect
+
+# Key columns for the unique index CONCURRENTLY needs (see quest_3, STEP 5)
+UNIQUE_KEYS = {
+    "projects.matview_project_summary": ("project_id",),
+    "documents.matview_document_metadata": ("document_id",),
+    "projects.matview_project_tags": ("project_tag_id",),
+    "projects.matview_project_feature_matrix": ("project_feature_id",),
+    "projects.matview_project_tech_stack": ("project_tech_id",),
+}
+
+_LOG_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS maintenance;
+    CREATE TABLE IF NOT EXISTS maintenance.matview_refresh_log (
+      refresh_id BIGSERIAL PRIMARY KEY,
+      matview TEXT NOT NULL,
+      refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      duration_ms NUMERIC NOT NULL,
+      concurrent BOOLEAN NOT NULL,
+      base_changes JSONB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_matview_refresh_log_matview
+      ON maintenance.matview_refresh_log(matview, refreshed_at DESC);
+"""
+
+# Relations each materialized view reads, from its rewrite rule's dependencies
+_DEPENDENCIES_SQL = """
+    SELECT DISTINCT format('%%I.%%I', vn.nspname, v.relname), format('%%I.%%I', tn.nspname, t.relname), t.relkind
+    FROM pg_class v
+    JOIN pg_namespace vn ON vn.oid = v.relnamespace
+    JOIN pg_rewrite r ON r.ev_class = v.oid
+    JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+                    AND d.refclassid = 'pg_class'::regclass
+    JOIN pg_class t ON t.oid = d.refobjid AND t.oid <> v.oid
+    JOIN pg_namespace tn ON tn.oid = t.relnamespace
+    WHERE v.relkind = 'm' AND vn.nspname = ANY(%s) AND t.relkind IN ('r', 'p', 'm')
+    ORDER BY 1, 2
+"""
+
+# Rows inserted + updated + deleted, and the storage files: TRUNCATE moves no counter
+# but gives the table a new relfilenode. Partitioned tables cover their partitions.
+_COUNTERS_SQL = """
+    SELECT format('%%I.%%I', n.nspname, c.relname), COALESCE(sum(s.n_tup_ins + s.n_tup_upd + s.n_tup_del), 0),
+           COALESCE(string_agg(pg_relation_filenode(s.relid)::text, ',' ORDER BY s.relid), '')
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s
+      ON s.relid = c.oid OR s.relid IN (SELECT relid FROM pg_partition_tree(c.oid))
+    WHERE c.oid = ANY(%s::regclass[])
+    GROUP BY 1
+"""
+
+_LAST_REFRESH_SQL = """
+    SELECT DISTINCT ON (matview) matview, refreshed_at, base_changes
+    FROM maintenance.matview_refresh_log
+    ORDER BY matview, refreshed_at DESC
+"""
+
+# CONCURRENTLY needs a populated view with a plain (column-only, non-partial) unique index
+_REFRESH_MODE_SQL = """
+    SELECT format('%%I.%%I', m.schemaname, m.matviewname), m.ispopulated,
+           EXISTS (SELECT 1 FROM pg_index x
+                   WHERE x.indrelid = format('%%I.%%I', m.schemaname, m.matviewname)::regclass
+                     AND x.indisunique AND x.indisvalid AND x.indpred IS NULL AND x.indexprs IS NULL)
+    FROM pg_matviews m
+    WHERE m.schemaname = ANY(%s)
+"""
+
+_COLUMNS_SQL = """
+    SELECT attname FROM pg_attribute
+    WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+"""
+
+
+def ensure_setup(conn):
+    """Create the refresh log and any missing unique key index; returns views that still lack one."""
+    missing = []
+    with conn.cursor() as cur:
+        cur.execute(_LOG_TABLE_SQL)
+        for view, columns in UNIQUE_KEYS.items():
+            cur.execute(_COLUMNS_SQL, (view,))
+            if not set(columns) <= {name for name, in cur.fetchall()}:
+                # Built from an older quest_3 script: rerun it to add the link ids
+                missing.append(view)
+                continue
+            name = view.split(".")[1]
+            cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{name}_key ON {view}({', '.join(columns)})")
+    conn.commit()
+    return missing
+
+
+def dependencies(conn, schemas=SCHEMAS):
+    deps = {}
+    with conn.cursor() as cur:
+        cur.execute(_DEPENDENCIES_SQL, (list(schemas),))
+        for view, base, relkind in cur.fetchall():
+            deps.setdefault(view, {})[base] = relkind
+    return deps
+
+
+def change_counters(conn, tables):
+    with conn.cursor() as cur:
+        # Statistics are cached per transaction: make sure the counters are current
+        cur.execute("SELECT pg_stat_clear_snapshot()")
+        cur.execute(_COUNTERS_SQL, (sorted(tables),))
+        return {table: [int(count), filenodes] for table, count, filenodes in cur.fetchall()}
+
+
+def last_refreshes(conn):
+    with conn.cursor() as cur:
+        cur.execute(_LAST_REFRESH_SQL)
+        return {view: (refreshed_at, changes) for view, refreshed_at, changes in cur.fetchall()}
+
+
+def refresh_modes(conn, schemas=SCHEMAS):
+    """Map each view to (populated, has a unique key index)."""
+    with conn.cursor() as cur:
+        cur.execute(_REFRESH_MODE_SQL, (list(schemas),))
+        return {view: (populated, has_key) for view, populated, has_key in cur.fetchall()}
+
+
+def stale_views(conn, deps, modes, force=False):
+    """Map each view that needs a refresh to the base table counters to record for it."""
+    counters = change_counters(conn, {base for bases in deps.values() for base, kind in bases.items() if kind != "m"})
+    last = last_refreshes(conn)
+    stale = {}
+    for level in refresh_levels(deps, deps):
+        for view in level:
+            bases = deps[view]
+            snapshot = {base: counters.get(base, 0) for base, kind in bases.items() if kind != "m"}
+            recorded = last.get(view)
+            if (
+                force or recorded is None or not modes[view][0]
+                or snapshot != recorded[1]  # a counter moved (or was reset), or a table was truncated
+                or any(base in stale for base in bases)  # reads a view refreshed in this run
+                or any(base in last and last[base][0] > recorded[0] for base in bases)
+            ):
+                stale[view] = snapshot
+    return stale
+
+
+def refresh_levels(views, deps):
+    """Order views so each one runs after the views it reads; views within a level are independent."""
+    pending, levels = set(views), []
+    while pending:
+        level = sorted(v for v in pending if not set(deps.get(v, ())) & pending)
+        if not level:
+            raise ValueError(f"Circular materialized view dependencies: {sorted(pending)}")
+        levels.append(level)
+        pending -= set(level)
+    return levels
+
+
+def refresh_view(dsn, view, concurrently, snapshot):
+    conn = connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            started = time.perf_counter()
+            cur.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{view}")
+            seconds = time.perf_counter() - started
+            cur.execute(
+                "INSERT INTO maintenance.matview_refresh_log (matview, duration_ms, concurrent, base_changes) "
+                "VALUES (%s, %s, %s, %s)",
+                (view, round(seconds * 1000, 3), concurrently, json.dumps(snapshot)),
+            )
+    finally:
+        conn.close()
+    return seconds
+
+
+def refresh_stale(dsn=None, workers=4, force=False, schemas=SCHEMAS):
+    """Refresh every stale view, level by level; returns {view: seconds}."""
+    conn = connect(dsn)
+    try:
+        ensure_setup(conn)
+        deps = dependencies(conn, schemas)
+        modes = refresh_modes(conn, schemas)
+        stale = stale_views(conn, deps, modes, force)
+        conn.commit()
+    finally:
+        conn.close()
+
+    durations = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for level in refresh_levels(stale, deps):
+            jobs = {view: pool.submit(refresh_view, dsn, view, all(modes[view]), stale[view]) for view in level}
+            for view, job in jobs.items():
+                durations[view] = job.result()
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN of the views' owner (default: the generator's connection)")
+    parser.add_argument("--workers", type=int, default=4, help="views refreshed at the same time")
+    parser.add_argument("--force", action="store_true", help="refresh every view, stale or not")
+    parser.add_argument("--interval", type=float, help="keep running, checking for stale views every N seconds")
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    try:
+        for view in ensure_setup(conn):
+            print(f"⚠️ {view} has no unique key column; it is refreshed without CONCURRENTLY until quest_3 is rerun")
+    finally:
+        conn.close()
+
+    while True:
+        durations = refresh_stale(args.dsn, args.workers, args.force)
+        for view, seconds in durations.items():
+            print(f"🔄 {view} refreshed in {seconds:.3f}s")
+        if not durations:
+            print("✅ All materialized views are fresh")
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Multi-process fake data generation — each table's rows are sharded across a process pool
+"""
+import hashlib
+import multiprocessing
+from contextlib import nullcontext
+
+from src.scripts.copy_loader import COPY_TEXT
+from src.scripts.quest_4_Generate_Fake_Data import (
+    CHUNK_SIZE,
+    GENERATORS,
+    SESSION_WINDOW_DAYS,
+    get_connection,
+    registry,
+    seed_generators,
+    stage_options,
+)
+from src.scripts.server_side_generate import SERVER_GENERATORS
+
+# Stages whose primary keys other tables reference: the parent reserves one id
+# block per stage and hands each shard a fixed slice. Identities keep growing
+# across runs, so a seed reproduces the rows and their offsets in the block, not the ids
+ID_COLUMNS = {
+    "users": ("users.users", "user_id"),
+    "projects": ("projects.projects", "project_id"),
+    "documents": ("documents.documents", "document_id"),
+}
+
+# FK order: every stage of a level finishes before the next level starts.
+# Stages inside a level only depend on earlier levels, so they share the pool.
+STAGE_LEVELS = (
+    ("users",),
+    ("sessions", "projects"),
+    ("project_links", "documents"),
+    ("decision_logs",),
+)
+
+
+def shard_counts(count, workers):
+    base, extra = divmod(count, workers)
+    return [base + (1 if shard < extra else 0) for shard in range(workers)]
+
+
+def shard_seed(seed, stage, shard):
+    # hashlib rather than hash(): stable across processes and interpreter runs
+    digest = hashlib.sha256(f"{seed}:{stage}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _run_shard(stage, count, seed, method, chunk_size, fast, ids, server_side, options):
+    seed_generators(seed)
+    # Pool processes are reused across levels: reload ids written by earlier levels
+    registry.clear()
+    kwargs = {"ids": ids} if ids is not None else {}
+    conn = get_connection()
+    try:
+        if server_side:
+            return SERVER_GENERATORS[stage](conn, count, **options)
+        return GENERATORS[stage](
+            conn, count=count, method=method, chunk_size=chunk_size, fast=fast, **kwargs, **options
+        )
+    finally:
+        conn.close()
+
+
+def generate_parallel(counts, workers, seed, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, server_side=(),
+                      session_window=SESSION_WINDOW_DAYS, report=None, skew=None):
+    """Generate every stage in FK order, each shard on its own connection and seed.
+
+    Stages listed in server_side run INSERT ... SELECT shards concurrently instead.
+    Every shard builds the same --skew samplers, so the distributions hold across shards.
+    A LoadReport, if given, gets one entry per level.
+    """
+    totals = dict.fromkeys(counts, 0)
+    conn = get_connection()
+    try:
+        # spawn: workers must not inherit the parent's open connection
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            for level in STAGE_LEVELS:
+                with report.stage("+".join(level)) if report else nullcontext({}) as entry:
+                    jobs = []
+                    for stage in level:
+                        options = stage_options(stage, session_window, None if stage in server_side else skew)
+                        ids = None
+                        if stage in ID_COLUMNS and stage not in server_side:
+                            ids = registry.reserve(conn, *ID_COLUMNS[stage], counts[stage])
+                        offset = 0
+                        for shard, count in enumerate(shard_counts(counts[stage], workers)):
+                            if count:
+                                shard_ids = ids.slice(offset, count) if ids is not None else None
+                                args = (
+                                    stage, count, shard_seed(seed, stage, shard), method, chunk_size, fast,
+                                    shard_ids, stage in server_side, options
+                                )
+                                jobs.append((stage, pool.apply_async(_run_shard, args)))
+                            offset += count
+                    conn.commit()  # id lookups and reservations: nothing stays open while the shards load
+                    try:
+                        for stage, job in jobs:
+                            totals[stage] += job.get()
+                    except BaseException:
+                        for stage in level:
+                            if stage in ID_COLUMNS:
+                                registry.discard(ID_COLUMNS[stage][0])
+                        raise
+                    for stage in level:
+                        if stage in server_side and stage in ID_COLUMNS:
+                            registry.forget(ID_COLUMNS[stage][0])  # ids were assigned server-side
+                        elif stage in ID_COLUMNS:
+                            registry.confirm(ID_COLUMNS[stage][0])
+                    entry["rows"] = sum(totals[stage] for stage in level)
+    finally:
+        conn.close()
+    return totals
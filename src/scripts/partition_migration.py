@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Online migration of projects/documents into their priority-partitioned twins
+
+- keyset-paginated batches (pk > last_id ORDER BY pk LIMIT n), each in its own short transaction
+- the checkpoint is updated in the same transaction as its batch, so a rerun resumes exactly
+- rows whose priority_id has no partition (NULL or new priorities) go to a DEFAULT partition
+- row counts and checksums are verified per partition against the source
+
+Creating partitions needs the tables' owner, so run it with the owner's DSN (e.g. postgres).
+"""
+import argparse
+import time
+
+import psycopg2
+
+from src.scripts.bulk_load import connect
+
+# name -> (source, partitioned target, keyset column)
+MIGRATIONS = {
+    "projects": ("projects.projects", "projects.projects_partitioned", "project_id"),
+    "documents": ("documents.documents", "documents.documents_partitioned_by_priority", "document_id"),
+}
+
+BATCH_SIZE = 5_000
+
+_CHECKPOINT_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS maintenance;
+    CREATE TABLE IF NOT EXISTS maintenance.partition_migration_checkpoint (
+      migration TEXT PRIMARY KEY,
+      last_id BIGINT NOT NULL DEFAULT 0,
+      rows_copied BIGINT NOT NULL DEFAULT 0,
+      updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+_COLUMNS_SQL = """
+    SELECT attname FROM pg_attribute
+    WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+    ORDER BY attnum
+"""
+
+_BATCH_SQL = """
+    WITH batch AS (
+      SELECT {columns} FROM {source} WHERE {pk} > %s ORDER BY {pk} LIMIT %s
+    ), moved AS (
+      INSERT INTO {target} ({columns}) SELECT {columns} FROM batch RETURNING {pk}
+    )
+    SELECT count(*), max({pk}) FROM moved
+"""
+
+# Order-independent checksum: sum of the first 64 bits of each row's md5
+_CHECKSUM_SQL = """
+    SELECT {partition}, priority_id, count(*), sum(('x' || substr(md5(t::text), 1, 16))::bit(64)::bigint::numeric)
+    FROM {table} t
+    WHERE {pk} <= %s
+    GROUP BY 1, 2
+"""
+
+
+def ensure_checkpoints(conn):
+    with conn.cursor() as cur:
+        cur.execute(_CHECKPOINT_TABLE_SQL)
+    conn.commit()
+
+
+def checkpoint(conn, name):
+    """(last migrated id, rows copied so far) for a migration."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT last_id, rows_copied FROM maintenance.partition_migration_checkpoint WHERE migration = %s",
+            (name,),
+        )
+        row = cur.fetchone()
+    return row if row else (0, 0)
+
+
+def reset(conn, name):
+    """Forget the checkpoint and empty the target, to start a migration over."""
+    _, target, _ = MIGRATIONS[name]
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM maintenance.partition_migration_checkpoint WHERE migration = %s", (name,))
+        cur.execute(f"TRUNCATE {target}")
+    conn.commit()
+
+
+def ensure_default_partition(conn, target):
+    partition = f"{target}_default"
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {target} DEFAULT")
+    return partition
+
+
+def _is_unrouted(error):
+    return error.pgcode == "23514" and "no partition of relation" in str(error)
+
+
+def migrate_batch(conn, name, batch_size=BATCH_SIZE):
+    """Copy the next keyset batch and advance the checkpoint atomically; returns rows copied."""
+    source, target, pk = MIGRATIONS[name]
+    with conn.cursor() as cur:
+        cur.execute(_COLUMNS_SQL, (target,))
+        columns = ", ".join(column for column, in cur.fetchall())
+        sql = _BATCH_SQL.format(columns=columns, source=source, target=target, pk=pk)
+        last_id, _ = checkpoint(conn, name)
+        cur.execute("SAVEPOINT batch")
+        try:
+            cur.execute(sql, (last_id, batch_size))
+        except psycopg2.errors.CheckViolation as error:
+            if not _is_unrouted(error):
+                raise
+            # NULL or a new priority_id: route it to a DEFAULT partition instead of failing
+            cur.execute("ROLLBACK TO SAVEPOINT batch")
+            ensure_default_partition(conn, target)
+            cur.execute(sql, (last_id, batch_size))
+        copied, max_id = cur.fetchone()
+        if copied:
+            cur.execute("""
+                INSERT INTO maintenance.partition_migration_checkpoint (migration, last_id, rows_copied)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (migration) DO UPDATE
+                SET last_id = EXCLUDED.last_id,
+                    rows_copied = partition_migration_checkpoint.rows_copied + EXCLUDED.rows_copied,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (name, max_id, copied))
+    conn.commit()
+    return copied
+
+
+def migrate(conn, name, batch_size=BATCH_SIZE, throttle=0.0, progress=None):
+    """Copy batches until the source is drained; sleeps throttle seconds between batches."""
+    ensure_checkpoints(conn)
+    total = 0
+    while True:
+        copied = migrate_batch(conn, name, batch_size)
+        if not copied:
+            return total
+        total += copied
+        if progress:
+            progress(name, total)
+        if throttle:
+            time.sleep(throttle)
+
+
+def _checksums(conn, table, pk, last_id, partition):
+    with conn.cursor() as cur:
+        cur.execute(_CHECKSUM_SQL.format(partition=partition, table=table, pk=pk), (last_id,))
+        return {priority: (where, count, checksum) for where, priority, count, checksum in cur.fetchall()}
+
+
+def verify(conn, name):
+    """Compare row counts and checksums per target partition for the rows migrated so far."""
+    source, target, pk = MIGRATIONS[name]
+    last_id, _ = checkpoint(conn, name)
+    expected = _checksums(conn, source, pk, last_id, "NULL")
+    actual = _checksums(conn, target, pk, last_id, "tableoid::regclass::text")
+    conn.commit()
+
+    partitions = {}
+    for priority in expected.keys() | actual.keys():
+        _, source_rows, source_sum = expected.get(priority, (None, 0, 0))
+        partition, target_rows, target_sum = actual.get(priority, ("(no rows)", 0, 0))
+        totals = partitions.setdefault(partition, {
+            "partition": partition, "source_rows": 0, "target_rows": 0, "checksums_match": True
+        })
+        totals["source_rows"] += source_rows
+        totals["target_rows"] += target_rows
+        totals["checksums_match"] &= source_sum == target_sum
+    for totals in partitions.values():
+        totals["ok"] = totals["checksums_match"] and totals["source_rows"] == totals["target_rows"]
+    return sorted(partitions.values(), key=lambda totals: totals["partition"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("migrations", nargs="*", metavar="MIGRATION",
+                        help=f"any of {', '.join(MIGRATIONS)} (default: all of them)")
+    parser.add_argument("--dsn", help="libpq DSN of the tables' owner (default: the generator's connection)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--throttle", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--verify-only", action="store_true", help="only compare what was migrated so far")
+    parser.add_argument("--reset", action="store_true", help="drop the checkpoint and empty the target first")
+    args = parser.parse_args()
+    unknown = set(args.migrations) - set(MIGRATIONS)
+    if unknown:
+        parser.error(f"unknown migrations: {', '.join(sorted(unknown))}")
+
+    conn = connect(args.dsn)
+    try:
+        ensure_checkpoints(conn)
+        for name in args.migrations or list(MIGRATIONS):
+            if args.reset:
+                reset(conn, name)
+            if not args.verify_only:
+                copied = migrate(conn, name, args.batch_size, args.throttle,
+                                 progress=lambda name, total: print(f"⏳ {name}: {total:,} rows copied", end="\r"))
+                print(f"✅ {name}: {copied:,} rows copied, checkpoint at id {checkpoint(conn, name)[0]}")
+            for totals in verify(conn, name):
+                status = "✅" if totals["ok"] else "❌"
+                print(f"{status} {totals['partition']}: source {totals['source_rows']:,} rows, "
+                      f"target {totals['target_rows']:,} rows, checksums {'match' if totals['checksums_match'] else 'differ'}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN plan regression harness for the canonical ProjectPulse queries
+
+Generates a fixed, seeded dataset, captures EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+for every query in query_workload.QUERIES and reduces it to a fingerprint: node
+types, relations and indexes, estimated vs actual rows, shared buffer hits/reads.
+Fingerprints are compared with the baselines in tests/plan_baselines.json; a plan
+that stops using an index, touches too many more buffers or misestimates its rows
+by far more than before is a regression.
+
+    python src/scripts/plan_regression.py --dsn ... --update   # record new baselines
+    python src/scripts/plan_regression.py --dsn ...            # check, as the tests do
+"""
+import argparse
+import json
+import os
+import random
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts.bulk_load import connect
+from src.scripts.connection_pool import using_dsn
+from src.scripts.query_workload import QUERIES, draw_params, workload_values
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "tests", "plan_baselines.json")
+
+# Large enough that the planner prefers the quest_3 indexes for selective lookups
+PLAN_DATASET = {
+    "users": 2_000,
+    "sessions": 100,
+    "projects": 5_000,
+    "project_links": 10_000,
+    "documents": 20_000,
+    "decision_logs": 5_000,
+}
+PLAN_SEED = 42
+
+# Fail when buffers touched (hits + reads, so cache warmth does not matter) grow
+# by more than this ratio and by more than this many pages
+BUFFER_GROWTH = 1.0
+BUFFER_SLACK = 50
+
+# Fail when a node's row estimate is off by more than ESTIMATE_ERROR times,
+# and by more than ESTIMATE_GROWTH times its error in the baseline
+ESTIMATE_ERROR = 10.0
+ESTIMATE_GROWTH = 4.0
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def _busiest(table, column, where=""):
+    # Ties go to the lowest value: the first one the seeded generator wrote
+    return f"""
+        SELECT {column} FROM {table} WHERE {column} IS NOT NULL {where}
+        GROUP BY 1 ORDER BY count(*) DESC, 1 LIMIT 1
+    """
+
+
+# Parameters chosen by what the data holds, not by id: ids depend on the sequences'
+# history, and a random one can return no rows, which leaves nothing to estimate
+PLAN_PARAMS = {
+    "documents_by_project": _busiest("documents.documents", "project_id"),
+    "projects_by_owner": _busiest("projects.projects", "owner_id"),
+    "projects_by_phase": _busiest("projects.projects", "phase_id"),
+    "projects_by_priority": _busiest("projects.projects", "priority_id"),
+    "project_summary": "SELECT min(project_id) FROM projects.projects",
+    "tags_by_project": _busiest("projects.project_tag", "project_id"),
+    "projects_by_tag": """
+        SELECT tr.tag FROM projects.project_tag pt JOIN reference.tag_reference tr USING (tag_id)
+        GROUP BY 1 ORDER BY count(*) DESC, 1 LIMIT 1
+    """,
+    "features_by_project": _busiest("projects.project_feature", "project_id"),
+    "tech_stack_by_project": _busiest("projects.project_tech_stack", "project_id"),
+    "decision_log_by_project": _busiest("projects.project_decision_log", "project_id"),
+    "decisions_with_documents": _busiest("projects.project_decision_log", "project_id",
+                                         "AND related_document_id IS NOT NULL"),
+}
+
+
+def prepare_dataset(dsn=None, counts=PLAN_DATASET, seed=PLAN_SEED):
+    argv = ["--fast", "--seed", str(seed)]
+    for stage, count in counts.items():
+        argv += ["--count", f"{stage}={count}"]
+    with using_dsn(dsn):  # load the database analyzed and planned below
+        generator.main(argv)
+    conn = connect(dsn)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")  # plans must not depend on when autovacuum last ran
+    finally:
+        conn.close()
+
+
+def _nodes(plan, depth=0, relation=None):
+    node = {"node": plan["Node Type"], "depth": depth}
+    # Bitmap Index Scans only name the index: take the relation of the heap scan above them
+    relation = plan.get("Relation Name", relation if node["node"] == "Bitmap Index Scan" else None)
+    if relation:
+        node["relation"] = relation
+    if "Index Name" in plan:
+        node["index"] = plan["Index Name"]
+    node["plan_rows"] = plan["Plan Rows"]
+    node["actual_rows"] = plan.get("Actual Rows")
+    yield node
+    for child in plan.get("Plans", []):
+        yield from _nodes(child, depth + 1, relation)
+
+
+def fingerprint(explain):
+    """Reduce EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output to what the baselines compare."""
+    plan = explain[0]["Plan"]
+    return {
+        "nodes": list(_nodes(plan)),
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+    }
+
+
+def capture(conn, sql, params):
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        explain = cur.fetchone()[0]
+    conn.commit()
+    return fingerprint(explain if isinstance(explain, list) else json.loads(explain))
+
+
+def plan_params(conn, name, query, values, rng):
+    """The PLAN_PARAMS choice for a query with one parameter; a seeded draw for queries not listed there."""
+    if name not in PLAN_PARAMS:
+        return draw_params(query, values, rng)
+    with conn.cursor() as cur:
+        cur.execute(PLAN_PARAMS[name])
+        chosen = cur.fetchone()
+    if chosen is None or chosen[0] is None:
+        raise ValueError(f"{name}: no rows to choose parameters from: generate data first")
+    param, = query["params"]
+    return {param: chosen[0]}
+
+
+def capture_all(dsn=None, prepare=True, seed=PLAN_SEED):
+    """Fingerprints for every registered query, with parameters chosen by PLAN_PARAMS."""
+    if prepare:
+        prepare_dataset(dsn, seed=seed)
+    conn = connect(dsn)
+    try:
+        values = {name: sorted(found) for name, found in workload_values(conn).items()}
+        rng = random.Random(seed)
+        plans = {}
+        for name, query in QUERIES.items():
+            plans[name] = capture(conn, query["sql"], plan_params(conn, name, query, values, rng))
+        return plans
+    finally:
+        conn.close()
+
+
+def estimate_error(node):
+    """How many times off the row estimate was, either way; None if the node never ran."""
+    if node.get("actual_rows") is None or node.get("plan_rows") is None:
+        return None
+    # Both are per loop; at least one row, so empty results do not divide by zero
+    planned, actual = max(node["plan_rows"], 1), max(node["actual_rows"], 1)
+    return max(planned / actual, actual / planned)
+
+
+def _index_access(nodes):
+    """relation -> indexes it was read through."""
+    access = {}
+    for node in nodes:
+        if node["node"] in INDEX_SCANS:
+            access.setdefault(node["relation"], set()).add(node["index"])
+    return access
+
+
+def compare(baseline, current, growth=BUFFER_GROWTH, slack=BUFFER_SLACK,
+            estimate_error_limit=ESTIMATE_ERROR, estimate_growth=ESTIMATE_GROWTH):
+    """Regressions of current against baseline, as human-readable messages."""
+    problems = []
+    indexed = _index_access(baseline["nodes"])
+    still_indexed = _index_access(current["nodes"])
+    for node in current["nodes"]:
+        relation = node.get("relation")
+        if node["node"] == "Seq Scan" and relation in indexed and relation not in still_indexed:
+            problems.append(f"{relation}: {', '.join(sorted(indexed[relation]))} index scan flipped to Seq Scan")
+
+    # Estimates are compared node by node while the plan keeps its shape; a new shape is judged above
+    if [node["node"] for node in baseline["nodes"]] == [node["node"] for node in current["nodes"]]:
+        for before, after in zip(baseline["nodes"], current["nodes"]):
+            error_before, error_after = estimate_error(before), estimate_error(after)
+            if error_before is None or error_after is None:
+                continue
+            if error_after > estimate_error_limit and error_after > error_before * estimate_growth:
+                where = f" on {after['relation']}" if after.get("relation") else ""
+                problems.append(
+                    f"{after['node']}{where}: estimated {after['plan_rows']} rows, got {after['actual_rows']} "
+                    f"({error_after:.0f}x off, was {error_before:.1f}x)"
+                )
+
+    buffers_before = baseline["shared_hit"] + baseline["shared_read"]
+    buffers_after = current["shared_hit"] + current["shared_read"]
+    if buffers_after > buffers_before * (1 + growth) and buffers_after - buffers_before > slack:
+        problems.append(f"shared buffers grew from {buffers_before} to {buffers_after}")
+    return problems
+
+
+def load_baselines(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(plans, path=BASELINE_FILE):
+    with open(path, "w") as f:
+        json.dump(plans, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN allowed to ANALYZE (default: the generator's connection)")
+    parser.add_argument("--update", action="store_true", help="record the current plans as the new baselines")
+    parser.add_argument("--no-prepare", action="store_true", help="reuse the data already loaded")
+    args = parser.parse_args()
+
+    plans = capture_all(args.dsn, prepare=not args.no_prepare)
+    if args.update:
+        save_baselines(plans)
+        print(f"💾 {len(plans)} baselines written to {os.path.normpath(BASELINE_FILE)}")
+        return
+
+    baselines = load_baselines()
+    failed = False
+    for name, plan in plans.items():
+        if name not in baselines:
+            print(f"⚠️ {name}: no baseline (run with --update)")
+            continue
+        problems = compare(baselines[name], plan)
+        failed |= bool(problems)
+        print(f"{'❌' if problems else '✅'} {name}" + "".join(f"\n   - {problem}" for problem in problems))
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
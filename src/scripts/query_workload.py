@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Canonical ProjectPulse read queries, shared by the benchmark runner and the plan regression tests
+
+Each query lists the parameters it needs; values are drawn at random from the
+ids and tags present in the database. Queries served by a quest_3 materialized
+view also carry the equivalent matview query.
+"""
+import random
+
+QUERIES = {
+    "documents_by_project": {
+        "sql": """
+            SELECT document_id, filename, uploaded_at FROM documents.documents
+            WHERE project_id = %(project_id)s ORDER BY uploaded_at DESC LIMIT 20
+        """,
+        "params": ("project_id",),
+        "matview": """
+            SELECT document_id, filename, uploaded_at FROM documents.matview_document_metadata
+            WHERE project_id = %(project_id)s ORDER BY uploaded_at DESC LIMIT 20
+        """,
+    },
+    "projects_by_owner": {
+        "sql": "SELECT project_id, title, updated_at FROM projects.projects WHERE owner_id = %(owner_id)s",
+        "params": ("owner_id",),
+    },
+    "projects_by_phase": {
+        "sql": """
+            SELECT project_id, title, created_at FROM projects.projects
+            WHERE phase_id = %(phase_id)s ORDER BY created_at DESC LIMIT 50
+        """,
+        "params": ("phase_id",),
+    },
+    "projects_by_priority": {
+        "sql": """
+            SELECT project_id, title, created_at FROM projects.projects
+            WHERE priority_id = %(priority_id)s ORDER BY created_at DESC LIMIT 50
+        """,
+        "params": ("priority_id",),
+    },
+    "project_summary": {
+        "sql": """
+            SELECT p.project_id, p.title, u.login, pr.priority_name, ph.phase_name, lr.license_name
+            FROM projects.projects p
+            LEFT JOIN users.users u ON p.owner_id = u.user_id
+            LEFT JOIN reference.priority_reference pr ON p.priority_id = pr.priority_id
+            LEFT JOIN reference.phase_reference ph ON p.phase_id = ph.phase_id
+            LEFT JOIN reference.license_reference lr ON p.license_id = lr.license_id
+            WHERE p.project_id = %(project_id)s
+        """,
+        "params": ("project_id",),
+        "matview": """
+            SELECT project_id, title, owner_login, priority_name, phase_name, license_name
+            FROM projects.matview_project_summary WHERE project_id = %(project_id)s
+        """,
+    },
+    "tags_by_project": {
+        "sql": """
+            SELECT tr.tag, tr.category FROM projects.project_tag pt
+            JOIN reference.tag_reference tr ON pt.tag_id = tr.tag_id
+            WHERE pt.project_id = %(project_id)s
+        """,
+        "params": ("project_id",),
+        "matview": "SELECT tag, category FROM projects.matview_project_tags WHERE project_id = %(project_id)s",
+    },
+    "projects_by_tag": {
+        "sql": """
+            SELECT pt.project_id FROM projects.project_tag pt
+            JOIN reference.tag_reference tr ON pt.tag_id = tr.tag_id
+            WHERE tr.tag = %(tag)s
+        """,
+        "params": ("tag",),
+        "matview": "SELECT project_id FROM projects.matview_project_tags WHERE tag = %(tag)s",
+    },
+    "features_by_project": {
+        "sql": """
+            SELECT fr.feature FROM projects.project_feature pf
+            JOIN reference.feature_reference fr ON pf.feature_id = fr.feature_id
+            WHERE pf.project_id = %(project_id)s
+        """,
+        "params": ("project_id",),
+        "matview": "SELECT feature FROM projects.matview_project_feature_matrix WHERE project_id = %(project_id)s",
+    },
+    "tech_stack_by_project": {
+        "sql": """
+            SELECT ts.technology FROM projects.project_tech_stack pts
+            JOIN reference.tech_stack_reference ts ON pts.tech_id = ts.tech_id
+            WHERE pts.project_id = %(project_id)s
+        """,
+        "params": ("project_id",),
+        "matview": "SELECT technology FROM projects.matview_project_tech_stack WHERE project_id = %(project_id)s",
+    },
+    "decision_log_by_project": {
+        "sql": """
+            SELECT dl.decision_id, dl.decided_at, u.login, dt.type_name, dl.summary
+            FROM projects.project_decision_log dl
+            JOIN users.users u ON dl.decided_by = u.user_id
+            JOIN reference.decision_type_reference dt ON dl.type_id = dt.type_id
+            WHERE dl.project_id = %(project_id)s
+            ORDER BY dl.decided_at DESC LIMIT 20
+        """,
+        "params": ("project_id",),
+    },
+    "decisions_with_documents": {
+        "sql": """
+            SELECT dl.decision_id, p.title, d.filename, dl.decided_at
+            FROM projects.project_decision_log dl
+            JOIN projects.projects p ON dl.project_id = p.project_id
+            JOIN documents.documents d ON dl.related_document_id = d.document_id
+            WHERE dl.project_id = %(project_id)s
+        """,
+        "params": ("project_id",),
+    },
+}
+
+# Parameter name -> query returning the values it is drawn from
+_VALUES_SQL = {
+    "project_id": "SELECT project_id FROM projects.projects",
+    "owner_id": "SELECT DISTINCT owner_id FROM projects.projects WHERE owner_id IS NOT NULL",
+    "phase_id": "SELECT phase_id FROM reference.phase_reference",
+    "priority_id": "SELECT priority_id FROM reference.priority_reference",
+    "tag": "SELECT tag FROM reference.tag_reference",
+}
+
+
+def workload_values(conn, names=None):
+    """Candidate values for every query parameter (or just names)."""
+    values = {}
+    with conn.cursor() as cur:
+        for name in names or _VALUES_SQL:
+            cur.execute(_VALUES_SQL[name])
+            values[name] = [value for value, in cur.fetchall()]
+            if not values[name]:
+                raise ValueError(f"No {name} values to draw from: generate data first")
+    conn.commit()
+    return values
+
+
+def draw_params(query, values, rng=random):
+    return {name: rng.choice(values[name]) for name in query["params"]}
+
+
+def variants(names=None, matviews=False):
+    """(label, sql, params) for the selected queries, plus their matview twins if asked."""
+    for name in names or QUERIES:
+        query = QUERIES[name]
+        yield name, query["sql"], query
+        if matviews and "matview" in query:
+            yield f"{name} [matview]", query["matview"], query
@@ -2,23 +2,118 @@
 """
 Fake data generator for projectpulse database — normalized
 """
+import argparse
+import importlib
 import json
+import os
+from array import array
 from faker import Faker
-import psycopg2
-import psycopg2.extras
 from datetime import datetime, timedelta
+from itertools import islice
 import random
 import uuid
 
+from src.scripts import connection_pool
+from src.scripts.copy_loader import COPY_TEXT, LOAD_METHODS, load_rows
+from src.scripts.distributions import NO_VALUE, UNIFORM, as_sampler, is_follow, parse_spec, sampler
+from src.scripts.id_registry import IdRegistry
+from src.scripts.load_report import LoadReport
+from src.scripts.value_pools import ValuePools, batch_sizes
+
 fake = Faker(['en_US'])
+pools = ValuePools(fake)
+registry = IdRegistry()
+
+USER_COLUMNS = ("login", "password_hash")
+SESSION_COLUMNS = (
+    "session_id", "user_id", "created_at", "last_active_at", "expires_at",
+    "ip_address", "user_agent", "revoked_at", "metadata"
+)
+PROJECT_COLUMNS = (
+    "title", "description", "endpoints", "settings", "owner_id", "image_url",
+    "phase_id", "version", "license_id", "priority_id",
+    "created_at", "updated_at", "updated_by", "deleted_at"
+)
+DOCUMENT_COLUMNS = (
+    "project_id", "filename", "uploaded_at", "filetype_id", "uploaded_by",
+    "storage_id", "image_url", "version", "priority_id", "phase_id",
+    "description", "checksum", "custom_properties", "deleted_at"
+)
+DECISION_LOG_COLUMNS = (
+    "project_id", "decided_at", "decided_by", "type_id",
+    "summary", "rationale", "impact",
+    "related_feature_id", "related_document_id"
+)
+
+# Rows per COPY/INSERT batch; each chunk is committed on its own
+CHUNK_SIZE = 10_000
+
+# Sessions' created_at is spread over the last N days
+SESSION_WINDOW_DAYS = 30
+
+# Row counts used by main(), keyed by generator stage
+DEFAULT_COUNTS = {
+    "users": 10,
+    "sessions": 20,
+    "projects": 30,
+    "project_links": 50,
+    "documents": 50,
+    "decision_logs": 30,
+}
+
+# Rows per stage at --scale-factor 1, in production-like ratios: 5 sessions per
+# user, one project per 5 users, 3 links of each kind, 50 documents and 5 decisions per project
+SCALE_FACTOR_COUNTS = {
+    "users": 10_000,
+    "sessions": 50_000,
+    "projects": 2_000,
+    "project_links": 6_000,
+    "documents": 100_000,
+    "decision_logs": 10_000,
+}
+
+# Columns --skew can shape, per stage (see src/scripts/distributions.py)
+SKEWABLE = {
+    "sessions": ("user_id",),
+    "projects": ("owner_id", "updated_by", "phase_id", "license_id", "priority_id"),
+    "project_links": ("project_id",),
+    "documents": ("project_id", "filetype_id", "storage_id", "priority_id", "phase_id"),
+    "decision_logs": ("project_id", "decided_by", "type_id"),
+}
+
+# Document columns that can follow:P the same column of their project
+FOLLOWABLE = ("documents.phase_id", "documents.priority_id")
+
+# --skew-profile presets; ids are ranked in ascending order, so the oldest rows are the hot ones
+SKEW_PROFILES = {
+    "uniform": {},
+    "production": {
+        "sessions.user_id": "zipf:1.1",
+        "projects.owner_id": "zipf:1.2",              # hot owners
+        "projects.updated_by": "zipf:1.2",
+        "projects.phase_id": "weights:15,50,25,10",    # mostly in development
+        "projects.priority_id": "weights:70,25,5",     # one LIST partition takes most rows
+        "project_links.project_id": "zipf:1.0",
+        "documents.project_id": "pareto:1.16",        # over 70% of documents in 20% of projects
+        "documents.phase_id": "follow:0.9",           # correlated with the project's phase
+        "documents.priority_id": "follow:0.8",
+        "decision_logs.project_id": "pareto:1.16",
+        "decision_logs.decided_by": "zipf:1.2",
+    },
+}
+
+def _late_import(name):
+    # The engines and the snapshot cache import this module: load them on first use to keep the cycle open
+    return importlib.import_module(f"src.scripts.{name}")
 
 def get_connection():
-    return psycopg2.connect(
-        dbname='projectpulse',
-        user='nobody',
-        password='secure123',
-        host='localhost'
-    )
+    # PROJECTPULSE_DSN / PROJECTPULSE_SESSION_SETTINGS configure it; close() returns it to the pool
+    return connection_pool.connect()
+
+def seed_generators(seed):
+    random.seed(seed)
+    fake.seed_instance(seed)
+    pools.reset()
 
 def truncate_all_tables(conn):
     cur = conn.cursor()
@@ -42,36 +137,112 @@ def truncate_all_tables(conn):
     """)
     conn.commit()
     cur.close()
+    registry.clear()
+
+def load_in_chunks(conn, table, columns, rows, chunk_size=CHUNK_SIZE, method=COPY_TEXT):
+    """Flush a lazy row iterator chunk by chunk, committing after each one."""
+    rows = iter(rows)
+    total = 0
+    with conn.cursor() as cur:
+        while True:
+            loaded = load_rows(cur, table, columns, islice(rows, chunk_size), method)
+            if not loaded:
+                break
+            conn.commit()
+            total += loaded
+    conn.commit()  # the final, empty COPY still opened a transaction
+    return total
+
+
+def load_streams(conn, streams, chunk_size=CHUNK_SIZE, method=COPY_TEXT):
+    """Load each (table, columns, rows) stream of a stage in turn, registering its reserved ids once loaded."""
+    total = 0
+    for table, columns, rows in streams:
+        try:
+            total += load_in_chunks(conn, table, columns, rows, chunk_size, method)
+        except BaseException:
+            registry.discard(table)
+            raise
+        registry.confirm(table)
+    return total
+
+
+def with_ids(ids, rows):
+    return ((row_id,) + row for row_id, row in zip(ids, rows))
+
+
+def column_samplers(skew, populations, parent_values=None):
+    """One sampler per column: its --skew distribution, uniform by default."""
+    skew = skew or {}
+    parent_values = parent_values or {}
+    return {
+        column: sampler(population, skew.get(column), parent_values.get(column))
+        for column, population in populations.items()
+    }
+
+
+def project_values(conn, projects, columns):
+    """Each project's value of columns, indexed like the registry's ascending project ids.
+
+    Rows stream through a server-side cursor straight into the arrays, CHUNK_SIZE at a time;
+    NULLs (rows written outside the generator) become NO_VALUE, which follow: never copies.
+    """
+    values = {column: array("q") for column in columns}
+    targets = [values[column].append for column in columns]
+    with conn.cursor(name="project_values") as cur:
+        cur.itersize = CHUNK_SIZE
+        cur.execute(f"SELECT {', '.join(columns)} FROM projects.projects ORDER BY project_id")
+        for row in cur:
+            for append, value in zip(targets, row):
+                append(NO_VALUE if value is None else value)
+    if any(len(column_values) != len(projects) for column_values in values.values()):
+        raise RuntimeError("projects.projects no longer matches the registered project ids")
+    return values
+
 
 # USERS
-def generate_users(conn, count=10):
-    cur = conn.cursor()
-    data = [(fake.email(), fake.sha256()) for _ in range(count)]
-    psycopg2.extras.execute_values(
-        cur,
-        "INSERT INTO users.users (login, password_hash) VALUES %s",
-        data
-    )
-    conn.commit()
-    cur.close()
+def user_rows(count):
+    # fake.email() repeats within a few thousand users: the unique key keeps logins UNIQUE, as in fast_user_rows
+    for n in batch_sizes(count):
+        for key in pools.unique_keys(n):
+            name, _, domain = fake.email().partition("@")
+            yield (f"{name}.{key}@{domain}", fake.sha256())
 
 
-def generate_sessions(conn, count=20):
-    cur = conn.cursor()
-    cur.execute("SELECT user_id FROM users.users")
-    user_ids = [r[0] for r in cur.fetchall()]
+def fast_user_rows(count):
+    for n in batch_sizes(count):
+        logins = (
+            f"{name}.{key}@{domain}".lower()
+            for name, key, domain in zip(
+                pools.sample("user_name", n), pools.unique_keys(n), pools.sample("free_email_domain", n)
+            )
+        )
+        yield from zip(logins, pools.sample("sha256", n))
 
-    data = []
+
+def user_streams(conn, count=10, fast=False, ids=None):
+    if ids is None:
+        ids = registry.reserve(conn, "users.users", "user_id", count)
+    rows = with_ids(ids, fast_user_rows(count) if fast else user_rows(count))
+    return [("users.users", ("user_id",) + USER_COLUMNS, rows)]
+
+
+def generate_users(conn, count=10, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, ids=None):
+    return load_streams(conn, user_streams(conn, count, fast, ids), chunk_size, method)
+
+
+def session_rows(count, user_ids, window_days=SESSION_WINDOW_DAYS):
+    users = as_sampler(user_ids)
     for _ in range(count):
-        uid = random.choice(user_ids)
-        created = fake.date_time_between(start_date='-30d')
+        uid = users.choice()
+        created = fake.date_time_between(start_date=f'-{window_days}d')
         metadata = {
             "browser": fake.chrome(),
             "device": random.choice(["Desktop", "Mobile", "Tablet"]),
             "location": fake.city()
         }
-        data.append((
-            str(uuid.uuid4()),                      # session_id
+        yield (
+            str(uuid.UUID(int=random.getrandbits(128), version=4)),  # session_id (seedable)
             uid,                                    # user_id
             created,                                # created_at
             created + timedelta(hours=random.randint(1, 48)),  # last_active_at
@@ -80,22 +251,50 @@ def generate_sessions(conn, count=20):
             fake.user_agent(),                      # user_agent
             None,                                   # revoked_at
             json.dumps(metadata)                    # metadata as JSON
-        ))
-
-    psycopg2.extras.execute_values(
-        cur,
-        """INSERT INTO users.sessions (
-            session_id, user_id, created_at, last_active_at, expires_at,
-            ip_address, user_agent, revoked_at, metadata
-        ) VALUES %s""",
-        data
-    )
-    conn.commit()
-    cur.close()
+        )
+
+
+def fast_session_rows(count, user_ids, window_days=SESSION_WINDOW_DAYS):
+    users = as_sampler(user_ids)
+    now = datetime.now()
+    window = timedelta(days=window_days).total_seconds()
+    for n in batch_sizes(count):
+        batch = zip(
+            users.choices(n),
+            pools.sample_json("chrome", n),
+            random.choices(['"Desktop"', '"Mobile"', '"Tablet"'], k=n),
+            pools.sample_json("city", n),
+            pools.sample("ipv4", n),
+            pools.sample("user_agent", n),
+        )
+        for uid, browser, device, city, ip, agent in batch:
+            created = now - timedelta(seconds=random.random() * window)
+            yield (
+                str(uuid.UUID(int=random.getrandbits(128), version=4)),
+                uid,
+                created,
+                created + timedelta(hours=1 + int(random.random() * 48)),
+                created + timedelta(days=30),
+                ip,
+                agent,
+                None,
+                f'{{"browser": {browser}, "device": {device}, "location": {city}}}'
+            )
+
+
+def session_streams(conn, count=20, fast=False, window_days=SESSION_WINDOW_DAYS, skew=None):
+    pick = column_samplers(skew, {"user_id": registry.ids(conn, "users.users", "user_id")})
+    row_builder = fast_session_rows if fast else session_rows
+    return [("users.sessions", SESSION_COLUMNS, row_builder(count, pick["user_id"], window_days))]
+
+
+def generate_sessions(conn, count=20, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False,
+                      window_days=SESSION_WINDOW_DAYS, skew=None):
+    return load_streams(conn, session_streams(conn, count, fast, window_days, skew), chunk_size, method)
 
 
 # REFERENCE
-def generate_reference_tables(conn):
+def generate_reference_tables(conn, method=COPY_TEXT):
     cur = conn.cursor()
 
     techs = ['Python', 'Docker', 'PostgreSQL', 'React', 'Node.js']
@@ -109,141 +308,169 @@ def generate_reference_tables(conn):
     storages = [('AWS', 'us-east-1', '30d'), ('GCP', 'europe-west1', '90d')]
     priorities = ['Low', 'Medium', 'High']
 
-    cur.executemany("INSERT INTO reference.tech_stack_reference (technology) VALUES (%s)", [(t,) for t in techs])
-    cur.executemany("INSERT INTO reference.feature_reference (feature) VALUES (%s)", [(f,) for f in features])
-    cur.executemany("INSERT INTO reference.access_role_reference (role, capabilities) VALUES (%s, %s)", roles)
-    cur.executemany("INSERT INTO reference.license_reference (license_name, description) VALUES (%s, %s)", licenses)
-    cur.executemany("INSERT INTO reference.phase_reference (phase_name, description) VALUES (%s, %s)", phases)
-    cur.executemany("INSERT INTO reference.decision_type_reference (type_name) VALUES (%s)", [(d,) for d in decisions])
-    cur.executemany("INSERT INTO reference.tag_reference (tag, category) VALUES (%s, %s)", tags)
-    cur.executemany("INSERT INTO reference.filetype_reference (extension, mime_type, description) VALUES (%s, %s, %s)", filetypes)
-    cur.executemany("INSERT INTO reference.storage_reference (provider, location, retention_policy) VALUES (%s, %s, %s)", storages)
-    cur.executemany("INSERT INTO reference.priority_reference (priority_name) VALUES (%s)", [(p,) for p in priorities])
+    load_rows(cur, "reference.tech_stack_reference", ("technology",), [(t,) for t in techs], method)
+    load_rows(cur, "reference.feature_reference", ("feature",), [(f,) for f in features], method)
+    load_rows(cur, "reference.access_role_reference", ("role", "capabilities"), roles, method)
+    load_rows(cur, "reference.license_reference", ("license_name", "description"), licenses, method)
+    load_rows(cur, "reference.phase_reference", ("phase_name", "description"), phases, method)
+    load_rows(cur, "reference.decision_type_reference", ("type_name",), [(d,) for d in decisions], method)
+    load_rows(cur, "reference.tag_reference", ("tag", "category"), tags, method)
+    load_rows(cur, "reference.filetype_reference", ("extension", "mime_type", "description"), filetypes, method)
+    load_rows(cur, "reference.storage_reference", ("provider", "location", "retention_policy"), storages, method)
+    load_rows(cur, "reference.priority_reference", ("priority_name",), [(p,) for p in priorities], method)
 
     conn.commit()
     cur.close()
+    registry.forget_schema("reference")
+    return sum(len(rows) for rows in (techs, features, roles, licenses, phases, decisions, tags, filetypes,
+                                      storages, priorities))
 
 # PROJECTS
 
-def generate_projects(conn, count=30):
-    cur = conn.cursor()
-    cur.execute("SELECT user_id FROM users.users")
-    users = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT phase_id FROM reference.phase_reference")
-    phases = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT license_id FROM reference.license_reference")
-    licenses = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT priority_id FROM reference.priority_reference")
-    priorities = [r[0] for r in cur.fetchall()]
-
-    data = []
+def project_rows(count, users, phases, licenses, priorities, updaters=None):
+    users, phases, licenses, priorities = map(as_sampler, (users, phases, licenses, priorities))
+    updaters = as_sampler(updaters) if updaters is not None else users
     for _ in range(count):
-        data.append((
+        yield (
             fake.catch_phrase(),                              # title
             fake.text(100),                                   # description
             json.dumps({"api": fake.url()}),                  # endpoints (JSONB)
             json.dumps({"setting": fake.word()}),             # settings (JSONB)
-            random.choice(users),                             # owner_id
+            users.choice(),                                   # owner_id
             fake.image_url(),                                 # image_url
-            random.choice(phases),                            # phase_id
+            phases.choice(),                                  # phase_id
             0.1,                                               # version
-            random.choice(licenses),                          # license_id
-            random.choice(priorities),                        # priority_id
+            licenses.choice(),                                # license_id
+            priorities.choice(),                              # priority_id
             datetime.now(),                                   # created_at
             datetime.now(),                                   # updated_at
-            random.choice(users),                             # updated_by
+            updaters.choice(),                                # updated_by
             None                                              # deleted_at
-        ))
-
-    psycopg2.extras.execute_values(
-        cur,
-        """INSERT INTO projects.projects (
-            title, description, endpoints, settings, owner_id, image_url,
-            phase_id, version, license_id, priority_id,
-            created_at, updated_at, updated_by, deleted_at
-        ) VALUES %s""",
-        data
-    )
-    conn.commit()
-    cur.close()
+        )
+
+
+def fast_project_rows(count, users, phases, licenses, priorities, updaters=None):
+    users, phases, licenses, priorities = map(as_sampler, (users, phases, licenses, priorities))
+    updaters = as_sampler(updaters) if updaters is not None else users
+    for n in batch_sizes(count):
+        now = datetime.now()
+        batch = zip(
+            pools.sample("catch_phrase", n),
+            pools.sample("text_100", n),
+            pools.sample_json("url", n),
+            pools.sample_json("word", n),
+            users.choices(n),
+            pools.sample("image_url", n),
+            phases.choices(n),
+            licenses.choices(n),
+            priorities.choices(n),
+            updaters.choices(n),
+        )
+        for title, description, url, word, owner, image, phase, license_id, priority, updated_by in batch:
+            yield (
+                title, description, f'{{"api": {url}}}', f'{{"setting": {word}}}', owner, image,
+                phase, 0.1, license_id, priority, now, now, updated_by, None
+            )
+
+
+def project_streams(conn, count=30, fast=False, ids=None, skew=None):
+    users = registry.ids(conn, "users.users", "user_id")
+    pick = column_samplers(skew, {
+        "owner_id": users,
+        "updated_by": users,
+        "phase_id": registry.ids(conn, "reference.phase_reference", "phase_id"),
+        "license_id": registry.ids(conn, "reference.license_reference", "license_id"),
+        "priority_id": registry.ids(conn, "reference.priority_reference", "priority_id"),
+    })
+
+    if ids is None:
+        ids = registry.reserve(conn, "projects.projects", "project_id", count)
+
+    row_builder = fast_project_rows if fast else project_rows
+    rows = with_ids(ids, row_builder(count, pick["owner_id"], pick["phase_id"], pick["license_id"],
+                                     pick["priority_id"], pick["updated_by"]))
+    return [("projects.projects", ("project_id",) + PROJECT_COLUMNS, rows)]
+
+
+def generate_projects(conn, count=30, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, ids=None, skew=None):
+    return load_streams(conn, project_streams(conn, count, fast, ids, skew), chunk_size, method)
+
+def link_rows(count, projects, targets):
+    projects = as_sampler(projects)
+    for _ in range(count):
+        yield (projects.choice(), random.choice(targets))
 
-def generate_project_links(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT project_id FROM projects.projects")
-    projects = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT feature_id FROM reference.feature_reference")
-    features = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT tech_id FROM reference.tech_stack_reference")
-    techs = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT tag_id FROM reference.tag_reference")
-    tags = [r[0] for r in cur.fetchall()]
-
-    pf = [(random.choice(projects), random.choice(features)) for _ in range(50)]
-    pt = [(random.choice(projects), random.choice(techs)) for _ in range(50)]
-    pg = [(random.choice(projects), random.choice(tags)) for _ in range(50)]
-
-    psycopg2.extras.execute_values(
-        cur, "INSERT INTO projects.project_feature (project_id, feature_id) VALUES %s", pf
-    )
-    psycopg2.extras.execute_values(
-        cur, "INSERT INTO projects.project_tech_stack (project_id, tech_id) VALUES %s", pt
-    )
-    psycopg2.extras.execute_values(
-        cur, "INSERT INTO projects.project_tag (project_id, tag_id) VALUES %s", pg
-    )
 
-    conn.commit()
-    cur.close()
+def fast_link_rows(count, projects, targets):
+    projects = as_sampler(projects)
+    for n in batch_sizes(count):
+        yield from zip(projects.choices(n), random.choices(targets, k=n))
 
-def generate_decision_logs(conn, count=30):
-    cur = conn.cursor()
-    cur.execute("SELECT project_id FROM projects.projects")
-    projects = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT user_id FROM users.users")
-    users = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT type_id FROM reference.decision_type_reference")
-    types = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT feature_id FROM reference.feature_reference")
-    features = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT document_id FROM documents.documents")
-    docs = [r[0] for r in cur.fetchall()]
-
-    data = []
+
+def project_link_streams(conn, count=50, fast=False, skew=None):
+    pick = column_samplers(skew, {"project_id": registry.ids(conn, "projects.projects", "project_id")})
+    projects = pick["project_id"]
+    features = registry.ids(conn, "reference.feature_reference", "feature_id")
+    techs = registry.ids(conn, "reference.tech_stack_reference", "tech_id")
+    tags = registry.ids(conn, "reference.tag_reference", "tag_id")
+
+    row_builder = fast_link_rows if fast else link_rows
+    return [
+        ("projects.project_feature", ("project_id", "feature_id"), row_builder(count, projects, features)),
+        ("projects.project_tech_stack", ("project_id", "tech_id"), row_builder(count, projects, techs)),
+        ("projects.project_tag", ("project_id", "tag_id"), row_builder(count, projects, tags)),
+    ]
+
+
+def generate_project_links(conn, count=50, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, skew=None):
+    return load_streams(conn, project_link_streams(conn, count, fast, skew), chunk_size, method)
+
+def decision_log_rows(count, projects, users, types, features, docs):
+    projects, users, types = map(as_sampler, (projects, users, types))
     for _ in range(count):
-        data.append((
-            random.choice(projects), datetime.now(), random.choice(users),
-            random.choice(types), fake.sentence(), fake.text(50), fake.text(50),
+        yield (
+            projects.choice(), datetime.now(), users.choice(),
+            types.choice(), fake.sentence(), fake.text(50), fake.text(50),
             random.choice(features), random.choice(docs)
-        ))
-    psycopg2.extras.execute_values(
-        cur,
-        """INSERT INTO projects.project_decision_log (
-            project_id, decided_at, decided_by, type_id,
-            summary, rationale, impact,
-            related_feature_id, related_document_id
-        ) VALUES %s""",
-        data
-    )
-    conn.commit()
-    cur.close()
+        )
+
+
+def fast_decision_log_rows(count, projects, users, types, features, docs):
+    projects, users, types = map(as_sampler, (projects, users, types))
+    for n in batch_sizes(count):
+        now = datetime.now()
+        yield from zip(
+            projects.choices(n), [now] * n, users.choices(n),
+            types.choices(n), pools.sample("sentence", n),
+            pools.sample("text_50", n), pools.sample("text_50", n),
+            random.choices(features, k=n), random.choices(docs, k=n)
+        )
+
+
+def decision_log_streams(conn, count=30, fast=False, skew=None):
+    pick = column_samplers(skew, {
+        "project_id": registry.ids(conn, "projects.projects", "project_id"),
+        "decided_by": registry.ids(conn, "users.users", "user_id"),
+        "type_id": registry.ids(conn, "reference.decision_type_reference", "type_id"),
+    })
+    features = registry.ids(conn, "reference.feature_reference", "feature_id")
+    docs = registry.ids(conn, "documents.documents", "document_id")
+
+    row_builder = fast_decision_log_rows if fast else decision_log_rows
+    rows = row_builder(count, pick["project_id"], pick["decided_by"], pick["type_id"], features, docs)
+    return [("projects.project_decision_log", DECISION_LOG_COLUMNS, rows)]
+
+
+def generate_decision_logs(conn, count=30, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, skew=None):
+    return load_streams(conn, decision_log_streams(conn, count, fast, skew), chunk_size, method)
 
 # DOCUMENTS
 import json
 
-def generate_documents(conn, count=50):
-    cur = conn.cursor()
-    cur.execute("SELECT project_id FROM projects.projects")
-    projects = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT filetype_id FROM reference.filetype_reference")
-    filetypes = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT storage_id FROM reference.storage_reference")
-    storages = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT priority_id FROM reference.priority_reference")
-    priorities = [r[0] for r in cur.fetchall()]
-    cur.execute("SELECT phase_id FROM reference.phase_reference")
-    phases = [r[0] for r in cur.fetchall()]
-
-    data = []
+def document_rows(count, projects, filetypes, storages, priorities, phases):
+    projects, filetypes, storages, priorities, phases = map(
+        as_sampler, (projects, filetypes, storages, priorities, phases)
+    )
     for _ in range(count):
         custom_props = {
             "reviewed": random.choice([True, False]),
@@ -251,52 +478,305 @@ def generate_documents(conn, count=50):
             "source": random.choice(["internal", "external"]),
             "format": random.choice(["pdf", "docx", "txt"])
         }
+        project = projects.position()                     # follow:P columns copy this project's values
 
-        data.append((
-            random.choice(projects),                      # project_id
+        yield (
+            projects.population[project],                 # project_id
             fake.file_name(),                             # filename
             datetime.now(),                               # uploaded_at
-            random.choice(filetypes),                     # filetype_id
+            filetypes.choice(),                           # filetype_id
             fake.name(),                                  # uploaded_by
-            random.choice(storages),                      # storage_id
+            storages.choice(),                            # storage_id
             fake.image_url(),                             # image_url
             0.1,                                           # version
-            random.choice(priorities),                    # priority_id
-            random.choice(phases),                        # phase_id
+            priorities.choice_for(project),               # priority_id
+            phases.choice_for(project),                   # phase_id
             fake.text(100),                               # description
             fake.sha1(),                                  # checksum
             json.dumps(custom_props),                     # ✅ custom_properties as JSON
             None                                           # deleted_at
-        ))
-
-    psycopg2.extras.execute_values(
-        cur,
-        """INSERT INTO documents.documents (
-            project_id, filename, uploaded_at, filetype_id, uploaded_by,
-            storage_id, image_url, version, priority_id, phase_id,
-            description, checksum, custom_properties, deleted_at
-        ) VALUES %s""",
-        data
+        )
+
+
+def fast_document_rows(count, projects, filetypes, storages, priorities, phases):
+    projects, filetypes, storages, priorities, phases = map(
+        as_sampler, (projects, filetypes, storages, priorities, phases)
     )
-    conn.commit()
-    cur.close()
+    for n in batch_sizes(count):
+        now = datetime.now()
+        positions = projects.positions(n)
+        batch = zip(
+            [projects.population[position] for position in positions],
+            pools.sample("file_name", n),
+            filetypes.choices(n),
+            pools.sample("name", n),
+            storages.choices(n),
+            pools.sample("image_url", n),
+            priorities.choices_for(positions),
+            phases.choices_for(positions),
+            pools.sample("text_100", n),
+            pools.unique_sha1(n),                         # checksum is UNIQUE: never pooled
+            random.choices(["true", "false"], k=n),
+            pools.sample_json("word", n),
+            pools.sample_json("word", n),
+            random.choices(['"internal"', '"external"'], k=n),
+            random.choices(['"pdf"', '"docx"', '"txt"'], k=n),
+        )
+        for (project, filename, filetype, uploader, storage, image, priority, phase,
+             description, checksum, reviewed, tag1, tag2, source, fmt) in batch:
+            custom_props = (
+                f'{{"reviewed": {reviewed}, "tags": [{tag1}, {tag2}], '
+                f'"source": {source}, "format": {fmt}}}'
+            )
+            yield (
+                project, filename, now, filetype, uploader, storage, image, 0.1,
+                priority, phase, description, checksum, custom_props, None
+            )
+
+
+def document_streams(conn, count=50, fast=False, ids=None, skew=None):
+    projects = registry.ids(conn, "projects.projects", "project_id")
+    followed = [column for column, spec in (skew or {}).items() if is_follow(spec)]
+    pick = column_samplers(skew, {
+        "project_id": projects,
+        "filetype_id": registry.ids(conn, "reference.filetype_reference", "filetype_id"),
+        "storage_id": registry.ids(conn, "reference.storage_reference", "storage_id"),
+        "priority_id": registry.ids(conn, "reference.priority_reference", "priority_id"),
+        "phase_id": registry.ids(conn, "reference.phase_reference", "phase_id"),
+    }, project_values(conn, projects, followed) if followed else None)
+
+    if ids is None:
+        ids = registry.reserve(conn, "documents.documents", "document_id", count)
+
+    row_builder = fast_document_rows if fast else document_rows
+    rows = with_ids(ids, row_builder(count, pick["project_id"], pick["filetype_id"], pick["storage_id"],
+                                     pick["priority_id"], pick["phase_id"]))
+    return [("documents.documents", ("document_id",) + DOCUMENT_COLUMNS, rows)]
+
+
+def generate_documents(conn, count=50, method=COPY_TEXT, chunk_size=CHUNK_SIZE, fast=False, ids=None, skew=None):
+    return load_streams(conn, document_streams(conn, count, fast, ids, skew), chunk_size, method)
+
+
+GENERATORS = {
+    "users": generate_users,
+    "sessions": generate_sessions,
+    "projects": generate_projects,
+    "project_links": generate_project_links,
+    "documents": generate_documents,
+    "decision_logs": generate_decision_logs,
+}
+
+# The same stages as (table, columns, rows) streams, for engines that schedule the writes themselves
+STREAMS = {
+    "users": user_streams,
+    "sessions": session_streams,
+    "projects": project_streams,
+    "project_links": project_link_streams,
+    "documents": document_streams,
+    "decision_logs": decision_log_streams,
+}
+
+
+def stage_options(stage, session_window=SESSION_WINDOW_DAYS, skew=None):
+    """Keyword arguments only some stages take, shared by both generator families.
+
+    Server-side generators take no skew: keep their stages out of it.
+    """
+    options = {"window_days": session_window} if stage == "sessions" else {}
+    columns = {
+        column.partition(".")[2]: spec for column, spec in (skew or {}).items() if column.partition(".")[0] == stage
+    }
+    if columns:
+        options["skew"] = columns
+    return options
+
+
+def scaled_counts(scale_factor):
+    return {stage: max(1, round(count * scale_factor)) for stage, count in SCALE_FACTOR_COUNTS.items()}
+
+
+def run_stage(conn, stage, count, args):
+    options = stage_options(stage, args.session_window, args.skew)
+    if stage in args.server_side:
+        return _late_import("server_side_generate").SERVER_GENERATORS[stage](conn, count, **options)
+    return GENERATORS[stage](
+        conn, count=count, method=args.method, chunk_size=args.chunk_size, fast=args.fast, **options
+    )
+
 
+def stage_count(value):
+    stage, _, count = value.partition("=")
+    if stage not in DEFAULT_COUNTS or not count.isdigit():
+        raise argparse.ArgumentTypeError(f"expected STAGE=N with STAGE in {', '.join(DEFAULT_COUNTS)}")
+    return stage, int(count)
 
-def main():
+
+def skew_spec(value):
+    column, _, spec = value.partition("=")
+    stage, _, name = column.partition(".")
+    if name not in SKEWABLE.get(stage, ()):
+        columns = ", ".join(f"{stage}.{name}" for stage, names in SKEWABLE.items() for name in names)
+        raise argparse.ArgumentTypeError(f"expected STAGE.COLUMN=SPEC with STAGE.COLUMN in {columns}")
+    try:
+        parse_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    if is_follow(spec) and column not in FOLLOWABLE:
+        raise argparse.ArgumentTypeError(f"only {', '.join(FOLLOWABLE)} can follow their project")
+    return column, spec
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake data generator for projectpulse")
+    parser.add_argument(
+        "--method", choices=LOAD_METHODS, default=COPY_TEXT,
+        help="bulk load path: COPY text (default), COPY binary, or multi-row INSERT fallback"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_SIZE,
+        help="rows generated, flushed and committed per batch"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="processes sharing each table's rows; tables still load in FK order"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="global seed; the same --seed and --workers reproduce the same rows"
+    )
+    parser.add_argument(
+        "--fast", action="store_true",
+        help="sample pooled Faker values instead of calling Faker per row (lower text variety)"
+    )
+    parser.add_argument(
+        "--count", type=stage_count, action="append", default=[], metavar="STAGE=N",
+        help="override a stage's row count, e.g. --count documents=100000000"
+    )
+    parser.add_argument(
+        "--scale-factor", type=float, metavar="SF",
+        help="TPC-style size: every stage at SF x its SCALE_FACTOR_COUNTS (10k users, 2k projects, "
+             "100k documents at SF 1); --count still overrides single stages"
+    )
+    parser.add_argument(
+        "--skew-profile", choices=list(SKEW_PROFILES), default="uniform",
+        help="preset --skew set; production: hot owners, over 70%% of documents in 20%% of projects, "
+             "one priority partition holding most rows, documents in their project's phase"
+    )
+    parser.add_argument(
+        "--skew", type=skew_spec, action="append", default=[], metavar="STAGE.COLUMN=SPEC",
+        help="a column's distribution, over the profile's: uniform, zipf:S, pareto:A, weights:W1,W2,... "
+             "or follow:P (documents.phase_id / priority_id copy their project's with probability P)"
+    )
+    parser.add_argument(
+        "--server-side", nargs="+", choices=list(DEFAULT_COUNTS), default=[], metavar="STAGE",
+        help="stages filled with INSERT ... SELECT FROM generate_series instead of Faker rows"
+    )
+    parser.add_argument(
+        "--session-window", type=int, default=SESSION_WINDOW_DAYS, metavar="DAYS",
+        help="spread sessions' created_at over the last DAYS days (for partition pruning benchmarks)"
+    )
+    parser.add_argument(
+        "--snapshot-cache", metavar="DIR", default=os.environ.get("PROJECTPULSE_SNAPSHOT_CACHE"),
+        help="with --seed, reload a cached snapshot of the same dataset instead of generating it"
+    )
+    parser.add_argument(
+        "--cache-max-gb", type=float, default=5.0,
+        help="evict least recently used snapshots beyond this size"
+    )
+    parser.add_argument(
+        "--report", metavar="PATH",
+        help="write the per-stage load report to PATH (.json, or .csv for one row per stage)"
+    )
+    parser.add_argument(
+        "--profile", metavar="STAGE", choices=list(DEFAULT_COUNTS) + ["reference"],
+        help="run STAGE under cProfile and dump its stats to --profile-out"
+    )
+    parser.add_argument(
+        "--profile-out", metavar="PATH",
+        help="pstats file for --profile (default: STAGE.prof); open with snakeviz or pstats"
+    )
+    parser.add_argument(
+        "--engine", choices=("sync", "async"), default="sync",
+        help="async: overlap row building with concurrent per-table writers (single process)"
+    )
+    args = parser.parse_args(argv)
+    if args.engine == "async" and args.workers > 1:
+        parser.error("--engine async runs in one process; drop --workers")
+    if args.scale_factor is not None and args.scale_factor <= 0:
+        parser.error("--scale-factor must be above 0")
+    for column, _ in args.skew:
+        if column.partition(".")[0] in args.server_side:
+            parser.error(f"--skew {column}: that stage is --server-side, where ids are drawn in SQL")
+    # Resolved to the non-uniform columns; profile entries of server-side stages are dropped
+    skew = {**SKEW_PROFILES[args.skew_profile], **dict(args.skew)}
+    args.skew = {
+        column: spec for column, spec in skew.items()
+        if spec != UNIFORM and column.partition(".")[0] not in args.server_side
+    }
+    return args
+
+
+def snapshot_options(args):
+    # Every option that changes the seeded rows: the async engine, for one, draws them in another order
+    return {"fast": args.fast, "engine": args.engine, "workers": args.workers, "server_side": sorted(args.server_side),
+            "session_window": args.session_window, "skew": args.skew}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    counts = {**(scaled_counts(args.scale_factor) if args.scale_factor else DEFAULT_COUNTS), **dict(args.count)}
     print("=" * 60)
     print("🧪 FAKE DATA GENERATOR — PROJECTPULSE")
     print("=" * 60)
 
+    snapshot = None
+    if args.snapshot_cache and args.seed is not None:
+        snapshot_cache = _late_import("snapshot_cache")
+        snapshot = snapshot_cache.snapshot_key(args.seed, counts, snapshot_options(args))
+
     conn = get_connection()
+    report = LoadReport(conn, args.profile, args.profile_out)
     try:
         truncate_all_tables(conn)
-        generate_users(conn)
-        generate_sessions(conn)
-        generate_reference_tables(conn)
-        generate_projects(conn)
-        generate_project_links(conn)
-        generate_documents(conn)
-        generate_decision_logs(conn)
+        reloaded = None
+        if snapshot:
+            with report.stage("snapshot") as entry:
+                reloaded = snapshot_cache.load(conn, args.snapshot_cache, snapshot, workers=max(args.workers, 4))
+                entry["rows"] = sum(table["rows"] for table in reloaded["tables"].values()) if reloaded else 0
+        if reloaded:
+            registry.clear()  # ids were reloaded behind the registry's back
+            print(f"♻️ Reloaded snapshot {snapshot} from {args.snapshot_cache}")
+        else:
+            with report.stage("reference") as entry:
+                entry["rows"] = generate_reference_tables(conn, method=args.method)
+            if args.engine == "async":
+                _late_import("async_generate").generate(
+                    counts, method=args.method, chunk_size=args.chunk_size, fast=args.fast,
+                    server_side=args.server_side, session_window=args.session_window, seed=args.seed,
+                    report=report, skew=args.skew
+                )
+            elif args.workers > 1:
+                generate_parallel = _late_import("parallel_generate").generate_parallel
+                seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+                print(f"🔀 {args.workers} workers, seed {seed}")
+                generate_parallel(
+                    counts, args.workers, seed, args.method, args.chunk_size, args.fast, args.server_side,
+                    args.session_window, report=report, skew=args.skew
+                )
+            else:
+                if args.seed is not None:
+                    seed_generators(args.seed)
+                for stage in ("users", "sessions", "projects", "project_links", "documents", "decision_logs"):
+                    with report.stage(stage) as entry:
+                        entry["rows"] = run_stage(conn, stage, counts[stage], args)
+            if snapshot:
+                snapshot_cache.save(conn, args.snapshot_cache, snapshot, args.cache_max_gb)
+                print(f"💾 Saved snapshot {snapshot} to {args.snapshot_cache}")
+        print(report.summary())
+        if args.report:
+            report.write(args.report)
+            print(f"📊 Load report written to {args.report}")
         print("✅ Data generation complete")
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Read API for the large ProjectPulse tables
+
+- stream(): every matching row through a named (server-side) cursor, itersize
+  rows per round trip, so client memory does not grow with the table
+- page() / pages(): keyset pagination on each entity's indexed sort key, e.g.
+  documents by (uploaded_at DESC, document_id DESC) within a project, served by
+  idx_documents_project_uploaded_at; page N costs what page 1 costs, unlike OFFSET
+- lookup(): hot single-row / top-N reads as prepared statements, planned once
+  per pooled connection
+
+Rows come back as namedtuples: tuples with field names, no per-row dict.
+
+    python src/scripts/repository.py documents --project-id 42 --limit 20
+"""
+import argparse
+import itertools
+from collections import namedtuple
+
+from src.scripts.bulk_load import connect
+
+ITERSIZE = 2_000
+PAGE_SIZE = 50
+
+Project = namedtuple(
+    "Project", "project_id title owner_id phase_id priority_id version created_at updated_at deleted_at"
+)
+Document = namedtuple(
+    "Document", "document_id project_id filename uploaded_at filetype_id priority_id phase_id version deleted_at"
+)
+DecisionLog = namedtuple("DecisionLog", "decision_id project_id decided_at decided_by type_id summary")
+Session = namedtuple("Session", "session_id user_id created_at last_active_at expires_at revoked_at")
+
+# Sort keys double as keyset cursors: the last record's key values start the next page
+ENTITIES = {
+    "projects": {
+        "table": "projects.projects", "record": Project, "key": ("project_id",), "descending": False,
+        "filters": ("owner_id", "phase_id", "priority_id"),
+    },
+    "documents": {
+        "table": "documents.documents", "record": Document, "key": ("uploaded_at", "document_id"),
+        "descending": True, "filters": ("project_id",),
+    },
+    "decision_logs": {
+        "table": "projects.project_decision_log", "record": DecisionLog, "key": ("decision_id",),
+        "descending": False, "filters": ("project_id",),
+    },
+    "sessions": {
+        "table": "users.sessions", "record": Session, "key": ("session_id",), "descending": False,
+        "filters": ("user_id",),
+    },
+}
+
+# Prepared per connection on first use; $n parameters
+LOOKUPS = {
+    "project": (Project, "SELECT {columns} FROM projects.projects WHERE project_id = $1"),
+    "document": (Document, "SELECT {columns} FROM documents.documents WHERE document_id = $1"),
+    "session": (Session, "SELECT {columns} FROM users.sessions WHERE session_id = $1"),
+    "recent_documents": (
+        Document,
+        "SELECT {columns} FROM documents.documents WHERE project_id = $1 "
+        "ORDER BY uploaded_at DESC, document_id DESC LIMIT $2",
+    ),
+}
+
+_cursor_numbers = itertools.count()
+
+
+def select_sql(entity, filters=(), after=False, limit=False):
+    """SELECT of an entity's record columns in key order, with equality filters and a keyset bound."""
+    spec = ENTITIES[entity]
+    unknown = set(filters) - set(spec["filters"])
+    if unknown:
+        raise ValueError(f"{entity} cannot be filtered on {', '.join(sorted(unknown))}")
+    conditions = [f"{column} = %({column})s" for column in filters]
+    if after:
+        # A row comparison: PostgreSQL turns its first column into an index bound
+        keys = ", ".join(spec["key"])
+        bounds = ", ".join(f"%(after_{n})s" for n in range(len(spec["key"])))
+        conditions.append(f"({keys}) {'<' if spec['descending'] else '>'} ({bounds})")
+    direction = " DESC" if spec["descending"] else ""
+    sql = f"SELECT {', '.join(spec['record']._fields)} FROM {spec['table']}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(column + direction for column in spec["key"])
+    return sql + (" LIMIT %(limit)s" if limit else "")
+
+
+def key_of(entity, record):
+    return tuple(getattr(record, column) for column in ENTITIES[entity]["key"])
+
+
+# STREAMING
+def stream(conn, entity, itersize=ITERSIZE, **filters):
+    """Yield every matching record; rows arrive itersize at a time from a server-side cursor.
+
+    The cursor lives in conn's transaction: commit or roll back once done.
+    """
+    record = ENTITIES[entity]["record"]
+    with conn.cursor(name=f"stream_{entity}_{next(_cursor_numbers)}") as cur:
+        cur.itersize = itersize
+        cur.execute(select_sql(entity, filters), filters)
+        for row in cur:
+            yield record._make(row)
+
+
+# KEYSET PAGINATION
+def page(conn, entity, after=None, limit=PAGE_SIZE, **filters):
+    """(records, key of the next page) — pass the key back as after; it is None on the last page."""
+    params = {**filters, "limit": limit}
+    if after is not None:
+        params.update((f"after_{n}", value) for n, value in enumerate(after))
+    record = ENTITIES[entity]["record"]
+    with conn.cursor() as cur:
+        cur.execute(select_sql(entity, filters, after is not None, limit=True), params)
+        records = [record._make(row) for row in cur]
+    return records, key_of(entity, records[-1]) if len(records) == limit else None
+
+
+def pages(conn, entity, limit=PAGE_SIZE, **filters):
+    """Yield every page of records, each fetched with a keyset bound."""
+    after = None
+    while True:
+        records, after = page(conn, entity, after, limit, **filters)
+        if records:
+            yield records
+        if after is None:
+            return
+
+
+# PREPARED LOOKUPS
+def lookup(conn, name, *params):
+    """Records of a LOOKUPS query, PREPAREd on the connection the first time it runs there."""
+    record, sql = LOOKUPS[name]
+    sql = sql.format(columns=", ".join(record._fields))
+    prepared = getattr(conn, "prepared", None)  # pooled connections track what DISCARD ALL has not dropped
+    with conn.cursor() as cur:
+        if prepared is None:
+            cur.execute(_positional(sql), params)
+        else:
+            if name not in prepared:
+                cur.execute(f"PREPARE repo_{name} AS {sql}")
+                prepared.add(name)
+            placeholders = ", ".join(["%s"] * len(params))
+            cur.execute(f"EXECUTE repo_{name} ({placeholders})", params)
+        return [record._make(row) for row in cur]
+
+
+def lookup_one(conn, name, *params):
+    records = lookup(conn, name, *params)
+    return records[0] if records else None
+
+
+def _positional(sql):
+    # $1, $2 ... -> %s, in order, for connections that cannot keep prepared statements
+    parts = sql.split("$")
+    return parts[0] + "".join("%s" + part.lstrip("0123456789") for part in parts[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entity", choices=list(ENTITIES))
+    parser.add_argument("--dsn", help="libpq DSN (default: the generator's connection)")
+    parser.add_argument("--project-id", type=int)
+    parser.add_argument("--owner-id", type=int)
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--limit", type=int, default=PAGE_SIZE, help="rows per page")
+    parser.add_argument("--pages", type=int, default=1)
+    args = parser.parse_args()
+
+    filters = {name: value for name, value in (("project_id", args.project_id), ("owner_id", args.owner_id),
+                                               ("user_id", args.user_id)) if value is not None}
+    conn = connect(args.dsn)
+    try:
+        for number, records in enumerate(itertools.islice(pages(conn, args.entity, args.limit, **filters),
+                                                          args.pages), 1):
+            print(f"— page {number}")
+            for record in records:
+                print(record)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
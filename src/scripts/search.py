@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Fuzzy text search and custom_properties filters for documents and projects
+
+- trigram similarity (pg_trgm) on documents.filename / documents.description and
+  projects.title, falling back to ILIKE when the extension is not installed
+- JSONB containment on documents.custom_properties, e.g. {"reviewed": true, "tags": ["alpha"]}
+
+ensure_indexes() creates the GIN indexes backing both (gin_trgm_ops, jsonb_path_ops);
+it needs the tables' owner.
+
+    python src/scripts/search.py --dsn ... --create-indexes
+    python src/scripts/search.py "quartrly report" --properties '{"source": "external"}'
+"""
+import argparse
+import json
+
+from src.scripts.bulk_load import connect
+
+# name -> (extension it needs, definition)
+SEARCH_INDEXES = {
+    "idx_documents_filename_trgm": ("pg_trgm", "documents.documents USING gin (filename gin_trgm_ops)"),
+    "idx_documents_description_trgm": ("pg_trgm", "documents.documents USING gin (description gin_trgm_ops)"),
+    "idx_projects_title_trgm": ("pg_trgm", "projects.projects USING gin (title gin_trgm_ops)"),
+    "idx_documents_custom_properties": (None, "documents.documents USING gin (custom_properties jsonb_path_ops)"),
+}
+
+# pg_trgm's own default for word_similarity matches
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+
+def trigrams_available(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        return cur.fetchone()[0]
+
+
+def ensure_indexes(conn, names=None):
+    """Create the search indexes whose extension is installed; returns (created or present, skipped)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT extname FROM pg_extension")
+        installed = {name for name, in cur.fetchall()}
+    conn.commit()
+    ready, skipped = [], []
+    autocommit = conn.autocommit
+    conn.autocommit = True  # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    try:
+        with conn.cursor() as cur:
+            for name in names or SEARCH_INDEXES:
+                extension, definition = SEARCH_INDEXES[name]
+                if extension and extension not in installed:
+                    skipped.append(name)
+                    continue
+                cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+                ready.append(name)
+    finally:
+        conn.autocommit = autocommit
+    return ready, skipped
+
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def document_query(text=None, properties=None, fuzzy=True, limit=20):
+    """(sql, params) for documents matching text and containing properties; score is NULL for ILIKE."""
+    conditions = ["deleted_at IS NULL"]
+    params = {"limit": limit}
+    score, order = "NULL::real", "uploaded_at DESC"
+    if text and fuzzy:
+        # <% is word_similarity: the search text against the closest extent of the column
+        conditions.append("(%(text)s <%% filename OR %(text)s <%% description)")
+        score = "greatest(word_similarity(%(text)s, filename), word_similarity(%(text)s, description))"
+        order = "score DESC"
+        params["text"] = text
+    elif text:
+        conditions.append("(filename ILIKE %(pattern)s OR description ILIKE %(pattern)s)")
+        params["pattern"] = _like_pattern(text)
+    if properties:
+        conditions.append("custom_properties @> %(properties)s::jsonb")
+        params["properties"] = json.dumps(properties)
+    sql = f"""
+        SELECT document_id, filename, {score} AS score FROM documents.documents
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order} LIMIT %(limit)s
+    """
+    return sql, params
+
+
+def project_query(text, fuzzy=True, limit=20):
+    if fuzzy:
+        sql = """
+            SELECT project_id, title, word_similarity(%(text)s, title) AS score FROM projects.projects
+            WHERE %(text)s <%% title ORDER BY score DESC LIMIT %(limit)s
+        """
+        return sql, {"text": text, "limit": limit}
+    sql = """
+        SELECT project_id, title, NULL::real AS score FROM projects.projects
+        WHERE title ILIKE %(pattern)s ORDER BY created_at DESC LIMIT %(limit)s
+    """
+    return sql, {"pattern": _like_pattern(text), "limit": limit}
+
+
+def _search(conn, sql, params, fuzzy, threshold):
+    with conn.cursor() as cur:
+        if fuzzy:
+            cur.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", (str(threshold),))
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    conn.commit()
+    return rows
+
+
+def search_documents(conn, text=None, properties=None, limit=20, threshold=WORD_SIMILARITY_THRESHOLD):
+    """(document_id, filename, score) rows, best match first."""
+    fuzzy = bool(text) and trigrams_available(conn)
+    sql, params = document_query(text, properties, fuzzy, limit)
+    return _search(conn, sql, params, fuzzy, threshold)
+
+
+def search_projects(conn, text, limit=20, threshold=WORD_SIMILARITY_THRESHOLD):
+    """(project_id, title, score) rows, best match first."""
+    fuzzy = trigrams_available(conn)
+    sql, params = project_query(text, fuzzy, limit)
+    return _search(conn, sql, params, fuzzy, threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("text", nargs="?", help="fuzzy search text")
+    parser.add_argument("--dsn", help="libpq DSN (default: the generator's connection)")
+    parser.add_argument("--properties", type=json.loads, help="JSON object documents' custom_properties must contain")
+    parser.add_argument("--projects", action="store_true", help="search project titles instead of documents")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=WORD_SIMILARITY_THRESHOLD)
+    parser.add_argument("--create-indexes", action="store_true", help="create the GIN indexes (needs the owner)")
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    try:
+        if args.create_indexes:
+            ready, skipped = ensure_indexes(conn)
+            print(f"✅ indexes: {', '.join(ready) or 'none'}")
+            if skipped:
+                print(f"⚠️ pg_trgm is not installed, skipped: {', '.join(skipped)} (see optional_extensions.sql)")
+        if args.projects and args.text:
+            rows = search_projects(conn, args.text, args.limit, args.threshold)
+        elif args.text or args.properties:
+            rows = search_documents(conn, args.text, args.properties, args.limit, args.threshold)
+        else:
+            return
+    finally:
+        conn.close()
+    for row_id, name, score in rows:
+        print(f"{row_id:>10}  {'' if score is None else f'{score:.2f}':>5}  {name}")
+
+
+if __name__ == "__main__":
+    main()
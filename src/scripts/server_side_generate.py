@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Server-side data generation: INSERT ... SELECT FROM generate_series(...)
+
+Values are computed inside Postgres, so nothing is shipped row by row from
+Python. Foreign keys are drawn from the shared id registry's ranges and every
+generated value satisfies the quest_1/quest_3 constraints (lowercase email
+logins, non-empty titles/filenames/summaries, positive versions, unique
+checksums).
+"""
+from src.scripts.quest_4_Generate_Fake_Data import SESSION_WINDOW_DAYS, registry
+
+# Rows per INSERT ... SELECT statement; each batch is committed on its own
+BATCH_SIZE = 1_000_000
+
+
+def _pick(ids):
+    if not len(ids):
+        raise ValueError("Cannot draw foreign keys from an empty table")
+    return f"floor(random() * {len(ids)})::bigint"
+
+
+def _fk(ids, pick):
+    """Map a 0-based random position onto an id, using the IdSet's ranges."""
+    ranges = list(ids.ranges())
+    if len(ranges) == 1:
+        return f"({ranges[0][0]} + {pick})::int"
+    rows, before = [], 0
+    for first, last in ranges:
+        size = last - first + 1
+        rows.append(f"({first}, {before}, {before + size})")
+        before += size
+    return (
+        f"(SELECT (r.first + {pick} - r.before)::int "
+        f"FROM (VALUES {', '.join(rows)}) r(first, before, upto) "
+        f"WHERE {pick} < r.upto ORDER BY r.upto LIMIT 1)"
+    )
+
+
+def _one_of(*values):
+    literals = ", ".join("'" + v.replace("'", "''") + "'" for v in values)
+    return f"(ARRAY[{literals}])[1 + floor(random() * {len(values)})::int]"
+
+
+def insert_select(conn, table, columns, select, count, fks=None, inner=None, batch_size=BATCH_SIZE):
+    """Run INSERT ... SELECT over generate_series in committed batches.
+
+    fks maps an alias to an IdSet; select expressions reference it as {alias}.
+    inner maps an alias to a per-row expression evaluated once in the inner query.
+    """
+    fks = fks or {}
+    inner_exprs = ["g"] + [f"{expr} AS {alias}" for alias, expr in (inner or {}).items()]
+    inner_exprs += [f"{_pick(ids)} AS pick_{alias}" for alias, ids in fks.items()]
+    select = [expr.format(**{alias: _fk(ids, f"pick_{alias}") for alias, ids in fks.items()}) for expr in select]
+    # OFFSET 0 keeps the inner query from being flattened, so random() runs once per row
+    sql = f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        SELECT {', '.join(select)}
+        FROM (SELECT {', '.join(inner_exprs)} FROM generate_series(%s, %s) g OFFSET 0) s
+    """
+    done = 0
+    with conn.cursor() as cur:
+        while done < count:
+            n = min(batch_size, count - done)
+            cur.execute(sql, (done + 1, done + n))
+            conn.commit()
+            done += n
+    registry.forget(table)  # serial ids were assigned server-side
+    return done
+
+
+# USERS
+def server_generate_users(conn, count=10, batch_size=BATCH_SIZE):
+    return insert_select(conn, "users.users", ("login", "password_hash"), [
+        "'user' || g || '.' || substr(md5(random()::text), 1, 10) || '@example.com'",
+        "encode(sha256(random()::text::bytea), 'hex')",
+    ], count, batch_size=batch_size)
+
+
+def server_generate_sessions(conn, count=20, batch_size=BATCH_SIZE, window_days=SESSION_WINDOW_DAYS):
+    users = registry.ids(conn, "users.users", "user_id")
+    return insert_select(conn, "users.sessions", (
+        "session_id", "user_id", "created_at", "last_active_at", "expires_at",
+        "ip_address", "user_agent", "revoked_at", "metadata"
+    ), [
+        "gen_random_uuid()",
+        "{user}",
+        "created",
+        "created + make_interval(hours => 1 + floor(random() * 48)::int)",
+        "created + interval '30 days'",
+        "concat_ws('.', 1 + floor(random() * 223)::int, floor(random() * 256)::int, "
+        "floor(random() * 256)::int, 1 + floor(random() * 254)::int)",
+        _one_of(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 Version/17.2 Safari/605.1.15",
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+        ),
+        "NULL",
+        "jsonb_build_object("
+        f"'browser', {_one_of('Chrome/120.0', 'Chrome/119.0', 'Chrome/118.0')}, "
+        f"'device', {_one_of('Desktop', 'Mobile', 'Tablet')}, "
+        "'location', 'City ' || floor(random() * 1000)::int)",
+    ], count, fks={"user": users},
+        inner={"created": f"localtimestamp - random() * make_interval(days => {int(window_days)})"},
+        batch_size=batch_size)
+
+
+# PROJECTS
+def server_generate_projects(conn, count=30, batch_size=BATCH_SIZE):
+    users = registry.ids(conn, "users.users", "user_id")
+    return insert_select(conn, "projects.projects", (
+        "title", "description", "endpoints", "settings", "owner_id", "image_url",
+        "phase_id", "version", "license_id", "priority_id",
+        "created_at", "updated_at", "updated_by", "deleted_at"
+    ), [
+        "'Project ' || g || ' ' || substr(md5(random()::text), 1, 8)",
+        "'Server-side generated project ' || g",
+        "jsonb_build_object('api', 'https://api.example.com/projects/' || g)",
+        f"jsonb_build_object('setting', {_one_of('alpha', 'beta', 'gamma', 'delta')})",
+        "{owner}",
+        "'https://picsum.photos/seed/' || g || '/200'",
+        "{phase}",
+        "0.1",
+        "{license}",
+        "{priority}",
+        "localtimestamp",
+        "localtimestamp",
+        "{updated_by}",
+        "NULL",
+    ], count, fks={
+        "owner": users,
+        "phase": registry.ids(conn, "reference.phase_reference", "phase_id"),
+        "license": registry.ids(conn, "reference.license_reference", "license_id"),
+        "priority": registry.ids(conn, "reference.priority_reference", "priority_id"),
+        "updated_by": users,
+    }, batch_size=batch_size)
+
+
+def server_generate_project_links(conn, count=50, batch_size=BATCH_SIZE):
+    projects = registry.ids(conn, "projects.projects", "project_id")
+    total = 0
+    for table, column, ref_table in (
+        ("projects.project_feature", "feature_id", "reference.feature_reference"),
+        ("projects.project_tech_stack", "tech_id", "reference.tech_stack_reference"),
+        ("projects.project_tag", "tag_id", "reference.tag_reference"),
+    ):
+        total += insert_select(conn, table, ("project_id", column), ["{project}", "{target}"], count, fks={
+            "project": projects,
+            "target": registry.ids(conn, ref_table, column),
+        }, batch_size=batch_size)
+    return total
+
+
+def server_generate_decision_logs(conn, count=30, batch_size=BATCH_SIZE):
+    return insert_select(conn, "projects.project_decision_log", (
+        "project_id", "decided_at", "decided_by", "type_id",
+        "summary", "rationale", "impact",
+        "related_feature_id", "related_document_id"
+    ), [
+        "{project}",
+        "localtimestamp - random() * interval '365 days'",
+        "{user}",
+        "{type}",
+        "'Decision ' || g || ': ' || " + _one_of("adopt", "postpone", "replace", "drop") + " || ' component'",
+        "'Rationale for decision ' || g",
+        _one_of("Low impact", "Medium impact", "High impact"),
+        "{feature}",
+        "{document}",
+    ], count, fks={
+        "project": registry.ids(conn, "projects.projects", "project_id"),
+        "user": registry.ids(conn, "users.users", "user_id"),
+        "type": registry.ids(conn, "reference.decision_type_reference", "type_id"),
+        "feature": registry.ids(conn, "reference.feature_reference", "feature_id"),
+        "document": registry.ids(conn, "documents.documents", "document_id"),
+    }, batch_size=batch_size)
+
+
+# DOCUMENTS
+def server_generate_documents(conn, count=50, batch_size=BATCH_SIZE):
+    return insert_select(conn, "documents.documents", (
+        "project_id", "filename", "uploaded_at", "filetype_id", "uploaded_by",
+        "storage_id", "image_url", "version", "priority_id", "phase_id",
+        "description", "checksum", "custom_properties", "deleted_at"
+    ), [
+        "{project}",
+        "'document_' || g || '.' || fmt",
+        "localtimestamp - random() * interval '365 days'",
+        "{filetype}",
+        "'User ' || floor(random() * 10000)::int",
+        "{storage}",
+        "'https://picsum.photos/seed/doc' || g || '/200'",
+        "0.1",
+        "{priority}",
+        "{phase}",
+        "'Server-side generated document ' || g",
+        "md5(gen_random_uuid()::text)",  # UNIQUE: random UUIDs, not g, so reruns never collide
+        "jsonb_build_object("
+        "'reviewed', random() < 0.5, "
+        f"'tags', jsonb_build_array({_one_of('draft', 'final', 'legal', 'design')}, "
+        f"{_one_of('q1', 'q2', 'q3', 'q4')}), "
+        f"'source', {_one_of('internal', 'external')}, "
+        "'format', fmt)",
+        "NULL",
+    ], count, fks={
+        "project": registry.ids(conn, "projects.projects", "project_id"),
+        "filetype": registry.ids(conn, "reference.filetype_reference", "filetype_id"),
+        "storage": registry.ids(conn, "reference.storage_reference", "storage_id"),
+        "priority": registry.ids(conn, "reference.priority_reference", "priority_id"),
+        "phase": registry.ids(conn, "reference.phase_reference", "phase_id"),
+    }, inner={"fmt": _one_of("pdf", "docx", "txt")}, batch_size=batch_size)
+
+
+SERVER_GENERATORS = {
+    "users": server_generate_users,
+    "sessions": server_generate_sessions,
+    "projects": server_generate_projects,
+    "project_links": server_generate_project_links,
+    "documents": server_generate_documents,
+    "decision_logs": server_generate_decision_logs,
+}
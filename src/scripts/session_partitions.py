@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance for users.sessions_partitioned (RANGE on created_at)
+
+- creates daily or monthly partitions ahead of time, so inserts never miss a partition
+- retention detaches and drops whole partitions once every session in them has
+  expired or been revoked, instead of DELETE (no bloat, no vacuum storm)
+
+Run it from cron with the table owner's DSN (e.g. postgres).
+"""
+import argparse
+import re
+from datetime import datetime, timedelta
+
+from src.scripts.bulk_load import connect
+
+PARENT = "users.sessions_partitioned"
+GRANULARITIES = ("day", "month")
+
+# Partitions kept ready after the current one
+AHEAD = 3
+# Partitions whose upper bound is older than this many days may be dropped
+RETENTION_DAYS = 30
+
+_PARTITIONS_SQL = """
+    SELECT format('%%I.%%I', n.nspname, c.relname), pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE i.inhparent = %s::regclass
+"""
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+# A session is live until it expires or is revoked
+_HAS_LIVE_SESSIONS_SQL = """
+    SELECT EXISTS (
+      SELECT 1 FROM {partition}
+      WHERE revoked_at IS NULL AND (expires_at IS NULL OR expires_at > localtimestamp)
+    )
+"""
+
+
+def period_start(moment, granularity):
+    if granularity == "day":
+        return datetime(moment.year, moment.month, moment.day)
+    return datetime(moment.year, moment.month, 1)
+
+
+def next_period(start, granularity):
+    if granularity == "day":
+        return start + timedelta(days=1)
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(start, granularity, parent=PARENT):
+    suffix = f"{start:%Y%m%d}" if granularity == "day" else f"{start:%Y%m}"
+    return f"{parent.removesuffix('_partitioned')}_p{suffix}"
+
+
+def partitions(conn, parent=PARENT):
+    """Range partitions of parent as (name, lower, upper), oldest first."""
+    with conn.cursor() as cur:
+        cur.execute(_PARTITIONS_SQL, (parent,))
+        rows = cur.fetchall()
+    ranges = []
+    for name, bound in rows:
+        match = _BOUND.search(bound)
+        if match:  # skips a DEFAULT partition
+            ranges.append((name, datetime.fromisoformat(match[1]), datetime.fromisoformat(match[2])))
+    return sorted(ranges, key=lambda partition: partition[1])
+
+
+def ensure_partitions(conn, granularity="month", ahead=AHEAD, since=None, parent=PARENT):
+    """Create missing partitions from since (default: now) up to ahead periods past the current one."""
+    now = datetime.now()
+    start = period_start(min(since or now, now), granularity)
+    last = period_start(now, granularity)
+    for _ in range(ahead):
+        last = next_period(last, granularity)
+    existing = partitions(conn, parent)
+
+    created = []
+    with conn.cursor() as cur:
+        while start <= last:
+            end = next_period(start, granularity)
+            # Periods already covered (even by a partition of another granularity) are left alone
+            if not any(lower < end and start < upper for _, lower, upper in existing):
+                name = partition_name(start, granularity, parent)
+                cur.execute(
+                    f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES FROM (%s) TO (%s)", (start, end)
+                )
+                created.append(name)
+            start = end
+    conn.commit()
+    return created
+
+
+def expired_partitions(conn, retention_days=RETENTION_DAYS, parent=PARENT):
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    expired = []
+    with conn.cursor() as cur:
+        for name, _, upper in partitions(conn, parent):
+            if upper > cutoff:
+                break
+            cur.execute(_HAS_LIVE_SESSIONS_SQL.format(partition=name))
+            if not cur.fetchone()[0]:
+                expired.append(name)
+    conn.commit()
+    return expired
+
+
+def apply_retention(conn, retention_days=RETENTION_DAYS, parent=PARENT):
+    """Detach (CONCURRENTLY, readers keep going) and drop expired partitions; returns their names."""
+    dropped = expired_partitions(conn, retention_days, parent)
+    autocommit = conn.autocommit
+    conn.autocommit = True  # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    try:
+        with conn.cursor() as cur:
+            for name in dropped:
+                cur.execute(f"ALTER TABLE {parent} DETACH PARTITION {name} CONCURRENTLY")
+                cur.execute(f"DROP TABLE {name}")
+    finally:
+        conn.autocommit = autocommit
+    return dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="libpq DSN of the table owner (default: the generator's connection)")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="month")
+    parser.add_argument("--ahead", type=int, default=AHEAD, help="partitions to keep ready after the current one")
+    parser.add_argument("--since", type=datetime.fromisoformat, metavar="YYYY-MM-DD",
+                        help="also create partitions back to this date (backfills)")
+    parser.add_argument("--retention-days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--no-retention", action="store_true", help="only create partitions")
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    try:
+        for name in ensure_partitions(conn, args.granularity, args.ahead, args.since):
+            print(f"🧱 created {name}")
+        if not args.no_retention:
+            for name in apply_retention(conn, args.retention_days):
+                print(f"🗑️ dropped {name}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
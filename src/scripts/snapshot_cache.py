@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Snapshot cache for generated datasets
+
+After a seeded run, every table is exported with COPY ... (FORMAT binary) into a
+gzip file under <cache dir>/<key>/, with a manifest holding columns, row counts
+and sha256 checksums. The key covers the seed, the row counts, the
+generator options that change the rows and the sha256 of quest_1_Data_Modeling.sql.
+A later run with the same key truncates the tables and reloads them with one
+COPY per table (tables of an FK level in parallel), then moves every serial
+sequence past the reloaded ids.
+
+Snapshots whose files are missing, corrupted or no longer match the table
+columns are deleted and regenerated. The cache is trimmed to --cache-max-gb,
+least recently used snapshot first.
+
+    python src/scripts/quest_4_Generate_Fake_Data.py --seed 42 --snapshot-cache ~/.cache/projectpulse
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.scripts.bulk_load import SCHEMAS, connect
+
+MANIFEST = "manifest.json"
+MAX_CACHE_GB = 5.0
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "sql", "quest_1_Data_Modeling.sql")
+
+# Plain tables only: partitioned twins (relkind 'p') are filled by partition_migration, not the generator
+_TABLES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, t.relname),
+           ARRAY(SELECT a.attname::text FROM pg_attribute a
+                 WHERE a.attrelid = t.oid AND a.attnum > 0 AND NOT a.attisdropped ORDER BY a.attnum)
+    FROM pg_class t
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = ANY(%s) AND t.relkind = 'r' AND NOT t.relispartition
+    ORDER BY 1
+"""
+
+_FOREIGN_KEYS_SQL = """
+    SELECT DISTINCT format('%%I.%%I', cn.nspname, c.relname), format('%%I.%%I', pn.nspname, p.relname)
+    FROM pg_constraint k
+    JOIN pg_class c ON c.oid = k.conrelid
+    JOIN pg_namespace cn ON cn.oid = c.relnamespace
+    JOIN pg_class p ON p.oid = k.confrelid
+    JOIN pg_namespace pn ON pn.oid = p.relnamespace
+    WHERE k.contype = 'f' AND k.conrelid <> k.confrelid AND cn.nspname = ANY(%s)
+"""
+
+_SEQUENCES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, t.relname), a.attname, pg_get_serial_sequence(
+               format('%%I.%%I', n.nspname, t.relname), a.attname)
+    FROM pg_class t
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE format('%%I.%%I', n.nspname, t.relname) = ANY(%s)
+      AND pg_get_serial_sequence(format('%%I.%%I', n.nspname, t.relname), a.attname) IS NOT NULL
+"""
+
+
+def default_dir():
+    return os.environ.get("PROJECTPULSE_SNAPSHOT_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "projectpulse", "snapshots")
+
+
+def schema_hash(path=SCHEMA_FILE):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def snapshot_key(seed, counts, options=None):
+    """Cache key of a dataset: seed, row counts, row-shaping options and the data model."""
+    identity = {"seed": seed, "counts": counts, "options": options or {}, "schema": schema_hash()}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# TABLES
+def tables(conn, schemas=SCHEMAS):
+    """table -> columns of every table the generator fills."""
+    with conn.cursor() as cur:
+        cur.execute(_TABLES_SQL, (list(schemas),))
+        return dict(cur.fetchall())
+
+
+def fk_levels(conn, names, schemas=SCHEMAS):
+    """Tables grouped so each level only references tables of earlier levels."""
+    with conn.cursor() as cur:
+        cur.execute(_FOREIGN_KEYS_SQL, (list(schemas),))
+        parents = {}
+        for child, parent in cur.fetchall():
+            parents.setdefault(child, set()).add(parent)
+    pending, levels = set(names), []
+    while pending:
+        level = sorted(t for t in pending if not parents.get(t, set()) & pending)
+        if not level:
+            raise ValueError(f"Circular foreign keys between {sorted(pending)}")
+        levels.append(level)
+        pending -= set(level)
+    return levels
+
+
+# SAVE
+def save(conn, cache_dir, key, max_gb=MAX_CACHE_GB, schemas=SCHEMAS):
+    """Export every table into cache_dir/key; returns the manifest."""
+    final = os.path.join(cache_dir, key)
+    building = f"{final}.building-{os.getpid()}"
+    os.makedirs(building, exist_ok=True)
+    try:
+        manifest = {"key": key, "created_at": time.time(), "tables": {}}
+        with conn.cursor() as cur:
+            for table, columns in tables(conn, schemas).items():
+                path = os.path.join(building, f"{table}.copy.gz")
+                with gzip.open(path, "wb", compresslevel=1) as f:
+                    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) TO STDOUT WITH (FORMAT binary)", f)
+                manifest["tables"][table] = {
+                    "file": os.path.basename(path), "columns": columns, "rows": cur.rowcount,
+                    "sha256": _file_sha256(path),
+                }
+        conn.commit()
+        with open(os.path.join(building, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        # The manifest is written last and the directory renamed into place: readers never see half a snapshot
+        shutil.rmtree(final, ignore_errors=True)
+        os.rename(building, final)
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+    evict(cache_dir, max_gb, keep=key)
+    return manifest
+
+
+# LOAD
+def verify(cache_dir, key, table_columns=None):
+    """The snapshot's manifest if every file is present, intact and matches the tables; else None."""
+    path = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if table_columns is not None and {t: e["columns"] for t, e in manifest["tables"].items()} != table_columns:
+        return None  # the tables changed shape since the snapshot was taken
+    for entry in manifest["tables"].values():
+        file = os.path.join(path, entry["file"])
+        if not os.path.exists(file) or _file_sha256(file) != entry["sha256"]:
+            return None
+    return manifest
+
+
+def _copy_in(dsn, path, table, columns):
+    conn = connect(dsn)
+    try:
+        with conn.cursor() as cur, gzip.open(path, "rb") as f:
+            cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)", f, size=1 << 20)
+            rows = cur.rowcount
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+def load(conn, cache_dir, key, dsn=None, workers=4, schemas=SCHEMAS):
+    """Reload the snapshot into the (emptied) tables; returns its manifest, or None without a usable snapshot."""
+    table_columns = tables(conn, schemas)
+    manifest = verify(cache_dir, key, table_columns)
+    if manifest is None:
+        shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)  # stale or corrupted: rebuild
+        return None
+    os.utime(os.path.join(cache_dir, key, MANIFEST))  # LRU: mark as recently used
+
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join(manifest['tables'])} CASCADE")
+    conn.commit()
+    path = os.path.join(cache_dir, key)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for level in fk_levels(conn, list(manifest["tables"]), schemas):
+            jobs = {
+                table: pool.submit(_copy_in, dsn, os.path.join(path, manifest["tables"][table]["file"]),
+                                   table, manifest["tables"][table]["columns"])
+                for table in level
+            }
+            for table, job in jobs.items():
+                if job.result() != manifest["tables"][table]["rows"]:
+                    raise ValueError(f"{table}: snapshot {key} loaded a different number of rows")
+
+    fix_sequences(conn, list(manifest["tables"]))
+    return manifest
+
+
+def fix_sequences(conn, names):
+    """Move each serial sequence past its column's max, so new rows never collide with reloaded ids."""
+    with conn.cursor() as cur:
+        cur.execute(_SEQUENCES_SQL, (names,))
+        for table, column, sequence in cur.fetchall():
+            cur.execute("SELECT has_sequence_privilege(%s, 'UPDATE')", (sequence,))
+            if cur.fetchone()[0]:
+                cur.execute(f"""
+                    SELECT setval(pg_get_serial_sequence(%s, %s), max({column})) FROM {table}
+                    HAVING max({column}) IS NOT NULL
+                """, (table, column))
+                continue
+            # Without UPDATE on the sequence (e.g. nobody) setval is refused: draw it forward
+            # server-side instead, one statement but one nextval per missing id
+            cur.execute(f"""
+                SELECT count(nextval(%s))
+                FROM generate_series(1, (SELECT max({column}) FROM {table})
+                                        - COALESCE(pg_sequence_last_value(%s::regclass), 0))
+            """, (sequence, sequence))
+    conn.commit()
+
+
+# EVICTION
+def _size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def snapshots(cache_dir):
+    """(key, bytes, last used) of every complete snapshot, least recently used first."""
+    found = []
+    for key in os.listdir(cache_dir) if os.path.isdir(cache_dir) else ():
+        manifest = os.path.join(cache_dir, key, MANIFEST)
+        if os.path.exists(manifest):
+            found.append((key, _size(os.path.join(cache_dir, key)), os.path.getmtime(manifest)))
+    return sorted(found, key=lambda snapshot: snapshot[2])
+
+
+def evict(cache_dir, max_gb=MAX_CACHE_GB, keep=None):
+    """Delete least recently used snapshots until the cache fits in max_gb; returns the deleted keys."""
+    found = snapshots(cache_dir)
+    total, limit, deleted = sum(size for _, size, _ in found), max_gb * 1024 ** 3, []
+    for key, size, _ in found:
+        if total <= limit:
+            break
+        if key != keep:
+            shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+            total -= size
+            deleted.append(key)
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache-dir", default=default_dir())
+    parser.add_argument("--max-gb", type=float, default=MAX_CACHE_GB, help="evict down to this size")
+    parser.add_argument("--clear", action="store_true", help="delete every snapshot")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(args.cache_dir, ignore_errors=True)
+        print(f"🗑️ {args.cache_dir} cleared")
+        return
+    for key in evict(args.cache_dir, args.max_gb):
+        print(f"🗑️ evicted {key}")
+    for key, size, used in reversed(snapshots(args.cache_dir)):
+        print(f"{key}  {size / 1024 ** 2:>10,.1f} MB  last used {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Seeded template database and throwaway clones for the test suite
+
+The template copies the source database (schema, grants) and replaces its rows
+with a small seeded dataset. It is rebuilt only when src/sql, the generator or
+the modules it builds rows with change. CREATE DATABASE ... TEMPLATE then hands
+each test or pytest-xdist worker its own database. Needs a role with CREATEDB that owns the source (e.g. postgres).
+
+    python src/scripts/template_databases.py --dsn "dbname=projectpulse user=postgres host=localhost"
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extensions import make_dsn, parse_dsn
+
+from src.scripts import copy_loader, distributions, id_registry, value_pools
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts.bulk_load import SCHEMAS
+
+TEMPLATE_COUNTS = generator.DEFAULT_COUNTS
+TEMPLATE_SEED = 0
+# Serializes template builds across pytest-xdist workers (held in the maintenance database)
+LOCK_KEY = 7_403_112
+
+_SQL_FILES = os.path.join(os.path.dirname(__file__), "..", "sql", "*.sql")
+# Everything the seeded rows depend on: values, distributions, ids and how they are written
+_GENERATOR_MODULES = (generator, value_pools, distributions, id_registry, copy_loader)
+
+_TABLES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, t.relname)
+    FROM pg_class t
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = ANY(%s) AND t.relkind IN ('r', 'p') AND NOT t.relispartition
+"""
+
+
+def database_name(dsn):
+    params = parse_dsn(dsn)
+    return params.get("dbname") or params.get("user") or os.environ.get("PGDATABASE")
+
+
+def with_database(dsn, name):
+    return make_dsn(dsn, dbname=name)
+
+
+def fingerprint(counts=TEMPLATE_COUNTS, seed=TEMPLATE_SEED):
+    """Changes whenever the schema SQL, the generator's modules or the seeded dataset change."""
+    digest = hashlib.sha256(json.dumps([counts, seed], sort_keys=True).encode())
+    for path in sorted(glob.glob(_SQL_FILES)) + [module.__file__ for module in _GENERATOR_MODULES]:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _maintenance(dsn):
+    conn = psycopg2.connect(with_database(dsn, "postgres"))
+    conn.autocommit = True  # CREATE / DROP DATABASE cannot run in a transaction
+    return conn
+
+
+def _generate(conn, counts, seed):
+    generator.registry.clear()
+    generator.seed_generators(seed)
+    for stage in ("users", "sessions", "reference", "projects", "project_links", "documents", "decision_logs"):
+        if stage == "reference":
+            generator.generate_reference_tables(conn)
+        else:
+            generator.GENERATORS[stage](conn, count=counts[stage], fast=True, **generator.stage_options(stage))
+
+
+def seed_database(dsn, counts=TEMPLATE_COUNTS, seed=TEMPLATE_SEED):
+    """Replace every row of the database at dsn with the seeded dataset."""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_TABLES_SQL, (list(SCHEMAS) + ["maintenance"],))
+            tables = [table for table, in cur.fetchall()]
+            cur.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+        conn.commit()
+        _generate(conn, counts, seed)
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT format('%I.%I', schemaname, matviewname) FROM pg_matviews")
+            for view, in cur.fetchall():
+                cur.execute(f"REFRESH MATERIALIZED VIEW {view}")
+            cur.execute("ANALYZE")
+    finally:
+        generator.registry.clear()  # the ids belong to the template, not the caller's database
+        conn.close()
+
+
+def seed_if_empty(conn, counts=TEMPLATE_COUNTS, seed=TEMPLATE_SEED):
+    """Without a template (no CREATEDB role), seed the shared database once, as a plain user."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))  # other workers wait for the seed
+        try:
+            cur.execute("SELECT EXISTS (SELECT 1 FROM projects.projects)")
+            if cur.fetchone()[0]:
+                return False
+            generator.truncate_all_tables(conn)
+            _generate(conn, counts, seed)
+            return True
+        finally:
+            conn.rollback()
+            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+            conn.commit()
+            generator.registry.clear()
+
+
+def ensure_template(admin_dsn, counts=TEMPLATE_COUNTS, seed=TEMPLATE_SEED):
+    """Name of the up-to-date template of admin_dsn's database, building it first if needed."""
+    source = database_name(admin_dsn)
+    template = f"{source}_template"
+    stamp = fingerprint(counts, seed)
+    conn = _maintenance(admin_dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+            cur.execute("SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = %s",
+                        (template,))
+            found = cur.fetchone()
+            if found and found[0] == stamp:
+                return template
+            if found:
+                cur.execute(f"ALTER DATABASE {template} IS_TEMPLATE false")
+                cur.execute(f"DROP DATABASE {template} WITH (FORCE)")
+            try:
+                cur.execute(f"CREATE DATABASE {template} TEMPLATE {source}")
+            except psycopg2.errors.ObjectInUse as error:
+                raise RuntimeError(f"{source} must have no other sessions while its template is built: {error}")
+            seed_database(with_database(admin_dsn, template), counts, seed)
+            # Stamped last: a build that died halfway is rebuilt next time
+            cur.execute(f"COMMENT ON DATABASE {template} IS %s", (stamp,))
+            cur.execute(f"ALTER DATABASE {template} WITH ALLOW_CONNECTIONS false IS_TEMPLATE true")
+        return template
+    finally:
+        conn.close()  # releases the advisory lock
+
+
+def clone(admin_dsn, template, name):
+    conn = _maintenance(admin_dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")  # left over by an interrupted run
+            cur.execute(f"CREATE DATABASE {name} TEMPLATE {template}")
+    finally:
+        conn.close()
+    return name
+
+
+def drop(admin_dsn, name):
+    conn = _maintenance(admin_dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", required=True, help="libpq DSN of the source database's owner")
+    parser.add_argument("--clone", metavar="NAME", help="also create a database NAME from the template")
+    args = parser.parse_args()
+
+    template = ensure_template(args.dsn)
+    print(f"✅ template {template} ({fingerprint()})")
+    if args.clone:
+        clone(args.dsn, template, args.clone)
+        print(f"✅ {args.clone} created from {template}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pre-generated Faker value pools for the generator's opt-in fast mode
+
+Per-row Faker calls (fake.text, fake.sha256, fake.user_agent, ...) dominate
+generation time. In fast mode every such column draws from a bounded pool
+built once per process, and rows are assembled from batched random.choices()
+index sampling. Columns with UNIQUE constraints never come from a pool.
+"""
+import hashlib
+import json
+import random
+
+POOL_SIZE = 1_000
+BATCH_SIZE = 1_000
+
+POOL_FACTORIES = {
+    "catch_phrase": lambda fake: fake.catch_phrase(),
+    "chrome": lambda fake: fake.chrome(),
+    "city": lambda fake: fake.city(),
+    "file_name": lambda fake: fake.file_name(),
+    "free_email_domain": lambda fake: fake.free_email_domain(),
+    "image_url": lambda fake: fake.image_url(),
+    "ipv4": lambda fake: fake.ipv4(),
+    "name": lambda fake: fake.name(),
+    "sentence": lambda fake: fake.sentence(),
+    "sha256": lambda fake: fake.sha256(),
+    "text_50": lambda fake: fake.text(50),
+    "text_100": lambda fake: fake.text(100),
+    "url": lambda fake: fake.url(),
+    "user_agent": lambda fake: fake.user_agent(),
+    "user_name": lambda fake: fake.user_name(),
+    "word": lambda fake: fake.word(),
+}
+
+
+def batch_sizes(count, size=BATCH_SIZE):
+    while count > 0:
+        yield min(size, count)
+        count -= size
+
+
+class ValuePools:
+    """Bounded Faker value pools, built lazily and sampled a batch at a time."""
+
+    def __init__(self, fake, size=POOL_SIZE):
+        self.fake = fake
+        self.size = size
+        self._pools = {}
+        self._json_pools = {}
+        self._token = None
+        self._counter = 0
+
+    def pool(self, name):
+        if name not in self._pools:
+            factory = POOL_FACTORIES[name]
+            self._pools[name] = [factory(self.fake) for _ in range(self.size)]
+        return self._pools[name]
+
+    def sample(self, name, k):
+        return random.choices(self.pool(name), k=k)
+
+    def sample_json(self, name, k):
+        # Pre-serialized JSON strings, spliced into JSONB payloads without json.dumps per row
+        if name not in self._json_pools:
+            self._json_pools[name] = [json.dumps(v) for v in self.pool(name)]
+        return random.choices(self._json_pools[name], k=k)
+
+    def unique_keys(self, k):
+        # A seeded per-process token plus a running counter: unique within the
+        # process and, with distinct shard seeds, across parallel workers too
+        if self._token is None:
+            self._token = f"{random.getrandbits(64):016x}"
+        start = self._counter
+        self._counter += k
+        return [f"{self._token}{n:x}" for n in range(start, start + k)]
+
+    def unique_sha1(self, k):
+        return [hashlib.sha1(key.encode()).hexdigest() for key in self.unique_keys(k)]
+
+    def reset(self):
+        self._pools.clear()
+        self._json_pools.clear()
+        self._token = None
+        self._counter = 0
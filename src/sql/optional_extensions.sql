@@ -9,4 +9,8 @@ CREATE EXTENSION IF NOT EXISTS pg_trgm;
 -- btree_gin: GIN indexes for B-tree comparable types
 CREATE EXTENSION IF NOT EXISTS btree_gin;
 
+-- hypopg: Hypothetical indexes, used by src/scripts/index_advisor.py to cost
+-- CREATE INDEX suggestions (third-party package, e.g. postgresql-16-hypopg)
+-- CREATE EXTENSION IF NOT EXISTS hypopg;
+
 \echo 'Extensions installed successfully!'
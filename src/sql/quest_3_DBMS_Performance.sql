@@ -104,6 +104,15 @@ FOR VALUES IN (2);
 CREATE TABLE documents.documents_low_priority PARTITION OF documents.documents_partitioned_by_priority
 FOR VALUES IN (3);
 
+-- Sessions by creation time: partitions are created ahead and expired ones dropped
+-- by src/scripts/session_partitions.py (the key must be part of the primary key)
+CREATE TABLE users.sessions_partitioned (
+  LIKE users.sessions INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+  PRIMARY KEY (session_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_sessions_partitioned_user_id ON users.sessions_partitioned(user_id);
+
 
 -- STEP 5: MATERIALIZED VIEWS FOR OPTIMIZED ACCESS
 
@@ -125,7 +134,8 @@ LEFT JOIN users.users u ON p.owner_id = u.user_id
 LEFT JOIN reference.priority_reference pr ON p.priority_id = pr.priority_id
 LEFT JOIN reference.phase_reference ph ON p.phase_id = ph.phase_id
 LEFT JOIN reference.license_reference lr ON p.license_id = lr.license_id;
--- REFRESH MATERIALIZED VIEW projects.matview_project_summary;
+CREATE UNIQUE INDEX idx_matview_project_summary_key ON projects.matview_project_summary(project_id);
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY projects.matview_project_summary;
 
 CREATE MATERIALIZED VIEW documents.matview_document_metadata AS
 SELECT
@@ -145,29 +155,36 @@ SELECT
 FROM documents.documents d
 LEFT JOIN reference.filetype_reference ft ON d.filetype_id = ft.filetype_id
 LEFT JOIN reference.storage_reference s ON d.storage_id = s.storage_id;
--- REFRESH MATERIALIZED VIEW documents.matview_document_metadata;
+CREATE UNIQUE INDEX idx_matview_document_metadata_key ON documents.matview_document_metadata(document_id);
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY documents.matview_document_metadata;
 
 CREATE MATERIALIZED VIEW projects.matview_project_tags AS
 SELECT
+  pt.project_tag_id,
   pt.project_id,
   tr.tag,
   tr.category
 FROM projects.project_tag pt
 JOIN reference.tag_reference tr ON pt.tag_id = tr.tag_id;
--- REFRESH MATERIALIZED VIEW projects.matview_project_tags;
+CREATE UNIQUE INDEX idx_matview_project_tags_key ON projects.matview_project_tags(project_tag_id);
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY projects.matview_project_tags;
 
 CREATE MATERIALIZED VIEW projects.matview_project_feature_matrix AS
 SELECT
+  pf.project_feature_id,
   pf.project_id,
   fr.feature
 FROM projects.project_feature pf
 JOIN reference.feature_reference fr ON pf.feature_id = fr.feature_id;
--- REFRESH MATERIALIZED VIEW projects.matview_project_feature_matrix;
+CREATE UNIQUE INDEX idx_matview_project_feature_matrix_key ON projects.matview_project_feature_matrix(project_feature_id);
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY projects.matview_project_feature_matrix;
 
 CREATE MATERIALIZED VIEW projects.matview_project_tech_stack AS
 SELECT
+  pts.project_tech_id,
   pts.project_id,
   ts.technology
 FROM projects.project_tech_stack pts
 JOIN reference.tech_stack_reference ts ON pts.tech_id = ts.tech_id;
--- REFRESH MATERIALIZED VIEW projects.matview_project_tech_stack;
+CREATE UNIQUE INDEX idx_matview_project_tech_stack_key ON projects.matview_project_tech_stack(project_tech_id);
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY projects.matview_project_tech_stack;
@@ -1,12 +1,133 @@
+import itertools
+import os
+from contextlib import contextmanager
+
 import pytest
-import psycopg2
+
+from src.scripts import connection_pool, template_databases
+from src.scripts.quest_4_Generate_Fake_Data import registry
+
+# With PROJECTPULSE_ADMIN_DSN set, every pytest-xdist worker runs on its own clone of a
+# seeded template database, and tests asking for `database` / `admin_dsn` get a fresh
+# clone of their own. Without it, tests share the PROJECTPULSE_DSN database.
+
+_clone_numbers = itertools.count()
+
+
+def _admin_dsn():
+    return os.environ.get("PROJECTPULSE_ADMIN_DSN")
+
+
+def pytest_configure(config):
+    # On the shared database, one worker's open test transaction blocks the others' TRUNCATE and COPY
+    parallel = getattr(config.option, "numprocesses", None) or hasattr(config, "workerinput")
+    if parallel and not _admin_dsn():
+        raise pytest.UsageError(
+            "pytest-xdist workers need a database each: set PROJECTPULSE_ADMIN_DSN to the table owner's DSN, "
+            "or run without -n"
+        )
+
+
+def _clone_name(config, suffix=""):
+    # pytest-xdist names its workers gw0, gw1, ...
+    worker = getattr(config, "workerinput", {}).get("workerid", "main")
+    return f"{template_databases.database_name(_admin_dsn())}_test_{worker}{suffix}"
+
+
+@contextmanager
+def _cloned(template, name):
+    """A database cloned from template, which PROJECTPULSE_DSN (so get_connection()) points at meanwhile."""
+    template_databases.clone(_admin_dsn(), template, name)
+    dsns = {
+        "dsn": template_databases.with_database(connection_pool.env_dsn(), name),
+        "admin_dsn": template_databases.with_database(_admin_dsn(), name),
+    }
+    registry.clear()
+    try:
+        with pytest.MonkeyPatch.context() as env:
+            env.setenv("PROJECTPULSE_DSN", dsns["dsn"])
+            yield dsns
+    finally:
+        for dsn in dsns.values():
+            connection_pool.close_all(dsn)
+        template_databases.drop(_admin_dsn(), name)
+        registry.clear()
+
 
 @pytest.fixture(scope="session")
-def conn():
-    return psycopg2.connect(
-        dbname="projectpulse",
-        user="nobody",
-        password="secure123",
-        host="localhost",
-        port="5432"
-    )
+def template():
+    return template_databases.ensure_template(_admin_dsn()) if _admin_dsn() else None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def worker_database(request, template):
+    if template is None:
+        conn = connection_pool.connect()
+        template_databases.seed_if_empty(conn)
+        conn.close()
+        yield {"dsn": connection_pool.env_dsn(), "admin_dsn": None}
+        return
+    with _cloned(template, _clone_name(request.config)) as dsns:
+        yield dsns
+
+
+@pytest.fixture
+def database(request, template, worker_database):
+    # For tests whose data must be committed and seen by other connections
+    if template is None:
+        yield worker_database  # no CREATEDB role: committed to the shared database, as before
+        return
+    with _cloned(template, _clone_name(request.config, f"_{next(_clone_numbers)}")) as dsns:
+        yield dsns
+
+
+@pytest.fixture(scope="module")
+def module_database(request, template, worker_database):
+    # A clone shared by one module's tests, for expensive setup such as the plan dataset
+    if template is None:
+        pytest.skip("set PROJECTPULSE_ADMIN_DSN to the table owner's DSN to run DDL tests")
+    with _cloned(template, _clone_name(request.config, f"_{next(_clone_numbers)}")) as dsns:
+        yield dsns
+
+
+def _savepoint(conn, sql):
+    with conn.cursor() as cur:
+        cur.execute(sql)
+
+
+@pytest.fixture
+def conn(request, worker_database):
+    if "database" in request.fixturenames:
+        # Other connections must see this test's writes: commit for real on its own clone
+        request.getfixturevalue("database")
+        conn = connection_pool.connect()
+        yield conn
+        conn.close()
+        return
+
+    # Everything the test commits is a savepoint; the whole transaction is rolled back at teardown
+    conn = connection_pool.connect()
+    _savepoint(conn, "SAVEPOINT test_commit")
+    conn.commit = lambda: _savepoint(conn, "RELEASE SAVEPOINT test_commit; SAVEPOINT test_commit")
+    conn.rollback = lambda: _savepoint(conn, "ROLLBACK TO SAVEPOINT test_commit")
+    registry.clear()
+    yield conn
+    del conn.commit, conn.rollback
+    conn.rollback()
+    registry.clear()  # ids loaded during the test were rolled back
+    conn.close()
+
+
+@pytest.fixture
+def admin_dsn(database):
+    # DDL tests (index rebuilds, matview refreshes) need the tables' owner
+    if database["admin_dsn"] is None:
+        pytest.skip("set PROJECTPULSE_ADMIN_DSN to the table owner's DSN to run DDL tests")
+    return database["admin_dsn"]
+
+
+@pytest.fixture
+def admin_conn(admin_dsn):
+    conn = connection_pool.connect(admin_dsn)
+    yield conn
+    conn.close()
@@ -0,0 +1,72 @@
+import asyncio
+import random
+
+import pytest
+
+from src.scripts import async_generate
+from src.scripts.async_generate import generate
+from src.scripts.quest_4_Generate_Fake_Data import generate_reference_tables, truncate_all_tables
+
+COUNTS = {"users": 6, "sessions": 30, "projects": 5, "project_links": 8, "documents": 25, "decision_logs": 4}
+TABLES = ("users.sessions", "projects.project_feature", "projects.project_tag", "documents.documents")
+
+
+def _counts(conn):
+    with conn.cursor() as cur:
+        cur.execute(" UNION ALL ".join(f"SELECT '{t}', COUNT(*) FROM {t}" for t in TABLES))
+        return dict(cur.fetchall())
+
+
+def _filenames(conn, documents):
+    with conn.cursor() as cur:
+        cur.execute("SELECT string_agg(filename, ',' ORDER BY document_id) FROM "
+                    "(SELECT * FROM documents.documents ORDER BY document_id DESC LIMIT %s) d", (documents,))
+        return cur.fetchone()[0]
+
+
+def test_async_engine_loads_every_stage(database, conn):
+    before = _counts(conn)
+    totals = generate(COUNTS, fast=True, chunk_size=4, seed=random.randrange(2 ** 32))
+    conn.rollback()
+    after = _counts(conn)
+
+    assert totals == {**COUNTS, "project_links": 3 * COUNTS["project_links"]}
+    assert after["users.sessions"] == before["users.sessions"] + COUNTS["sessions"]
+    assert after["projects.project_tag"] == before["projects.project_tag"] + COUNTS["project_links"]
+    assert after["documents.documents"] == before["documents.documents"] + COUNTS["documents"]
+
+
+def _seeded_run(conn, seed):
+    truncate_all_tables(conn)  # a seed repeats its unique logins and checksums
+    generate_reference_tables(conn)
+    generate(COUNTS, fast=True, chunk_size=4, seed=seed)
+    filenames = _filenames(conn, COUNTS["documents"])
+    conn.rollback()
+    return filenames
+
+
+def test_async_engine_is_reproducible(database, conn):
+    assert _seeded_run(conn, 7) == _seeded_run(conn, 7)
+
+
+def test_producer_waits_for_slow_writers():
+    async def run():
+        queue, seen = asyncio.Queue(maxsize=2), []
+
+        async def slow_writer():
+            while (chunk := await queue.get()) is not None:
+                seen.append(queue.qsize())
+                await asyncio.sleep(0.001)
+
+        streams = [("t", ("n",), ((n,) for n in range(100)))]
+        await asyncio.gather(async_generate._produce(streams, {"t": queue}, chunk_size=5), slow_writer())
+        return seen
+
+    seen = asyncio.run(run())
+    assert len(seen) == 20 and max(seen) <= 2
+
+
+def test_writer_errors_surface(database):
+    # Raised in a writer thread; the producer and the other writers are cancelled
+    with pytest.raises(ValueError, match="Unknown load method"):
+        generate(COUNTS, fast=True, method="bogus")
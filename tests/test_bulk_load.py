@@ -0,0 +1,41 @@
+from src.scripts.bulk_load import bulk_load, capture
+from src.scripts.quest_4_Generate_Fake_Data import (
+    generate_documents,
+    generate_projects,
+    generate_reference_tables,
+    generate_users,
+)
+
+
+def test_capture_finds_quest_3_indexes_and_constraints(conn):
+    state = capture(conn)
+    indexes = {index["name"] for index in state["indexes"]}
+    constraints = {con["name"]: con["type"] for con in state["constraints"]}
+
+    assert "documents.idx_documents_project_uploaded_at" in indexes
+    assert "projects.idx_projects_owner_id" in indexes
+    assert constraints["chk_filename_not_empty"] == "c"
+    assert constraints["documents_project_id_fkey"] == "f"
+    assert "projects.matview_project_summary" in state["matviews"]
+
+
+def test_bulk_load_restores_everything_it_dropped(admin_dsn, conn):
+    before = capture(conn)
+
+    def load():
+        generate_users(conn, count=5)
+        generate_reference_tables(conn)
+        generate_projects(conn, count=5)
+        generate_documents(conn, count=20)
+
+    timings = bulk_load(load, dsn=admin_dsn, unlogged=True, workers=2)
+    assert set(timings) == {"drop", "load", "indexes", "constraints", "matviews_analyze"}
+
+    after = capture(conn)
+    assert sorted(i["definition"] for i in after["indexes"]) == sorted(i["definition"] for i in before["indexes"])
+    assert sorted(c["name"] for c in after["constraints"]) == sorted(c["name"] for c in before["constraints"])
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM pg_constraint WHERE NOT convalidated AND contype IN ('c', 'f')")
+        assert cur.fetchone()[0] == 0
+        cur.execute("SELECT COUNT(*) FROM documents.matview_document_metadata")
+        assert cur.fetchone()[0] == 20
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from src.scripts import churn_workload
+from src.scripts.quest_4_Generate_Fake_Data import generate_documents, generate_sessions
+
+
+def test_table_churn_reports_hot_ratio_and_growth():
+    start = dict.fromkeys(churn_workload._STAT_FIELDS, 0)
+    end = {**start, "updates": 40, "hot_updates": 30, "live_tuples": 90, "dead_tuples": 10, "index_bytes": 8192,
+           "fillfactor": 80}
+    churn = churn_workload.table_churn({"projects.projects": start}, {"projects.projects": end})["projects.projects"]
+    assert churn["hot_ratio"] == 0.75 and churn["dead_ratio"] == 0.1
+    assert churn["index_growth_bytes"] == 8192 and churn["fillfactor"] == 80
+    idle = churn_workload.table_churn({"users.sessions": start}, {"users.sessions": start})["users.sessions"]
+    assert idle["hot_ratio"] is None
+
+
+def test_draw_params_cover_each_operation(conn):
+    samplers = churn_workload.churn_values(conn, skew="zipf:1.1")
+    rng = random.Random(1)
+    for name, operation in churn_workload.OPERATIONS.items():
+        assert set(churn_workload.draw_params(name, samplers, rng)) == set(operation["params"])
+
+
+def test_run_applies_the_mix_at_the_target_rate(database, conn):
+    generate_sessions(conn, count=50, fast=True)
+    generate_documents(conn, count=50, fast=True)
+    mix = {"project_update": 1, "session_touch": 1, "decision_insert": 1, "document_delete": 0}
+
+    results = churn_workload.run(rate=100, workers=2, duration=1.5, mix=mix, seed=random.randrange(2 ** 32))
+    assert set(results["operations"]) == {"project_update", "session_touch", "decision_insert"}
+    total = results["total"]
+    assert total["ops"] == pytest.approx(150, rel=0.2) and total["p99_ms"] >= total["p50_ms"] > 0
+
+    # On a shared database, other idle connections may flush their own counters during the run
+    tables = results["tables"]
+    assert tables["projects.projects"]["updates"] >= results["operations"]["project_update"]["rows"]
+    assert tables["projects.projects"]["fillfactor"] == 80
+    assert 0 <= tables["users.sessions"]["hot_ratio"] <= 1
+    assert tables["projects.project_decision_log"]["inserts"] >= results["operations"]["decision_insert"]["ops"]
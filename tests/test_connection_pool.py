@@ -0,0 +1,89 @@
+import multiprocessing
+
+import psycopg2.extensions
+import pytest
+
+from src.scripts.connection_pool import (
+    ConnectionPool,
+    PoolTimeout,
+    env_dsn,
+    env_settings,
+    get_pool,
+    session_options,
+    using_dsn,
+)
+
+
+def _backend_pid(_):
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_backend_pid()")
+        return cur.fetchone()[0]
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(size=2, settings={"work_mem": "64MB", "statement_timeout": "5s"}, timeout=1)
+    yield pool
+    pool.closeall()
+
+
+def test_settings_come_from_env_and_arguments(monkeypatch):
+    monkeypatch.setenv("PROJECTPULSE_SESSION_SETTINGS", "synchronous_commit=off, work_mem=32MB")
+    assert env_settings({"work_mem": "64MB"}) == {"synchronous_commit": "off", "work_mem": "64MB"}
+    assert session_options({"search_path": "a, b"}) == "-c search_path=a,\\ b"
+
+
+def test_using_dsn_points_the_environment_at_it(monkeypatch):
+    monkeypatch.setenv("PROJECTPULSE_DSN", "dbname=first")
+    with using_dsn("dbname=second"):
+        assert env_dsn() == "dbname=second"
+    with using_dsn(None):
+        assert env_dsn() == "dbname=first"
+    assert env_dsn() == "dbname=first"
+
+
+def test_returned_connections_are_reused_with_startup_settings(pool):
+    conn = pool.getconn()
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE pool_scratch (n int)")
+        cur.execute("SET work_mem = '1MB'")
+    conn.commit()
+    conn.autocommit = True
+    conn.close()
+
+    again = pool.getconn()
+    assert again is conn and not again.autocommit
+    with again.cursor() as cur:
+        cur.execute("SELECT current_setting('work_mem'), current_setting('statement_timeout'), "
+                    "to_regclass('pg_temp.pool_scratch')")
+        assert cur.fetchone() == ("64MB", "5s", None)
+    again.close()
+    assert pool.stats()["opened"] == 1 and pool.stats()["checkouts"] == 2
+
+
+def test_checkouts_wait_then_time_out(pool):
+    first, second = pool.getconn(), pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn(timeout=0.1)
+    second.close()
+    assert pool.getconn(timeout=0.1) is second
+    stats = pool.stats()
+    assert stats["in_use"] == 2 and stats["waits"] == 0 and stats["timeouts"] == 1
+    first.close()
+    second.close()
+
+
+def test_broken_connections_are_discarded(pool):
+    conn = pool.getconn()
+    psycopg2.extensions.connection.close(conn)  # e.g. the server went away
+    conn.close()
+    assert pool.stats()["discarded"] == 1 and pool.stats()["in_use"] == 0
+    with pool.connection() as fresh:
+        assert not fresh.closed
+
+
+def test_forked_processes_open_their_own_connections():
+    parent = _backend_pid(None)
+    with multiprocessing.get_context("fork").Pool(1) as workers:
+        child = workers.map(_backend_pid, [None])[0]
+    assert child != parent
@@ -0,0 +1,39 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.scripts.copy_loader import LOAD_METHODS, load_rows
+
+COLUMNS = ("id", "name", "created_at", "version", "metadata", "token")
+ROWS = [
+    (1, "tab\tnew\nline\\slash", datetime(2024, 5, 1, 12, 30, 15, 123456), 0.1,
+     json.dumps({"tags": ['quote"d', "back\\slash", "tab\there"], "reviewed": True}),
+     "12345678-1234-5678-1234-567812345678"),
+    (2, None, None, 12345.6789, None, None),
+    (3, "ünïcødé", datetime(1999, 12, 31, 23, 59, 59), -0.005, json.dumps({}), None),
+]
+
+
+@pytest.mark.parametrize("method", LOAD_METHODS)
+def test_load_rows_round_trip(conn, method):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE copy_roundtrip (
+                id INT, name TEXT, created_at TIMESTAMP, version NUMERIC, metadata JSONB, token UUID
+            )
+        """)
+        assert load_rows(cur, "copy_roundtrip", COLUMNS, iter(ROWS), method) == len(ROWS)
+
+        cur.execute("SELECT id, name, created_at, version, metadata, token::text FROM copy_roundtrip ORDER BY id")
+        loaded = cur.fetchall()
+    conn.rollback()
+
+    for expected, row in zip(ROWS, loaded):
+        assert row[0] == expected[0]
+        assert row[1] == expected[1]
+        assert row[2] == expected[2]
+        assert row[3] == (None if expected[3] is None else Decimal(str(expected[3])))
+        assert row[4] == (None if expected[4] is None else json.loads(expected[4]))
+        assert row[5] == expected[5]
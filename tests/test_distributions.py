@@ -0,0 +1,112 @@
+import random
+from collections import Counter
+
+import pytest
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts.distributions import NO_VALUE, AliasTable, Follow, Sampler, parse_spec, sampler, weights
+from src.scripts.id_registry import IdSet
+
+
+def test_specs_are_parsed_and_checked():
+    assert parse_spec(None) == ("uniform",)
+    assert parse_spec("zipf:1.2") == ("zipf", 1.2)
+    assert parse_spec("weights:70,25,5") == ("weights", (70.0, 25.0, 5.0))
+    for bad in ("zipf", "zipf:0", "pareto:1,2", "follow:1.5", "weights:0,0", "normal:1", "uniform:1"):
+        with pytest.raises(ValueError):
+            parse_spec(bad)
+
+
+def test_weights_rank_the_first_ids_highest():
+    zipf = weights("zipf:1", 4)
+    assert zipf == [1, 1 / 2, 1 / 3, 1 / 4]
+    pareto = weights("pareto:1.16", 1_000)
+    assert pareto == sorted(pareto, reverse=True)
+    assert sum(pareto[:200]) / sum(pareto) > 0.7  # close to 80/20
+    assert weights("weights:3,1", 3) == [3, 1, 0]
+
+
+def test_alias_table_draws_in_proportion():
+    random.seed(1)
+    table = AliasTable([1, 2, 3, 4], values=[10, 20, 30, 40])
+    drawn = Counter(table.draws(40_000))
+    for position, weight in enumerate([1, 2, 3, 4]):
+        assert drawn[position] / 40_000 == pytest.approx(weight / 10, abs=0.01)
+    assert set(table.picks(100)) <= {10, 20, 30, 40}
+
+
+def test_uniform_samplers_draw_what_random_did():
+    ids = IdSet([(1, 50), (100, 149)])
+    random.seed(5)
+    expected = [random.choice(ids) for _ in range(20)], random.choices(ids, k=20)
+    random.seed(5)
+    uniform = Sampler(ids)
+    assert ([uniform.choice() for _ in range(20)], uniform.choices(20)) == expected
+
+
+def test_skewed_sampler_returns_population_ids():
+    random.seed(2)
+    owners = Sampler(IdSet([(500, 599)]), "zipf:1.5")
+    drawn = Counter(owners.choices(10_000) + [owners.choice() for _ in range(1_000)])
+    assert set(drawn) <= set(range(500, 600))
+    assert drawn.most_common(1)[0][0] == 500 and drawn[500] > drawn[501] > drawn[599]
+    assert owners.choices_for([0, 1, 2]) and owners.position() in range(100)
+
+
+def test_follow_copies_the_parent_value():
+    parent_phases = [4, 3, 2, 1]
+    assert Follow(parent_phases, Sampler([9]), 1.0).choices_for([0, 3, 3]) == [4, 1, 1]
+    assert Follow(parent_phases, Sampler([9]), 0.0).choices_for([0, 3]) == [9, 9]
+    assert Follow([NO_VALUE, 2], Sampler([9]), 1.0).choices_for([0, 1]) == [9, 2]  # a NULL is not copied
+    with pytest.raises(ValueError, match="no parent value"):
+        sampler([1, 2], "follow:0.5")
+
+
+def test_scale_factor_and_skew_options():
+    args = generator.parse_args(["--scale-factor", "0.5", "--skew-profile", "production",
+                                 "--skew", "projects.owner_id=uniform", "--server-side", "sessions"])
+    assert generator.scaled_counts(0.5)["documents"] == generator.SCALE_FACTOR_COUNTS["documents"] // 2
+    assert "projects.owner_id" not in args.skew and "sessions.user_id" not in args.skew
+    assert generator.stage_options("documents", skew=args.skew)["skew"]["phase_id"] == "follow:0.9"
+    assert generator.stage_options("users", skew=args.skew) == {}
+    for argv in (["--skew", "users.login=zipf:1"], ["--skew", "projects.owner_id=follow:0.5"],
+                 ["--skew", "sessions.user_id=zipf:1", "--server-side", "sessions"], ["--scale-factor", "0"]):
+        with pytest.raises(SystemExit):
+            generator.parse_args(argv)
+
+
+def test_production_skew_concentrates_and_correlates_documents(conn):
+    random.seed(3)
+    skew = generator.SKEW_PROFILES["production"]
+    generator.generate_users(conn, count=100, fast=True)
+    generator.generate_projects(conn, count=50, fast=True, skew=generator.stage_options("projects", skew=skew)["skew"])
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*), (SELECT COALESCE(max(document_id), 0) FROM documents.documents) "
+                    "FROM projects.projects")
+        projects, last_document = cur.fetchone()
+        generator.generate_documents(conn, count=2_000, fast=True,
+                                     skew=generator.stage_options("documents", skew=skew)["skew"])
+        cur.execute("""
+            SELECT max(per_project) FROM (SELECT COUNT(*) AS per_project FROM documents.documents
+                                          WHERE document_id > %s GROUP BY project_id) p
+        """, (last_document,))
+        busiest = cur.fetchone()[0]
+        cur.execute("""
+            SELECT avg((d.phase_id = p.phase_id)::int)
+            FROM documents.documents d JOIN projects.projects p USING (project_id)
+            WHERE d.document_id > %s
+        """, (last_document,))
+        same_phase = cur.fetchone()[0]
+    assert busiest > 10 * 2_000 / projects  # uniform would give each project about 2000 / projects
+    assert same_phase > 0.85
+
+
+def test_project_values_keep_null_phases_as_no_value(conn):
+    generator.generate_users(conn, count=5, fast=True)
+    generator.generate_projects(conn, count=5, fast=True)
+    with conn.cursor() as cur:
+        cur.execute("UPDATE projects.projects SET phase_id = NULL WHERE project_id = (SELECT max(project_id) "
+                    "FROM projects.projects)")
+    projects = generator.registry.ids(conn, "projects.projects", "project_id")
+    phases = generator.project_values(conn, projects, ["phase_id"])["phase_id"]
+    assert len(phases) == len(projects) and phases[-1] == NO_VALUE
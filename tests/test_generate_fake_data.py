@@ -1,3 +1,5 @@
+import tracemalloc
+
 import pytest
 from src.scripts.quest_4_Generate_Fake_Data import (
     generate_users,
@@ -7,7 +9,8 @@ from src.scripts.quest_4_Generate_Fake_Data import (
     generate_project_links,
     truncate_all_tables,
     generate_documents,
-    generate_decision_logs
+    generate_decision_logs,
+    scaled_counts
 )
 
 def test_generate_users_runs(conn):
@@ -19,15 +22,26 @@ def test_generate_users_runs(conn):
         count = cur.fetchone()[0]
         assert count == 5
 
+def _count(conn, table):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        return cur.fetchone()[0]
+
+def test_scale_factor_users_load_without_fast(conn):
+    # At 10k users fake.email() alone repeats, and users.login is UNIQUE
+    count = scaled_counts(1)["users"]
+    before = _count(conn, "users.users")
+    generate_users(conn, count=count)
+    assert _count(conn, "users.users") == before + count
+
 def test_generate_sessions_runs(conn):
+    before = _count(conn, "users.sessions")
     generate_sessions(conn, count=10)
 
-    with conn.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM users.sessions")
-        count = cur.fetchone()[0]
-        assert count == 10
+    assert _count(conn, "users.sessions") == before + 10
 
 def test_generate_reference_tables_runs(conn):
+    truncate_all_tables(conn)
     generate_reference_tables(conn)
 
     with conn.cursor() as cur:
@@ -35,11 +49,10 @@ def test_generate_reference_tables_runs(conn):
         assert cur.fetchone()[0] > 0
 
 def test_generate_projects_runs(conn):
+    before = _count(conn, "projects.projects")
     generate_projects(conn, count=3)
 
-    with conn.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM projects.projects")
-        assert cur.fetchone()[0] == 3
+    assert _count(conn, "projects.projects") == before + 3
 
 def test_generate_project_links_runs(conn):
     generate_project_links(conn)
@@ -60,3 +73,20 @@ def test_generate_decision_logs(conn):
     with conn.cursor() as cur:
         cur.execute("SELECT COUNT(*) FROM projects.project_decision_log")
         assert cur.fetchone()[0] >= 5
+
+def _peak_memory_of(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.parametrize("method", ["copy", "insert"])
+def test_chunked_generation_memory_is_bounded(conn, method):
+    generate_sessions(conn, count=100, chunk_size=50, method=method)  # warm up Faker providers
+    small = _peak_memory_of(lambda: generate_sessions(conn, count=100, chunk_size=50, method=method))
+    large = _peak_memory_of(lambda: generate_sessions(conn, count=800, chunk_size=50, method=method))
+
+    # 8x the rows must not mean 8x the memory: only one chunk is alive at a time
+    assert large < small * 1.5, f"❌ peak memory grew from {small} to {large} bytes"
@@ -0,0 +1,39 @@
+import random
+
+from src.scripts.id_registry import IdRegistry, IdSet
+
+
+def test_id_set_stores_ranges():
+    ids = IdSet([(1, 5), (6, 8), (20, 22), (100, 100)])
+    assert list(ids.ranges()) == [(1, 8), (20, 22), (100, 100)]
+    assert len(ids) == 12
+    assert list(ids) == [1, 2, 3, 4, 5, 6, 7, 8, 20, 21, 22, 100]
+    assert [ids[i] for i in range(len(ids))] == list(ids)
+    assert list(ids.slice(6, 4)) == [7, 8, 20, 21]
+
+
+def test_id_set_samples_like_a_sequence():
+    ids = IdSet([(1_000_000, 1_999_999), (5_000_000, 5_000_009)])
+    assert len(ids.starts) == 2  # 1M ids, two ranges of storage
+    assert all(1_000_000 <= random.choice(ids) <= 5_000_009 for _ in range(1_000))
+    assert set(random.choices(IdSet([(7, 9)]), k=200)) == {7, 8, 9}
+
+
+def test_registry_reserves_sequence_ranges(conn):
+    registry = IdRegistry()
+    known = len(registry.ids(conn, "users.users", "user_id"))
+
+    reserved = registry.reserve(conn, "users.users", "user_id", 25)
+    assert len(reserved) == 25
+    assert len(registry.ids(conn, "users.users", "user_id")) == known  # registered once loaded
+    registry.confirm("users.users")
+    assert len(registry.ids(conn, "users.users", "user_id")) == known + 25
+
+    registry.reserve(conn, "users.users", "user_id", 5)
+    registry.discard("users.users")  # the load failed
+    registry.confirm("users.users")
+    assert len(registry.ids(conn, "users.users", "user_id")) == known + 25
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT max(user_id) FROM users.users")
+        assert cur.fetchone()[0] < reserved[0]
@@ -0,0 +1,59 @@
+from src.scripts.index_advisor import advise, redundant_indexes, referenced_columns, unindexed_foreign_keys
+from src.scripts.query_workload import QUERIES
+
+COLUMNS = {
+    "projects.projects": {"project_id", "title", "owner_id", "phase_id", "created_at"},
+    "projects.project_decision_log": {"decision_id", "project_id", "decided_by", "decided_at"},
+    "users.users": {"user_id", "login"},
+}
+
+
+def _index(name, columns, unique=False, constraint=False):
+    return {"table": "projects.projects", "index": name, "columns": columns, "method": "btree",
+            "unique": unique, "partial": False, "constraint": constraint, "scans": 0, "bytes": 8192}
+
+
+def test_referenced_columns_resolves_aliases_and_roles():
+    sql = """
+        SELECT dl.decision_id, u.login FROM projects.project_decision_log dl
+        JOIN users.users u ON dl.decided_by = u.user_id
+        WHERE dl.project_id = $1 ORDER BY dl.decided_at DESC LIMIT 20
+    """
+    assert referenced_columns(sql, COLUMNS) == {
+        ("projects.project_decision_log", "decided_by", "join"),
+        ("users.users", "user_id", "join"),
+        ("projects.project_decision_log", "project_id", "where"),
+        ("projects.project_decision_log", "decided_at", "order"),
+    }
+    assert referenced_columns(QUERIES["projects_by_phase"]["sql"], COLUMNS) == {
+        ("projects.projects", "phase_id", "where"),
+        ("projects.projects", "created_at", "order"),
+    }
+
+
+def test_redundant_indexes_are_prefixes_or_duplicates():
+    index_list = [
+        _index("projects_pkey", ["project_id"], unique=True, constraint=True),
+        _index("idx_owner", ["owner_id"]),
+        _index("idx_owner_created", ["owner_id", "created_at"]),
+        _index("idx_phase_a", ["phase_id"]),
+        _index("idx_phase_b", ["phase_id"]),
+    ]
+    redundant = {index["index"]: index["covered_by"] for index in redundant_indexes(index_list)}
+    assert redundant == {"idx_owner": "idx_owner_created", "idx_phase_b": "idx_phase_a"}
+
+
+def test_foreign_keys_without_index(conn):
+    missing = {(fk["table"], tuple(fk["columns"])) for fk in unindexed_foreign_keys(conn)}
+    assert ("projects.project_decision_log", ("decided_by",)) in missing
+    assert ("documents.documents", ("storage_id",)) in missing
+    assert ("users.sessions", ("user_id",)) in missing
+    # Covered by idx_projects_owner_id
+    assert ("projects.projects", ("owner_id",)) not in missing
+
+
+def test_advise_ranks_creates_before_drops(conn):
+    kinds = [suggestion["kind"] for suggestion in advise(conn)]
+    assert "unindexed foreign key" in kinds
+    assert kinds == sorted(kinds, key=("missing index", "unindexed foreign key", "redundant index",
+                                       "unused index").index)
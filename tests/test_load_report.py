@@ -0,0 +1,50 @@
+import csv
+import json
+import pstats
+
+from src.scripts.load_report import LoadReport, stage_tables
+from src.scripts.quest_4_Generate_Fake_Data import generate_users
+
+
+def test_level_names_cover_every_stage_table():
+    assert stage_tables("users") == ["users.users"]
+    assert stage_tables("sessions+projects") == ["users.sessions", "projects.projects"]
+    assert len(stage_tables("project_links+documents")) == 4
+    assert stage_tables("snapshot") == []
+
+
+def test_stage_records_client_and_server_deltas(conn):
+    report = LoadReport(conn)
+    with report.stage("users") as entry:
+        entry["rows"] = generate_users(conn, count=200, fast=True)
+
+    entry, = report.stages
+    assert entry["rows"] == 200 and entry["rows_per_s"] > 0
+    assert entry["wall_s"] >= entry["cpu_s"] * 0.5 and entry["peak_rss_mb"] > 0
+    assert entry["bytes_sent"] > 200 * 64  # every login carries a 64-character hash
+    assert entry["wal_bytes"] > 0
+    assert entry["tables"]["users.users"]["table_bytes"] >= 0
+    assert entry["index_bytes"] == entry["tables"]["users.users"]["index_bytes"]
+
+
+def test_report_is_written_as_json_and_csv(conn, tmp_path):
+    report = LoadReport(conn)
+    with report.stage("users") as entry:
+        entry["rows"] = generate_users(conn, count=10, fast=True)
+
+    report.write(str(tmp_path / "load.json"))
+    report.write(str(tmp_path / "load.csv"))
+    assert json.loads((tmp_path / "load.json").read_text())["stages"][0]["rows"] == 10
+    with open(tmp_path / "load.csv") as f:
+        row, = csv.DictReader(f)
+    assert row["stage"] == "users" and int(row["rows"]) == 10 and "tables" not in row
+
+
+def test_profiled_stage_dumps_pstats(conn, tmp_path):
+    path = str(tmp_path / "users.prof")
+    report = LoadReport(conn, profile="users", profile_path=path)
+    with report.stage("sessions+users") as entry:
+        entry["rows"] = generate_users(conn, count=10, fast=True)
+
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert "generate_users" in functions
@@ -0,0 +1,46 @@
+from src.scripts.matview_refresh import UNIQUE_KEYS, dependencies, refresh_levels, refresh_stale
+from src.scripts.server_side_generate import server_generate_users
+
+
+def _flush_stats(conn):
+    # Table counters reach pg_stat_user_tables when the writing backend goes idle
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_stat_force_next_flush()")
+    conn.commit()
+
+
+def test_refresh_levels_put_dependent_views_last():
+    deps = {"a": {"t": "r"}, "b": {"a": "m", "t": "r"}, "c": {"t": "r"}}
+    assert refresh_levels(deps, deps) == [["a", "c"], ["b"]]
+
+
+def test_dependencies_cover_quest_3_views(conn):
+    deps = dependencies(conn)
+    assert set(UNIQUE_KEYS) <= set(deps)
+    assert "projects.project_tag" in deps["projects.matview_project_tags"]
+
+
+def test_only_stale_views_are_refreshed(admin_dsn, admin_conn, conn):
+    _flush_stats(conn)
+    assert set(refresh_stale(admin_dsn, force=True)) >= set(UNIQUE_KEYS)
+    assert refresh_stale(admin_dsn) == {}
+
+    server_generate_users(conn, count=5)
+    _flush_stats(conn)
+    assert list(refresh_stale(admin_dsn)) == ["projects.matview_project_summary"]
+
+    with admin_conn.cursor() as cur:
+        cur.execute("""
+            SELECT concurrent, base_changes ? 'users.users' FROM maintenance.matview_refresh_log
+            WHERE matview = 'projects.matview_project_summary' ORDER BY refresh_id DESC LIMIT 1
+        """)
+        assert cur.fetchone() == (True, True)
+    admin_conn.commit()
+
+
+def test_truncated_base_tables_make_views_stale(admin_dsn, admin_conn):
+    refresh_stale(admin_dsn, force=True)
+    with admin_conn.cursor() as cur:
+        cur.execute("TRUNCATE projects.project_tag")  # moves no pg_stat_user_tables counter
+    admin_conn.commit()
+    assert "projects.matview_project_tags" in refresh_stale(admin_dsn)
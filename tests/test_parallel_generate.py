@@ -0,0 +1,61 @@
+import random
+
+from src.scripts.parallel_generate import generate_parallel, shard_counts, shard_seed
+from src.scripts.quest_4_Generate_Fake_Data import registry
+
+
+def test_shard_counts_cover_all_rows():
+    assert shard_counts(10, 3) == [4, 3, 3]
+    assert shard_counts(2, 4) == [1, 1, 0, 0]
+    assert sum(shard_counts(1_000_003, 8)) == 1_000_003
+
+
+def test_shard_seed_is_deterministic_and_distinct():
+    assert shard_seed(42, "documents", 0) == shard_seed(42, "documents", 0)
+    seeds = {shard_seed(42, stage, shard) for stage in ("users", "documents") for shard in range(4)}
+    assert len(seeds) == 8
+
+
+def test_generate_parallel_loads_in_fk_order(database, conn):
+    counts = {"users": 4, "sessions": 6, "projects": 4, "project_links": 4, "documents": 6, "decision_logs": 4}
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM documents.documents")
+        before = cur.fetchone()[0]
+
+    # Without a clone of its own the rows stay committed: a fixed seed would repeat unique logins next run
+    totals = generate_parallel(counts, workers=2, seed=random.randrange(2 ** 32))
+    assert totals["project_links"] == 3 * counts["project_links"]
+    assert totals["documents"] == counts["documents"]
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM documents.documents")
+        assert cur.fetchone()[0] == before + counts["documents"]
+
+
+def _generated_rows(conn):
+    # Ids are compared as offsets from the first id of their block
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT u.login, u.password_hash, p.title, p.owner_id - first.user_id, d.filename, d.checksum,
+                   d.project_id - first.project_id
+            FROM documents.documents d
+            JOIN projects.projects p USING (project_id)
+            JOIN users.users u ON u.user_id = p.owner_id
+            CROSS JOIN (SELECT min(user_id) AS user_id, (SELECT min(project_id) FROM projects.projects) AS project_id
+                        FROM users.users) first
+            ORDER BY d.document_id
+        """)
+        return cur.fetchall()
+
+
+def test_generate_parallel_same_seed_same_rows(admin_conn):
+    counts = {"users": 6, "sessions": 4, "projects": 6, "project_links": 0, "documents": 10, "decision_logs": 0}
+    runs = []
+    for _ in range(2):
+        with admin_conn.cursor() as cur:
+            cur.execute("TRUNCATE users.users, users.sessions, projects.projects, documents.documents CASCADE")
+        admin_conn.commit()
+        registry.clear()
+        generate_parallel(counts, workers=2, seed=7, fast=True)
+        runs.append(_generated_rows(admin_conn))
+    assert len(runs[0]) == counts["documents"] and runs[0] == runs[1]
@@ -0,0 +1,55 @@
+import pytest
+
+from src.scripts.plan_regression import capture_all, compare, load_baselines
+from src.scripts.query_workload import QUERIES
+
+
+@pytest.fixture(scope="module")
+def plans(module_database):
+    # Regenerates the seeded plan dataset and ANALYZEs it, so it needs the owner
+    return capture_all(module_database["admin_dsn"])
+
+
+def _plan(nodes, hit):
+    return {"nodes": nodes, "shared_hit": hit, "shared_read": 0}
+
+
+def test_compare_flags_seq_scan_flips_and_buffer_growth():
+    index_scan = [
+        {"node": "Bitmap Heap Scan", "relation": "projects"},
+        {"node": "Bitmap Index Scan", "relation": "projects", "index": "idx_projects_owner_id"},
+    ]
+    seq_scan = [{"node": "Seq Scan", "relation": "projects"}]
+
+    assert compare(_plan(index_scan, 5), _plan(index_scan, 40)) == []
+    problems = compare(_plan(index_scan, 5), _plan(seq_scan, 280))
+    assert problems == [
+        "projects: idx_projects_owner_id index scan flipped to Seq Scan",
+        "shared buffers grew from 5 to 280",
+    ]
+
+
+def test_compare_flags_growing_row_misestimates():
+    def scan(plan_rows, actual_rows):
+        return [{"node": "Index Scan", "relation": "documents", "index": "idx_documents_project_id",
+                 "plan_rows": plan_rows, "actual_rows": actual_rows}]
+
+    assert compare(_plan(scan(100, 80), 5), _plan(scan(100, 30), 5)) == []  # off, but not 10x
+    assert compare(_plan(scan(5, 400), 5), _plan(scan(5, 600), 5)) == []  # as far off as before
+    assert compare(_plan(scan(100, 80), 5), _plan(scan(100, 2), 5)) == [
+        "Index Scan on documents: estimated 100 rows, got 2 (50x off, was 1.2x)"
+    ]
+
+
+def test_baselines_were_captured_on_rows():
+    # An empty result pins a plan nobody runs and leaves no estimate to check
+    for name, baseline in load_baselines().items():
+        assert baseline["nodes"][0]["actual_rows"] > 0, name
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_plan_matches_baseline(name, plans):
+    baseline = load_baselines().get(name)
+    if baseline is None:
+        pytest.skip(f"no baseline for {name}: run src/scripts/plan_regression.py --update")
+    assert compare(baseline, plans[name]) == []
@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import pytest
+
+from src.scripts.bench_queries import connect_worker, percentile, run_query, start_workers
+from src.scripts.query_workload import QUERIES, draw_params, variants, workload_values
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert [percentile(values, p) for p in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([7.0], 99) == 7.0
+
+
+def test_every_workload_query_runs(conn):
+    values = workload_values(conn)
+    with conn.cursor() as cur:
+        for name, query in QUERIES.items():
+            cur.execute(query["sql"], draw_params(query, values))
+            cur.fetchall()
+    conn.commit()
+
+
+def test_matview_variants_run_under_concurrency(admin_dsn, admin_conn):
+    values = workload_values(admin_conn)
+    for label, sql, query in variants(["project_summary", "tags_by_project"], matviews=True):
+        stats = run_query(admin_dsn, sql, query, values, iterations=9, concurrency=2, warmup=1)
+        assert stats["queries"] == 9
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+
+def test_a_worker_that_cannot_connect_fails_the_run():
+    ready = threading.Barrier(3)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = [pool.submit(ready.wait),
+                pool.submit(connect_worker, "dbname=projectpulse_missing user=nobody host=localhost", ready)]
+        with pytest.raises(psycopg2.OperationalError):
+            start_workers(ready, jobs)  # instead of waiting forever for the second worker
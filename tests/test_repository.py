@@ -0,0 +1,68 @@
+import psycopg2
+import pytest
+
+from src.scripts import connection_pool, repository
+from src.scripts.quest_4_Generate_Fake_Data import generate_documents
+
+
+@pytest.fixture
+def busiest_project(conn):
+    # --fast stamps a whole batch with the same uploaded_at: pages must break the ties on document_id
+    generate_documents(conn, count=120, fast=True)
+    with conn.cursor() as cur:
+        cur.execute("SELECT project_id FROM documents.documents GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1")
+        return cur.fetchone()[0]
+
+
+def test_select_sql_builds_keyset_bounds():
+    sql = repository.select_sql("documents", ("project_id",), after=True, limit=True)
+    assert "(uploaded_at, document_id) < (%(after_0)s, %(after_1)s)" in sql
+    assert sql.endswith("ORDER BY uploaded_at DESC, document_id DESC LIMIT %(limit)s")
+    with pytest.raises(ValueError, match="cannot be filtered on title"):
+        repository.select_sql("projects", ("title",))
+
+
+def test_pages_and_stream_return_the_same_rows(conn, busiest_project):
+    with conn.cursor() as cur:
+        cur.execute("SELECT document_id FROM documents.documents WHERE project_id = %s "
+                    "ORDER BY uploaded_at DESC, document_id DESC", (busiest_project,))
+        expected = [document_id for document_id, in cur.fetchall()]
+
+    paged = [record for records in repository.pages(conn, "documents", limit=3, project_id=busiest_project)
+             for record in records]
+    streamed = list(repository.stream(conn, "documents", itersize=2, project_id=busiest_project))
+    assert [record.document_id for record in paged] == expected
+    assert streamed == paged and isinstance(paged[0], repository.Document)
+
+
+def test_last_page_has_no_next_key(conn, busiest_project):
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM documents.documents WHERE project_id = %s", (busiest_project,))
+        total = cur.fetchone()[0]
+    records, after = repository.page(conn, "documents", limit=total + 1, project_id=busiest_project)
+    assert len(records) == total and after is None
+
+
+def test_lookups_are_prepared_once_per_checkout(conn, busiest_project):
+    project = repository.lookup_one(conn, "project", busiest_project)
+    assert project.project_id == busiest_project and conn.prepared == {"project"}
+    recent = repository.lookup(conn, "recent_documents", busiest_project, 2)
+    assert recent == repository.page(conn, "documents", limit=2, project_id=busiest_project)[0]
+    assert repository.lookup_one(conn, "project", -1) is None
+
+    # DISCARD ALL on return drops the statements: the next checkout prepares again
+    other = connection_pool.connect()
+    repository.lookup(other, "project", busiest_project)
+    other.close()
+    again = connection_pool.connect()  # idle connections are reused last in, first out
+    assert again is other and again.prepared == set()
+    assert repository.lookup_one(again, "project", busiest_project).project_id == busiest_project
+    again.close()
+
+
+def test_lookups_work_on_plain_connections(conn, busiest_project):
+    plain = psycopg2.connect(connection_pool.env_dsn())
+    try:
+        assert repository.lookup_one(plain, "document", -1) is None
+    finally:
+        plain.close()
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from src.scripts.search import (
+    document_query, ensure_indexes, search_documents, search_projects, trigrams_available,
+)
+
+
+def test_ilike_fallback_escapes_wildcards():
+    sql, params = document_query("100%_done", fuzzy=False)
+    assert "ILIKE %(pattern)s" in sql
+    assert params["pattern"] == "%100\\%\\_done%"
+
+    sql, params = document_query("report", {"reviewed": True})
+    assert "<%% filename" in sql and "custom_properties @> %(properties)s::jsonb" in sql
+    assert json.loads(params["properties"]) == {"reviewed": True}
+
+
+def test_properties_filter_uses_containment(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT custom_properties FROM documents.documents WHERE custom_properties ? 'tags' LIMIT 1")
+        row = cur.fetchone()
+    conn.commit()
+    if row is None:
+        pytest.skip("no documents with custom_properties: generate data first")
+    properties = {"tags": [row[0]["tags"][0]], "source": row[0]["source"]}
+
+    found = search_documents(conn, properties=properties, limit=5)
+    assert found
+    with conn.cursor() as cur:
+        cur.execute("SELECT custom_properties FROM documents.documents WHERE document_id = ANY(%s)",
+                    ([document_id for document_id, _, _ in found],))
+        for stored, in cur.fetchall():
+            assert properties["tags"][0] in stored["tags"] and stored["source"] == properties["source"]
+    conn.commit()
+
+
+def test_fuzzy_search_tolerates_typos(conn):
+    if not trigrams_available(conn):
+        pytest.skip("pg_trgm is not installed")
+    with conn.cursor() as cur:
+        cur.execute("SELECT title FROM projects.projects WHERE length(title) > 12 LIMIT 1")
+        title, = cur.fetchone()
+    conn.commit()
+    typo = title[:5] + title[6:]
+    assert title in [found for _, found, _ in search_projects(conn, typo, limit=50)]
+
+
+def test_ensure_indexes_creates_the_jsonb_index(admin_conn):
+    ready, skipped = ensure_indexes(admin_conn)
+    assert "idx_documents_custom_properties" in ready
+    with admin_conn.cursor() as cur:
+        cur.execute("SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_documents_custom_properties'")
+        assert "jsonb_path_ops" in cur.fetchone()[0]
+    admin_conn.commit()
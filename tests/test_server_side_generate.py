@@ -0,0 +1,23 @@
+from src.scripts.id_registry import IdSet
+from src.scripts.server_side_generate import _fk, server_generate_documents, server_generate_users
+
+
+def test_fk_expression_maps_positions_onto_ranges(conn):
+    ids = IdSet([(1, 3), (10, 12), (40, 40)])
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT {_fk(ids, 'p')} FROM generate_series(0, {len(ids) - 1}) p ORDER BY p")
+        assert [r[0] for r in cur.fetchall()] == list(ids)
+
+
+def test_server_side_rows_respect_constraints(conn):
+    assert server_generate_users(conn, count=20) == 20
+    assert server_generate_documents(conn, count=1_000, batch_size=400) == 1_000
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM users.users WHERE login <> lower(login) OR login NOT LIKE '%@%'")
+        assert cur.fetchone()[0] == 0
+        cur.execute("""
+            SELECT COUNT(*) FROM documents.documents
+            WHERE filename LIKE 'document\\_%' AND custom_properties ?& ARRAY['reviewed', 'tags', 'source', 'format']
+        """)
+        assert cur.fetchone()[0] >= 1_000
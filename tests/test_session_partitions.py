@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.scripts.quest_4_Generate_Fake_Data import fast_session_rows
+from src.scripts.session_partitions import (
+    apply_retention,
+    ensure_partitions,
+    next_period,
+    partition_name,
+    partitions,
+    period_start,
+)
+
+PARENT = "users.test_sessions_partitioned"
+
+
+@pytest.fixture
+def parent(admin_conn):
+    with admin_conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TABLE {PARENT} (LIKE users.sessions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            PARTITION BY RANGE (created_at)
+        """)
+    admin_conn.commit()
+    yield PARENT
+    with admin_conn.cursor() as cur:
+        cur.execute(f"DROP TABLE {PARENT}")
+    admin_conn.commit()
+
+
+def test_periods_roll_over_months_and_years():
+    assert next_period(datetime(2025, 12, 1), "month") == datetime(2026, 1, 1)
+    assert next_period(datetime(2025, 12, 31), "day") == datetime(2026, 1, 1)
+    assert partition_name(datetime(2026, 3, 1), "month") == "users.sessions_p202603"
+
+
+def test_session_window_spreads_created_at():
+    cutoff = datetime.now() - timedelta(days=31)
+    assert any(row[2] < cutoff for row in fast_session_rows(200, [1], window_days=365))
+
+
+def _add_session(conn, parent, created, expires):
+    with conn.cursor() as cur:
+        cur.execute(f"INSERT INTO {parent} (user_id, created_at, expires_at) VALUES (1, %s, %s)", (created, expires))
+    conn.commit()
+
+
+def test_partitions_are_created_ahead_and_expired_ones_dropped(admin_conn, parent):
+    now = datetime.now()
+    since = now - timedelta(days=150)
+    created = ensure_partitions(admin_conn, "month", ahead=2, since=since, parent=parent)
+    months = (now.year - since.year) * 12 + now.month - since.month
+    assert len(created) == months + 1 + 2  # back-filled months, the current one, 2 ahead
+    assert ensure_partitions(admin_conn, "month", ahead=2, parent=parent) == []
+
+    dead, live = now - timedelta(days=120), now - timedelta(days=75)
+    _add_session(admin_conn, parent, dead, dead + timedelta(days=30))
+    _add_session(admin_conn, parent, live, now + timedelta(days=1))  # long-lived session still active
+
+    dropped = apply_retention(admin_conn, retention_days=30, parent=parent)
+    assert partition_name(period_start(dead, "month"), "month", parent) in dropped
+    remaining = {name for name, _, _ in partitions(admin_conn, parent)}
+    assert partition_name(period_start(live, "month"), "month", parent) in remaining
+    assert partition_name(period_start(now, "month"), "month", parent) in remaining
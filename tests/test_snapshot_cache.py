@@ -0,0 +1,77 @@
+import os
+
+from src.scripts import quest_4_Generate_Fake_Data as generator
+from src.scripts import snapshot_cache
+
+COUNTS = {"users": 30, "sessions": 20, "projects": 10, "project_links": 5, "documents": 20, "decision_logs": 5}
+
+
+def _argv(cache_dir, seed=42):
+    argv = ["--fast", "--seed", str(seed), "--snapshot-cache", str(cache_dir)]
+    for stage, count in COUNTS.items():
+        argv += ["--count", f"{stage}={count}"]
+    return argv
+
+
+def _rows(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT md5(string_agg(u::text, ',' ORDER BY user_id)) FROM users.users u")
+        users = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM documents.documents")
+        return users, cur.fetchone()[0]
+
+
+def test_key_tracks_seed_counts_and_options():
+    key = snapshot_cache.snapshot_key(42, COUNTS, {"fast": True})
+    assert key == snapshot_cache.snapshot_key(42, dict(COUNTS), {"fast": True})
+    assert key != snapshot_cache.snapshot_key(43, COUNTS, {"fast": True})
+    assert key != snapshot_cache.snapshot_key(42, {**COUNTS, "users": 31}, {"fast": True})
+    assert key != snapshot_cache.snapshot_key(42, COUNTS, {"fast": False})
+
+
+def test_engines_do_not_share_snapshots(tmp_path):
+    sync, async_ = (generator.snapshot_options(generator.parse_args(_argv(tmp_path) + ["--engine", engine]))
+                    for engine in ("sync", "async"))
+    assert snapshot_cache.snapshot_key(42, COUNTS, sync) != snapshot_cache.snapshot_key(42, COUNTS, async_)
+
+
+def test_second_run_reloads_the_snapshot(database, conn, tmp_path, capsys):
+    generator.main(_argv(tmp_path))
+    generated = _rows(conn)
+    conn.commit()
+    assert "Saved snapshot" in capsys.readouterr().out
+
+    generator.main(_argv(tmp_path))
+    assert "Reloaded snapshot" in capsys.readouterr().out
+    assert _rows(conn) == generated
+
+    with conn.cursor() as cur:
+        # Sequences were moved past the reloaded ids
+        cur.execute("INSERT INTO users.users (login, password_hash) VALUES ('after@reload.test', 'x') RETURNING user_id")
+        assert cur.fetchone()[0] > COUNTS["users"]
+    conn.rollback()
+
+
+def test_corrupted_snapshot_is_rebuilt(database, conn, tmp_path, capsys):
+    generator.main(_argv(tmp_path))
+    capsys.readouterr()
+    key, = os.listdir(tmp_path)
+    with open(os.path.join(tmp_path, key, "users.users.copy.gz"), "ab") as f:
+        f.write(b"garbage")
+    assert snapshot_cache.verify(tmp_path, key) is None
+
+    generator.main(_argv(tmp_path))
+    assert "Saved snapshot" in capsys.readouterr().out
+    assert snapshot_cache.verify(tmp_path, key) is not None
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    for age, key in enumerate(["newest", "middle", "oldest"]):
+        os.makedirs(tmp_path / key)
+        (tmp_path / key / "data.copy.gz").write_bytes(b"x" * 1024)
+        (tmp_path / key / snapshot_cache.MANIFEST).write_text("{}")
+        os.utime(tmp_path / key / snapshot_cache.MANIFEST, (1_000_000 - age, 1_000_000 - age))
+    os.makedirs(tmp_path / "half-built")  # no manifest: not a snapshot yet
+
+    assert snapshot_cache.evict(tmp_path, max_gb=1500 / 1024 ** 3) == ["oldest", "middle"]
+    assert sorted(os.listdir(tmp_path)) == ["half-built", "newest"]
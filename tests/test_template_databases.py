@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.scripts import template_databases
+from src.scripts.template_databases import TEMPLATE_COUNTS, database_name, fingerprint, with_database
+
+
+def test_fingerprint_tracks_the_dataset():
+    assert fingerprint() == fingerprint()
+    assert fingerprint(seed=1) != fingerprint()
+    assert fingerprint({**TEMPLATE_COUNTS, "users": 11}) != fingerprint()
+
+
+def test_fingerprint_tracks_the_modules_rows_are_built_with(tmp_path, monkeypatch):
+    before = fingerprint()
+    changed = tmp_path / "copy_loader.py"
+    changed.write_text("# edited\n")
+    modules = template_databases._GENERATOR_MODULES
+    monkeypatch.setattr(template_databases, "_GENERATOR_MODULES", modules[:-1] + (SimpleNamespace(__file__=str(changed)),))
+    assert fingerprint() != before
+
+
+def test_dsn_database_is_swapped():
+    dsn = with_database("dbname=projectpulse user=postgres host=localhost", "projectpulse_test_gw0")
+    assert database_name(dsn) == "projectpulse_test_gw0" and "user=postgres" in dsn
+
+
+def test_clones_start_from_the_seeded_template(database, conn):
+    if database["admin_dsn"] is None:
+        pytest.skip("set PROJECTPULSE_ADMIN_DSN to clone the template")
+    with conn.cursor() as cur:
+        cur.execute("SELECT (SELECT COUNT(*) FROM users.users), (SELECT COUNT(*) FROM documents.documents)")
+        assert cur.fetchone() == (TEMPLATE_COUNTS["users"], TEMPLATE_COUNTS["documents"])
+
+
+def test_commits_inside_a_test_are_savepoints(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM users.sessions")
+        conn.commit()
+        cur.execute("INSERT INTO users.sessions (user_id) SELECT min(user_id) FROM users.users")
+        conn.rollback()  # back to the last commit, not to the start of the test
+        cur.execute("SELECT COUNT(*) FROM users.sessions")
+        assert cur.fetchone()[0] == 0
@@ -0,0 +1,51 @@
+import json
+
+from faker import Faker
+
+from src.scripts.quest_4_Generate_Fake_Data import (
+    fast_document_rows,
+    fast_session_rows,
+    fast_user_rows,
+    generate_documents,
+    generate_users,
+)
+from src.scripts.value_pools import ValuePools, batch_sizes
+
+
+def test_batch_sizes_cover_count():
+    assert list(batch_sizes(2_500, 1_000)) == [1_000, 1_000, 500]
+    assert list(batch_sizes(0)) == []
+
+
+def test_pools_are_bounded_and_unique_keys_never_repeat():
+    pools = ValuePools(Faker(["en_US"]), size=10)
+    assert len(set(pools.sample("word", 500))) <= 10
+
+    keys = pools.unique_keys(1_000) + pools.unique_keys(1_000)
+    assert len(set(keys)) == 2_000
+    checksums = pools.unique_sha1(1_000)
+    assert len(set(checksums)) == 1_000 and all(len(c) == 40 for c in checksums)
+
+
+def test_fast_rows_satisfy_constraints():
+    logins = [login for login, _ in fast_user_rows(2_000)]
+    assert len(set(logins)) == len(logins)
+    assert all("@" in login and login == login.lower() for login in logins)
+
+    for row in fast_session_rows(100, [1, 2]):
+        assert set(json.loads(row[8])) == {"browser", "device", "location"}
+    for row in fast_document_rows(100, [1], [1], [1], [1], [1]):
+        assert row[1] and json.loads(row[12])["source"] in ("internal", "external")
+
+
+def test_fast_mode_loads_rows(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM documents.documents")
+        before = cur.fetchone()[0]
+
+    assert generate_users(conn, count=50, fast=True) == 50
+    assert generate_documents(conn, count=2_000, chunk_size=500, fast=True) == 2_000
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM documents.documents")
+        assert cur.fetchone()[0] == before + 2_000